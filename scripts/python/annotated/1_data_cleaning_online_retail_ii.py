@@ -228,6 +228,16 @@ else:
 # 
 # We will merge both sheets into a single DataFrame to prepare for data cleaning and relational transformation.
 # 
+# 🗂️ **Sheet cache:** parsing the workbook takes minutes, so each sheet is cached as a Parquet file in `data/cache/`.  
+# The cache key is a hash of that sheet's raw XML inside the `.xlsx` (plus the shared strings and styles it depends on),  
+# so unchanged sheets load in under a second and only a sheet whose bytes changed is re-parsed.  
+# Set `USE_SHEET_CACHE = False` to always parse the Excel file directly.
+# 
+# 🌊 **Streaming ingest:** sheets that do need parsing are read with `INGEST_MODE = 'stream'` by default.  
+# Each sheet is parsed in its own worker process with `openpyxl` in read-only mode, streaming rows into typed column buffers.  
+# The combined DataFrame is then assembled column by column, so no per-sheet DataFrame or `pd.concat` copy is created.  
+# Use `INGEST_MODE = 'pandas'` to fall back to `pd.read_excel`.
+# 
 # ---
 # 
 
@@ -238,17 +248,281 @@ else:
 import pandas as pd
 import numpy as np
 import os
+import hashlib
+import zipfile
+import xml.etree.ElementTree as ET
 
 # 📁 Full path to dataset
 excel_path = os.path.join(project_base_path, 'data', 'online_retail_II.xlsx')
+excel_sheets = ['Year 2009-2010', 'Year 2010-2011']
+
+# 🗂️ Columnar cache for parsed sheets (set to False to always re-parse the workbook)
+USE_SHEET_CACHE = True
+SHEET_CACHE_VERSION = 1  # bump to invalidate every cached sheet
+sheet_cache_dir = os.path.join(project_base_path, 'data', 'cache')
+
+# 📦 Parquet caching requires pyarrow – fall back to plain Excel parsing without it
+if USE_SHEET_CACHE:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        USE_SHEET_CACHE = False
+        safe_print("⚠️ pyarrow not installed – sheet cache disabled, parsing Excel directly.")
 
 # 🔍 Show the resolved path
 safe_print(f"📄 Looking for: {excel_path}")
 
-# 📥 Load Excel sheets
+# 🔑 Fingerprint a single worksheet from the raw .xlsx bytes (no parsing needed)
+def sheet_fingerprint(path, sheet_name):
+    """
+    Hash the XML parts that determine one sheet's parsed values:
+    the worksheet itself, the shared string table and the number styles.
+    """
+    ns = {
+        'm': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+        'r': 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+    }
+    with zipfile.ZipFile(path) as zf:
+        workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+        rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+        targets = {rel.get('Id'): rel.get('Target') for rel in rels}
+
+        sheet = next((s for s in workbook.find('m:sheets', ns) if s.get('name') == sheet_name), None)
+        if sheet is None:
+            raise ValueError(f"❌ Sheet not found in workbook: {sheet_name}")
+        target = targets[sheet.get(f"{{{ns['r']}}}id")]
+        sheet_member = target.lstrip('/') if target.startswith('/') else f"xl/{target}"
+
+        digest = hashlib.sha256(f"v{SHEET_CACHE_VERSION}|{sheet_name}".encode())
+        members = set(zf.namelist())
+        for member in (sheet_member, 'xl/sharedStrings.xml', 'xl/styles.xml'):
+            if member in members:
+                with zf.open(member) as fh:
+                    for block in iter(lambda: fh.read(1 << 20), b''):
+                        digest.update(block)
+    return digest.hexdigest()
+
+# 🧱 Make mixed-type object columns Arrow-compatible (e.g., numeric and 'C'-prefixed invoices)
+def to_arrow_safe(df):
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+# ⚙️ Parser for sheets that are not cached: 'stream' (parallel openpyxl read-only) or 'pandas' (pd.read_excel)
+INGEST_MODE = 'stream'
+
+# 🧬 Typed buffers used by the streaming reader (any other column is kept as text)
+RAW_SHEET_DTYPES = {
+    'Quantity': 'int64',
+    'InvoiceDate': 'datetime64[ns]',
+    'Price': 'float64',
+    'Customer ID': 'float64'
+}
+
+# 🚫 Strings pd.read_excel treats as missing by default (kept identical for the streaming reader)
+EXCEL_NA_STRINGS = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+}
+
+# 🌊 Stream one worksheet row by row into typed column buffers, one bounded partition at a time
+def iter_sheet_column_chunks(path, sheet_name, chunk_rows=None):
+    """
+    Read a worksheet with openpyxl in read-only mode and yield {column: ndarray}
+    partitions of at most chunk_rows rows (a single partition when chunk_rows is None).
+    Numeric and date columns go straight into compact typed buffers, so no
+    intermediate DataFrame is ever built for the sheet.
+    """
+    from array import array
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        header = list(next(rows))
+        kinds = [RAW_SHEET_DTYPES.get(col, 'object') for col in header]
+        blank_row = (None,) * len(header)
+
+        def empty_buffers():
+            buffers = [
+                array('q') if kind == 'int64' else array('d') if kind == 'float64' else []
+                for kind in kinds
+            ]
+            return buffers, [[] for _ in header]
+
+        def append_row(row):
+            for i, (kind, value) in enumerate(zip(kinds, row)):
+                if isinstance(value, str) and value in EXCEL_NA_STRINGS:
+                    value = None
+                if kind == 'int64':
+                    if value is None:
+                        int_gaps[i].append(len(buffers[i]))
+                        value = 0
+                    buffers[i].append(int(value))
+                elif kind == 'float64':
+                    buffers[i].append(np.nan if value is None else float(value))
+                elif kind == 'object' and value is not None:
+                    if isinstance(value, float) and value.is_integer():
+                        value = int(value)  # match read_excel's whole-number handling
+                    buffers[i].append(str(value))
+                else:
+                    buffers[i].append(value)
+
+        def to_columns():
+            columns = {}
+            for col, kind, buffer, gaps in zip(header, kinds, buffers, int_gaps):
+                if kind == 'int64':
+                    values = np.frombuffer(buffer, dtype='int64')
+                    if gaps:  # missing integers upcast to float, as pandas does
+                        values = values.astype('float64')
+                        values[gaps] = np.nan
+                elif kind == 'float64':
+                    values = np.frombuffer(buffer, dtype='float64')
+                elif kind == 'datetime64[ns]':
+                    values = np.array(buffer, dtype='datetime64[ns]')
+                else:
+                    values = np.array(buffer, dtype=object)
+                columns[col] = values
+            return columns
+
+        buffers, int_gaps = empty_buffers()
+        n_rows = 0
+        n_blank = 0  # blank rows are held back so trailing ones are trimmed, as read_excel does
+        emitted = False
+
+        for row in rows:
+            row = tuple(row) + (None,) * (len(header) - len(row))
+            if all(value is None for value in row):
+                n_blank += 1
+                continue
+            for held_row in [blank_row] * n_blank + [row]:
+                append_row(held_row)
+                n_rows += 1
+                if chunk_rows and n_rows == chunk_rows:
+                    yield to_columns()
+                    emitted = True
+                    buffers, int_gaps = empty_buffers()
+                    n_rows = 0
+            n_blank = 0
+
+        if n_rows or not emitted:
+            yield to_columns()
+    finally:
+        workbook.close()
+
+# 🌊 Whole-sheet variant used by the sheet parser (runs inside a worker process)
+def stream_sheet_columns(path, sheet_name):
+    return next(iter_sheet_column_chunks(path, sheet_name))
+
+# 🚀 Parse several sheets concurrently, one worker process per sheet
+def parse_sheets_streaming(path, sheet_names):
+    import multiprocessing as mp
+    from concurrent.futures import ProcessPoolExecutor
+
+    # 'fork' keeps this working from notebooks; elsewhere parse sequentially in-process
+    if len(sheet_names) > 1 and 'fork' in mp.get_all_start_methods():
+        with ProcessPoolExecutor(max_workers=len(sheet_names), mp_context=mp.get_context('fork')) as pool:
+            results = pool.map(stream_sheet_columns, [path] * len(sheet_names), sheet_names)
+            return dict(zip(sheet_names, results))
+    return {sheet_name: stream_sheet_columns(path, sheet_name) for sheet_name in sheet_names}
+
+# 🗂️ Cache file for one sheet, named after the sheet and its content fingerprint
+def sheet_cache_file(path, sheet_name):
+    key = sheet_fingerprint(path, sheet_name)
+    slug = sheet_name.lower().replace(' ', '_')
+    return slug, os.path.join(sheet_cache_dir, f"{slug}_{key[:16]}.parquet")
+
+# 📥 Load each sheet from cache when its bytes are unchanged, otherwise parse it
+def load_excel_sheets(path, sheet_names):
+    """
+    Return the combined raw dataset. Every sheet is held as {column: ndarray}
+    and the final frame is assembled column by column, releasing each sheet's
+    buffer as soon as it has been copied (no pd.concat of full sheet frames).
+    """
+    sheet_columns = {}
+    to_parse = {}
+
+    for sheet_name in sheet_names:
+        if not USE_SHEET_CACHE:
+            to_parse[sheet_name] = None
+            continue
+        slug, cache_file = sheet_cache_file(path, sheet_name)
+        if os.path.exists(cache_file):
+            cached = pd.read_parquet(cache_file)
+            sheet_columns[sheet_name] = {col: cached[col].to_numpy() for col in cached.columns}
+            safe_print(f"⚡ Cache hit: {sheet_name} → {os.path.basename(cache_file)}")
+        else:
+            to_parse[sheet_name] = (slug, cache_file)
+
+    if to_parse:
+        safe_print(f"📖 Parsing sheets ({INGEST_MODE} mode): {list(to_parse)}")
+        if INGEST_MODE == 'stream':
+            parsed = parse_sheets_streaming(path, list(to_parse))
+        else:
+            parsed = {
+                sheet_name: {col: values.to_numpy() for col, values in to_arrow_safe(frame).items()}
+                for sheet_name, frame in pd.read_excel(path, sheet_name=list(to_parse)).items()  # opens the workbook once
+            }
+
+        for sheet_name, cache_target in to_parse.items():
+            sheet_columns[sheet_name] = parsed.pop(sheet_name)
+            if cache_target is None:
+                continue
+            slug, cache_file = cache_target
+            os.makedirs(sheet_cache_dir, exist_ok=True)
+            # 🧹 Drop stale cache entries for this sheet before writing the new one
+            for old_file in os.listdir(sheet_cache_dir):
+                if old_file.startswith(f"{slug}_") and old_file.endswith('.parquet'):
+                    os.remove(os.path.join(sheet_cache_dir, old_file))
+            pd.DataFrame(sheet_columns[sheet_name], copy=False).to_parquet(cache_file, index=False)
+            safe_print(f"💾 Cached: {sheet_name} → {os.path.basename(cache_file)}")
+
+    # 🔗 Concatenate column by column, freeing per-sheet buffers as we go
+    parts = [sheet_columns.pop(sheet_name) for sheet_name in sheet_names]
+    combined = {}
+    for col in list(parts[0]):
+        combined[col] = np.concatenate([part.pop(col) for part in parts])
+    return pd.DataFrame(combined, copy=False)
+
+# 🌊 Out-of-core mode: clean bounded partitions instead of loading every sheet at once (see Step 21.4c)
+CHUNKED_MODE = False
+CHUNK_ROWS = 250_000  # rows per partition in chunked and incremental mode
+
+# 🔁 Incremental mode: clean only raw rows appended since the last run, keeping state in data/cache (see Step 21.4d)
+INCREMENTAL_MODE = False
+if INCREMENTAL_MODE:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        INCREMENTAL_MODE = False
+        safe_print("⚠️ pyarrow not installed – incremental mode disabled, running a full rebuild.")
+
+# 🌊 Yield the raw dataset as bounded partitions: cached Parquet batches or streamed worksheet rows
+def iter_raw_partitions(path, sheet_names, chunk_rows=CHUNK_ROWS):
+    for sheet_name in sheet_names:
+        if USE_SHEET_CACHE:
+            _, cache_file = sheet_cache_file(path, sheet_name)
+            if os.path.exists(cache_file):
+                import pyarrow.parquet as pq
+                safe_print(f"⚡ Cache hit: {sheet_name} → reading {os.path.basename(cache_file)} in batches")
+                for batch in pq.ParquetFile(cache_file).iter_batches(batch_size=chunk_rows):
+                    yield batch.to_pandas()
+                continue
+        safe_print(f"🌊 Streaming {sheet_name} in partitions of up to {chunk_rows} rows")
+        for columns in iter_sheet_column_chunks(path, sheet_name, chunk_rows):
+            yield pd.DataFrame(columns, copy=False)
+
+# 📥 Load Excel sheets into a single DataFrame
 try:
-    df_2009 = pd.read_excel(excel_path, sheet_name='Year 2009-2010')
-    df_2010 = pd.read_excel(excel_path, sheet_name='Year 2010-2011')
+    if CHUNKED_MODE or INCREMENTAL_MODE:
+        # Only the first partition is loaded here, as a preview for the exploratory steps
+        partitions = iter_raw_partitions(excel_path, excel_sheets)
+        df_raw = next(partitions)
+        partitions.close()
+        safe_print(f"🌊 Chunked mode: preview partition loaded ({len(df_raw)} rows).")
+    else:
+        df_raw = load_excel_sheets(excel_path, excel_sheets)
     safe_print("✅ Excel sheets loaded successfully.")
 except FileNotFoundError:
     safe_print("❌ Excel file not found.")
@@ -259,8 +533,6 @@ except Exception as e:
     safe_print("❌ An unexpected error occurred while loading the Excel file.")
     raise e
 
-# 🔗 Combine into single DataFrame
-df_raw = pd.concat([df_2009, df_2010], ignore_index=True)
 safe_print(f"🧾 Combined dataset shape: {df_raw.shape}")
 
 
@@ -569,6 +841,230 @@ safe_print(f"🕙 Latest invoice date:   {max_date}")
 # ---
 # 
 
+# ---
+# 
+# ### ⚡ Step 7.1: Fused Cleaning Kernel
+# 
+# Steps 8–14 and 17 used to run as a chain of filters, each producing a new copy of the DataFrame.  
+# They are now evaluated by a **single cleaning kernel**:
+# 
+# - Each rule becomes a boolean mask over the raw rows, applied in the original order
+# - Text and identifier columns are normalized only for the rows that are still valid
+# - Full-row duplicates are detected on **64-bit row fingerprints**: each column is hashed vectorized and the hashes are mixed per row
+# - Rows that share a fingerprint are re-checked exactly (`VERIFY_FINGERPRINT_DUPLICATES`), so a hash collision never removes a distinct row
+# - The surviving rows are materialized **once**, together with `line_revenue`
+# - The result is cast right away to the **central schema** (see Step 21.5), so every later step works on the compact frame
+# 
+# Because `stock_code`, `description` and `country` are now categoricals, the groupbys below pass `observed=True` to skip category combinations that never occur.  
+# The kernel records how many rows each rule removes, so the following steps report exactly the same counts as before.
+# 
+# ---
+# 
+
+# In[ ]:
+
+
+# ⚡ Fused cleaning kernel: evaluate every row-level rule as one boolean mask
+# and materialize the surviving rows a single time (Steps 8–14 and 17 report from it)
+
+# ❌ Known non-product stock codes (manually flagged)
+non_product_codes = [
+    'POST', 'D', 'DOT', 'M', 'BANK CHARGES', 'ADJUST',
+    'CARRIAGE', 'AMAZONFEE', 'S', 'CRUK', 'C2'
+]
+
+CLEANED_COLUMNS = [
+    'invoice_no', 'stock_code', 'description', 'quantity',
+    'invoice_date', 'unit_price', 'customer_id', 'country'
+]
+
+# 🧬 Central schema for the cleaned Online Retail II columns (shared with the EDA and SQL scripts)
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    STRING_DTYPE = 'object'
+
+RETAIL_SCHEMA = {
+    'invoice_no': STRING_DTYPE,
+    'stock_code': 'category',
+    'description': 'category',
+    'quantity': 'int32',
+    'invoice_date': 'datetime64[ns]',
+    'unit_price': 'float64',
+    'customer_id': 'int32',
+    'country': 'category',
+    'line_revenue': 'float64'
+}
+
+# 🧬 Cast known columns to their compact schema dtypes (other columns are left untouched)
+def apply_retail_schema(df):
+    return df.astype({col: dtype for col, dtype in RETAIL_SCHEMA.items() if col in df.columns})
+
+# 📏 Per-column memory footprint before and after applying the schema
+def memory_footprint_report(before_df, after_df, name="Dataset"):
+    report = pd.DataFrame({
+        'dtype_before': before_df.dtypes.astype(str),
+        'mb_before': before_df.memory_usage(deep=True, index=False) / 1e6,
+        'dtype_after': after_df.dtypes.astype(str),
+        'mb_after': after_df.memory_usage(deep=True, index=False) / 1e6
+    })
+    report['saved_pct'] = (1 - report['mb_after'] / report['mb_before']) * 100
+    total_before, total_after = report['mb_before'].sum(), report['mb_after'].sum()
+
+    safe_print(f"📏 Memory footprint for {name}:")
+    safe_print(report.round(2).to_string())
+    safe_print(f"🧮 Total: {total_before:,.2f} MB → {total_after:,.2f} MB "
+               f"({(1 - total_after / total_before) * 100:.1f}% saved)")
+
+# 🔁 Duplicate detection engine: 64-bit row fingerprints with exact verification
+VERIFY_FINGERPRINT_DUPLICATES = True  # Re-check rows sharing a fingerprint exactly
+RUN_DEDUP_BENCHMARK = False           # Time the engine against DataFrame.duplicated in Step 14
+
+def row_fingerprints(columns):
+    """
+    Hash every row into a 64-bit fingerprint. Each column is hashed vectorized
+    (object columns are factorized first, so each distinct string is hashed once)
+    and the per-column hashes are mixed into a single uint64 per row.
+    """
+    fingerprint = np.zeros(len(columns[0]), dtype='uint64')
+    for values in columns:
+        column_hash = pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+        fingerprint = (fingerprint * np.uint64(0x100000001B3)) ^ column_hash
+    return fingerprint
+
+def exact_duplicated_rows(columns):
+    """
+    Flag full-row duplicates (keep='first') across equal-length column arrays
+    without building a DataFrame: each column is factorized and folded into a
+    dense row-group code, so the codes never overflow int64.
+    """
+    group = np.zeros(len(columns[0]), dtype='int64')
+    for values in columns:
+        codes, uniques = pd.factorize(values, use_na_sentinel=False)
+        group, _ = pd.factorize(group * len(uniques) + codes)
+    return pd.Series(group).duplicated().to_numpy()
+
+def fingerprint_duplicated_rows(columns, verify=None, fingerprint=None):
+    """
+    Flag full-row duplicates (keep='first') by deduplicating the fingerprint array
+    (computed from columns unless given). With verification on, only the rows whose
+    fingerprint repeats are re-checked exactly, so a hash collision can never drop
+    a distinct row.
+    """
+    if verify is None:
+        verify = VERIFY_FINGERPRINT_DUPLICATES
+    fingerprint = pd.Series(row_fingerprints(columns) if fingerprint is None else fingerprint)
+    duplicated = fingerprint.duplicated().to_numpy(copy=True)  # written below; pandas may return a read-only view
+    if verify and duplicated.any():
+        candidates = np.flatnonzero(fingerprint.duplicated(keep=False).to_numpy())
+        exact = exact_duplicated_rows([np.asarray(values)[candidates] for values in columns])
+        duplicated[:] = False
+        duplicated[candidates[exact]] = True
+    return duplicated
+
+# 🌊 Fingerprints of earlier partitions (chunked mode): kept as sorted runs, and a new run is merged
+# with the runs before it while they are no more than twice its size, so every fingerprint is merged
+# O(log n) times in total and a lookup searches O(log n) runs
+def find_seen_fingerprints(runs, fingerprint):
+    """Mask of the fingerprints already present in one of the sorted runs."""
+    seen = np.zeros(len(fingerprint), dtype=bool)
+    for run in runs:
+        position = np.minimum(np.searchsorted(run, fingerprint), len(run) - 1)
+        seen |= run[position] == fingerprint
+    return seen
+
+def add_seen_fingerprints(runs, fingerprint):
+    run = np.unique(fingerprint)
+    while runs and len(runs[-1]) <= 2 * len(run):
+        run = np.union1d(runs.pop(), run)
+    if len(run):
+        runs.append(run)
+
+def run_cleaning_kernel(df, non_product_codes, dedup_state=None):
+    """
+    Apply the row-level cleaning rules in their original order:
+    - Step 8: quantity and unit_price must be positive
+    - Step 9: canceled invoices ('C' prefix) are removed
+    - Steps 10–11: rows missing customer_id or description are removed
+    - Steps 12–13: text and identifier columns are normalized
+    - Step 14: full-row duplicates are removed (first occurrence kept)
+    - Step 17: non-product stock codes are removed
+
+    Returns the cleaned DataFrame (with line_revenue) and a per-rule report of
+    rows before/removed, matching the counts of the step-by-step cleaning.
+
+    In chunked mode (Step 21.4c) a dedup_state dict carries the fingerprints of
+    earlier partitions, so duplicates are also removed across partitions. Earlier
+    partitions are only known by their 64-bit fingerprints, so a match against
+    them is probabilistic: a hash collision would drop a distinct row. Those
+    matches are counted in report['duplicate_row']['fingerprint_only'].
+    """
+    report = {}
+    keep = np.ones(len(df), dtype=bool)
+
+    def apply_rule(rule, passes):
+        nonlocal keep
+        before = int(keep.sum())
+        keep &= passes
+        report[rule] = {'before': before, 'removed': before - int(keep.sum())}
+
+    # 🧹 Cheap rules on the raw columns — no intermediate copies
+    apply_rule('invalid_quantity_or_price', ((df['quantity'] > 0) & (df['unit_price'] > 0)).to_numpy())
+    apply_rule('canceled_invoice', ~df['invoice_no'].astype(str).str.startswith('C').to_numpy())
+    apply_rule('missing_customer_id', df['customer_id'].notna().to_numpy())
+    apply_rule('missing_description', df['description'].notna().to_numpy())
+
+    # 🧼 Normalize only the rows still alive, column by column
+    rows = np.flatnonzero(keep)
+    columns = {col: pd.Series(df[col].to_numpy()[rows]) for col in CLEANED_COLUMNS}
+    for col in ['description', 'country']:
+        columns[col] = columns[col].astype(str).str.lower().str.strip()
+    for col in ['invoice_no', 'stock_code']:
+        columns[col] = columns[col].astype(str).str.strip()
+    columns['customer_id'] = columns['customer_id'].astype('int64')
+
+    # 🔁 Full-row duplicates and non-product codes on the normalized values
+    row_columns = [columns[col].to_numpy() for col in CLEANED_COLUMNS]
+    if dedup_state is None:
+        survivors = ~fingerprint_duplicated_rows(row_columns)
+        report['duplicate_row'] = {'before': len(rows), 'removed': len(rows) - int(survivors.sum())}
+    else:
+        # 🌊 Within the partition duplicates are verified exactly; against earlier partitions only by fingerprint
+        fingerprint = row_fingerprints(row_columns)
+        seen_before = find_seen_fingerprints(dedup_state['seen'], fingerprint)
+        survivors = ~(fingerprint_duplicated_rows(row_columns, fingerprint=fingerprint) | seen_before)
+        add_seen_fingerprints(dedup_state['seen'], fingerprint[~seen_before])
+        report['duplicate_row'] = {
+            'before': len(rows), 'removed': len(rows) - int(survivors.sum()), 'fingerprint_only': int(seen_before.sum())
+        }
+    before = int(survivors.sum())
+    survivors &= ~columns['stock_code'].isin(non_product_codes).to_numpy()
+    report['non_product_code'] = {'before': before, 'removed': before - int(survivors.sum())}
+
+    # 📦 Materialize the cleaned rows once, keeping the original row labels
+    final = np.flatnonzero(survivors)
+    cleaned = pd.DataFrame(
+        {col: columns[col].to_numpy()[final] for col in CLEANED_COLUMNS},
+        index=df.index[rows[final]]
+    )
+    cleaned['line_revenue'] = cleaned['quantity'] * cleaned['unit_price']
+    return cleaned, report
+
+df_raw, cleaning_report = run_cleaning_kernel(df_raw, non_product_codes)
+
+# 🧬 Cast the cleaned rows to the central schema right away, so every later step works on the compact frame
+kernel_df = df_raw
+df_raw = apply_retail_schema(kernel_df)
+memory_footprint_report(kernel_df, df_raw, name="df_raw")
+del kernel_df
+
+safe_print("⚡ Fused cleaning kernel applied:")
+for rule, counts in cleaning_report.items():
+    safe_print(f"   • {rule:<26} removed {counts['removed']:>8} of {counts['before']} rows")
+safe_print(f"📦 Cleaned rows: {df_raw.shape[0]}")
+
+
 # ---
 # 
 # ## 🧹 Step 8: Filter Invalid Transactions
@@ -587,15 +1083,13 @@ safe_print(f"🕙 Latest invoice date:   {max_date}")
 # In[ ]:
 
 
-# 🧹 Filter out rows with invalid quantity or price
-initial_shape = df_raw.shape
-
-df_raw = df_raw[(df_raw['quantity'] > 0) & (df_raw['unit_price'] > 0)]
+# 🧹 Filter out rows with invalid quantity or price (applied by the kernel)
+rule = cleaning_report['invalid_quantity_or_price']
 
 # ✅ Show change in dataset size
-safe_print(f"🧮 Rows before filtering: {initial_shape[0]}")
-safe_print(f"✅ Rows after filtering:  {df_raw.shape[0]}")
-safe_print(f"➖ Rows removed:          {initial_shape[0] - df_raw.shape[0]}")
+safe_print(f"🧮 Rows before filtering: {rule['before']}")
+safe_print(f"✅ Rows after filtering:  {rule['before'] - rule['removed']}")
+safe_print(f"➖ Rows removed:          {rule['removed']}")
 
 
 # ---
@@ -636,15 +1130,13 @@ safe_print(f"➖ Rows removed:          {initial_shape[0] - df_raw.shape[0]}")
 # In[ ]:
 
 
-# 🔍 Check for remaining canceled transactions
-canceled_mask = df_raw['invoice_no'].astype(str).str.startswith('C')
-num_canceled_remaining = canceled_mask.sum()
+# 🔍 Check for remaining canceled transactions (applied by the kernel)
+num_canceled_remaining = cleaning_report['canceled_invoice']['removed']
 
 safe_print(f"🚫 Rows with invoice_no starting with 'C': {num_canceled_remaining}")
 
-# 🧹 Remove them if any remain
+# 🧹 Removed if any remained
 if num_canceled_remaining > 0:
-    df_raw = df_raw[~canceled_mask]
     safe_print("✅ Canceled invoices removed.")
 else:
     safe_print("✅ No canceled invoices found — all previously filtered.")
@@ -682,17 +1174,13 @@ else:
 # In[ ]:
 
 
-# 🚫 Drop rows with missing customer_id
-initial_shape = df_raw.shape
-
-# Drop and convert in one chain with .copy() to avoid chained assignment warnings
-df_raw = df_raw.dropna(subset=['customer_id']).copy()
-df_raw['customer_id'] = df_raw['customer_id'].astype('int64')
+# 🚫 Drop rows with missing customer_id (applied by the kernel, cast to int64)
+rule = cleaning_report['missing_customer_id']
 
 # 🧾 Summary of effect
-safe_print(f"🧮 Rows before dropping missing customer_id: {initial_shape[0]}")
-safe_print(f"✅ Rows after dropping:                  {df_raw.shape[0]}")
-safe_print(f"➖ Rows removed:                         {initial_shape[0] - df_raw.shape[0]}")
+safe_print(f"🧮 Rows before dropping missing customer_id: {rule['before']}")
+safe_print(f"✅ Rows after dropping:                  {rule['before'] - rule['removed']}")
+safe_print(f"➖ Rows removed:                         {rule['removed']}")
 
 
 # ---
@@ -731,14 +1219,13 @@ safe_print(f"➖ Rows removed:                         {initial_shape[0] - df_ra
 # In[ ]:
 
 
-# 🧾 Drop rows with missing product description
-initial_shape = df_raw.shape
-df_raw = df_raw.dropna(subset=['description'])
+# 🧾 Drop rows with missing product description (applied by the kernel)
+rule = cleaning_report['missing_description']
 
 # 🧾 Summary of effect
-safe_print(f"🧮 Rows before dropping missing description: {initial_shape[0]}")
-safe_print(f"✅ Rows after dropping:                     {df_raw.shape[0]}")
-safe_print(f"➖ Rows removed:                            {initial_shape[0] - df_raw.shape[0]}")
+safe_print(f"🧮 Rows before dropping missing description: {rule['before']}")
+safe_print(f"✅ Rows after dropping:                     {rule['before'] - rule['removed']}")
+safe_print(f"➖ Rows removed:                            {rule['removed']}")
 
 
 # ---
@@ -787,20 +1274,10 @@ safe_print(f"➖ Rows removed:                            {initial_shape[0] - df
 # In[ ]:
 
 
-# 🧼 Helper function to clean string-based categorical columns
-def clean_categorical_column(df, col):
-    """
-    Standardizes a string-based categorical column:
-    - Lowercases text
-    - Strips leading/trailing whitespace
-    """
-    df[col] = df[col].astype(str).str.lower().str.strip()
+# 🧼 String-based categorical columns are lowercased and stripped by the kernel
+for col in ['description', 'country']:
     safe_print(f"🧼 Cleaned column: {col}")
 
-# 🧼 Apply to selected columns
-clean_categorical_column(df_raw, 'description')
-clean_categorical_column(df_raw, 'country')
-
 # 🔍 Preview cleaned values
 safe_print("\n🔍 Sample cleaned descriptions:")
 display(df_raw['description'].drop_duplicates().sort_values().head())
@@ -860,10 +1337,7 @@ safe_print(sorted(df_raw['country'].unique()))
 
 # 🆔 Normalize identifier column formats
 
-# ✅ Convert to string and strip whitespace
-df_raw['invoice_no'] = df_raw['invoice_no'].astype(str).str.strip()
-df_raw['stock_code'] = df_raw['stock_code'].astype(str).str.strip()
-
+# ✅ invoice_no and stock_code converted to string and stripped by the kernel
 # customer_id already converted to int in Step 10
 
 # 🧾 Confirm resulting dtypes
@@ -914,6 +1388,8 @@ display(df_raw[['invoice_no', 'stock_code', 'customer_id']].head())
 # 
 # If duplicates are found, we will retain only the **first occurrence** of each row.
 # 
+# > ⏱️ Set `RUN_DEDUP_BENCHMARK = True` (Step 7.1) to time `DataFrame.duplicated` against the fingerprint engine on this dataset.
+# 
 # ---
 # 
 
@@ -925,14 +1401,15 @@ def check_duplicates(df, key_column=None, name="Dataset", preview=False):
     safe_print(f"🔁 Checking Duplicates in: {name}")
     safe_print("=" * 60)
 
-    # 🔍 Count fully duplicated rows
-    total_dupes = df.duplicated().sum()
+    # 🔍 Count fully duplicated rows (fingerprint engine from Step 7.1)
+    dupe_mask = fingerprint_duplicated_rows([df[col] for col in df.columns])
+    total_dupes = int(dupe_mask.sum())
     safe_print(f"📋 Total fully duplicated rows: {total_dupes}")
 
     # 🖼️ Preview full duplicates if requested
     if total_dupes > 0 and preview:
         safe_print("\n🔎 Sample duplicated rows:")
-        display(df[df.duplicated()].head())
+        display(df[dupe_mask].head())
 
     # 🔍 Duplicate check for key column
     if key_column:
@@ -947,14 +1424,43 @@ def check_duplicates(df, key_column=None, name="Dataset", preview=False):
 
     safe_print("=" * 60 + "\n")
 
-# 🔍 Check duplicates in full dataset and optionally in invoice_no
+# 🧹 Full row duplicates removed by the kernel
+rule = cleaning_report['duplicate_row']
+safe_print(f"📋 Total fully duplicated rows: {rule['removed']}")
+safe_print(f"✅ Duplicates removed: {rule['removed']}")
+safe_print(f"📦 Final row count: {rule['before'] - rule['removed']}")
+
+# 🔍 Confirm no full duplicates remain (invoice_no repeats are expected line items)
 check_duplicates(df_raw, key_column="invoice_no", name="Online Retail II", preview=True)
 
-# 🧹 Remove full row duplicates
-initial_shape = df_raw.shape
-df_raw = df_raw.drop_duplicates()
-safe_print(f"✅ Duplicates removed: {initial_shape[0] - df_raw.shape[0]}")
-safe_print(f"📦 Final row count: {df_raw.shape[0]}")
+# ⏱️ Optional benchmark: DataFrame.duplicated vs the fingerprint engine
+def benchmark_duplicate_detection(df, repeats=3):
+    """
+    Time the current pandas path against the fingerprint engine (with and
+    without exact verification) and confirm all of them flag the same rows.
+    """
+    import time
+
+    columns = [df[col] for col in df.columns]
+    candidates = {
+        'DataFrame.duplicated': lambda: df.duplicated().to_numpy(),
+        'fingerprint': lambda: fingerprint_duplicated_rows(columns, verify=False),
+        'fingerprint + verify': lambda: fingerprint_duplicated_rows(columns, verify=True),
+    }
+    reference = None
+    safe_print(f"⏱️ Duplicate detection benchmark on {len(df)} rows ({repeats} runs each):")
+    for label, detect in candidates.items():
+        start = time.perf_counter()
+        for _ in range(repeats):
+            flags = detect()
+        elapsed = (time.perf_counter() - start) / repeats
+        reference = flags if reference is None else reference
+        match = "✅" if np.array_equal(flags, reference) else "❌ differs"
+        safe_print(f"   • {label:<22} {elapsed:8.3f}s  duplicates: {int(flags.sum()):>7}  {match}")
+
+if RUN_DEDUP_BENCHMARK:
+    # Re-append a slice of rows so the benchmark has duplicates to find
+    benchmark_duplicate_detection(pd.concat([df_raw, df_raw.iloc[::10]]))
 
 
 # ---
@@ -1000,7 +1506,7 @@ safe_print(f"📦 Final row count: {df_raw.shape[0]}")
 # In[ ]:
 
 
-# 💰 Add a new column: line_revenue
+# 💰 Add a new column: line_revenue (already computed by the kernel)
 # Avoid SettingWithCopyWarning by ensuring df_raw is not a view
 if 'line_revenue' not in df_raw.columns:
     df_raw = df_raw.copy()
@@ -1059,18 +1565,8 @@ safe_print(df_raw['line_revenue'].describe())
 
 # ✅ Sanity Check
 
-# Define expected data types for validation
-expected_dtypes = {
-    'invoice_no': 'object',
-    'stock_code': 'object',
-    'description': 'object',
-    'quantity': 'int64',
-    'invoice_date': 'datetime64[ns]',
-    'unit_price': 'float64',
-    'line_revenue': 'float64',
-    'customer_id': 'int64',
-    'country': 'object'
-}
+# Expected data types for validation: the central schema applied after the cleaning kernel (Step 7.1)
+expected_dtypes = RETAIL_SCHEMA
 
 safe_print("\n🧪 Column Type Sanity Check:")
 type_mismatches = []
@@ -1134,19 +1630,13 @@ else:
 # In[ ]:
 
 
-# ❌ Known non-product stock codes (manually flagged)
-non_product_codes = [
-    'POST', 'D', 'DOT', 'M', 'BANK CHARGES', 'ADJUST',
-    'CARRIAGE', 'AMAZONFEE', 'S', 'CRUK', 'C2'
-]
-
-# 🧹 Filter out rows with non-product codes
-before_rows = df_raw.shape[0]
-df_raw = df_raw[~df_raw['stock_code'].isin(non_product_codes)].copy()
-after_rows = df_raw.shape[0]
+# 🧹 Rows with non-product codes (see Step 7.1) filtered out by the kernel
+rule = cleaning_report['non_product_code']
+before_rows = rule['before']
+after_rows = rule['before'] - rule['removed']
 
 # 📉 Rows removed
-safe_print(f"🧹 Removed non-product stock codes.")
+safe_print("🧹 Removed non-product stock codes.")
 safe_print(f"➖ Rows before: {before_rows}")
 safe_print(f"➕ Rows after:  {after_rows}")
 safe_print(f"📉 Rows removed: {before_rows - after_rows}")
@@ -1184,7 +1674,7 @@ safe_print(f"📉 Rows removed: {before_rows - after_rows}")
 
 
 # 🔍 Check for inconsistent product descriptions (important for EDA validation)
-desc_counts = df_raw.groupby('stock_code')['description'].nunique().reset_index()
+desc_counts = df_raw.groupby('stock_code', observed=True)['description'].nunique().reset_index()
 inconsistent_desc = desc_counts[desc_counts['description'] > 1]
 
 # 🔢 Report findings
@@ -1245,26 +1735,63 @@ display(multi_desc_sample.head(20))
 # 
 # We apply this fix **before exporting** the normalized tables to ensure that all downstream analysis uses the standardized version.
 # 
+# The mode is computed by a reusable `grouped_mode` helper: both columns are factorized to integer codes, every `(stock_code, description)` pair is counted with a single `bincount`, and the highest count per stock code wins.  
+# Ties go to the alphabetically first description, so the result is deterministic and no sort of the count table is needed. The same helper resolves customer countries in Step 21.1c.
+# 
 # ---
 
 # In[ ]:
 
 
+# 🧮 Grouped mode on factorized integer codes (reused in Step 21.1c)
+def grouped_mode(keys, values, weights=None):
+    """
+    Most frequent value per key, as a Series indexed by the sorted unique keys.
+
+    Keys and values are factorized to integer codes, each (key, value) pair is
+    counted with a single bincount, and the winner per key is the pair with the
+    highest count. Ties go to the smallest value, so the result matches a sorted
+    groupby().size() table ordered by count with drop_duplicates on the key.
+    Missing keys or values are ignored, as in groupby. Optional weights hold
+    pre-aggregated counts (e.g., partial pair counts from chunked mode).
+    Categorical inputs are returned as plain values: mapping a categorical column
+    through a categorical-valued Series misaligns the results in pandas.
+    """
+    key_codes, key_uniques = pd.factorize(keys, sort=True)
+    value_codes, value_uniques = pd.factorize(values, sort=True)
+    valid = (key_codes >= 0) & (value_codes >= 0)
+    n_values = len(value_uniques)
+
+    # 🔢 Count each observed (key, value) pair
+    pair_codes, pairs = pd.factorize(key_codes[valid].astype('int64') * n_values + value_codes[valid])
+    pair_weights = None if weights is None else np.asarray(weights)[valid]
+    pair_counts = np.bincount(pair_codes, weights=pair_weights, minlength=len(pairs))
+    pair_keys, pair_values = pairs // n_values, pairs % n_values
+
+    # 🏆 Highest count per key, then the smallest value among the tied pairs
+    best_count = np.zeros(len(key_uniques), dtype=pair_counts.dtype)
+    np.maximum.at(best_count, pair_keys, pair_counts)
+    is_best = pair_counts == best_count[pair_keys]
+    winner = np.full(len(key_uniques), n_values, dtype='int64')
+    np.minimum.at(winner, pair_keys[is_best], pair_values[is_best])
+
+    observed = winner < n_values
+    return pd.Series(
+        np.asarray(value_uniques)[winner[observed]],
+        index=pd.Index(np.asarray(key_uniques)[observed], name=keys.name),
+        name=values.name
+    )
+
 # 🔁 Create mapping from stock_code to most frequent description
-desc_mode_map = (
-    df_raw.groupby(['stock_code', 'description'])
-    .size()
-    .reset_index(name='count')
-    .sort_values(['stock_code', 'count'], ascending=[True, False])
-    .drop_duplicates('stock_code')
-    .set_index('stock_code')['description']
-)
+desc_mode_map = grouped_mode(df_raw['stock_code'], df_raw['description'])
 
 # 🛠️ Apply mapping to replace all descriptions with the most frequent one
-df_raw['description'] = df_raw['stock_code'].map(desc_mode_map)
+# (codes sharing a description make map() return plain strings, so the sorted categorical is built explicitly)
+desc_mapped = df_raw['stock_code'].map(desc_mode_map)
+df_raw['description'] = pd.Categorical(desc_mapped, categories=sorted(desc_mode_map.unique()))
 
 # ✅ Check for remaining inconsistencies
-desc_counts_after = df_raw.groupby('stock_code')['description'].nunique().reset_index()
+desc_counts_after = df_raw.groupby('stock_code', observed=True)['description'].nunique().reset_index()
 inconsistent_desc_after = desc_counts_after[desc_counts_after['description'] > 1]
 
 # 🔍 Show sample if issues remain (they shouldn't)
@@ -1328,7 +1855,7 @@ safe_print(f"🧾 customer_id → country: {multi_country_customers.shape[0]} wi
 
 # 2. stock_code should map to one description
 multi_desc_products = (
-    df_raw.groupby('stock_code')['description']
+    df_raw.groupby('stock_code', observed=True)['description']
     .nunique()
     .reset_index()
     .query('description > 1')
@@ -1432,7 +1959,7 @@ conflicting_df = df_raw[df_raw['customer_id'].isin(multi_country_customers['cust
 # 📋 Count how many times each country appears per customer_id
 country_counts = (
     conflicting_df
-    .groupby(['customer_id', 'country'])
+    .groupby(['customer_id', 'country'], observed=True)
     .size()
     .reset_index(name='count')
     .sort_values(['customer_id', 'count'], ascending=[True, False])
@@ -1499,18 +2026,15 @@ display(country_resolution_df)
 # In[ ]:
 
 
-# ✅ Create a mapping of most frequent country per customer_id
-most_frequent_country = (
-    df_raw.groupby(['customer_id', 'country'])
-    .size()
-    .reset_index(name='count')
-    .sort_values(['customer_id', 'count'], ascending=[True, False])
-    .drop_duplicates('customer_id')
-    .set_index('customer_id')['country']
-)
+# ✅ Create a mapping of most frequent country per customer_id (grouped mode from Step 19)
+most_frequent_country = grouped_mode(df_raw['customer_id'], df_raw['country'])
 
 # ✅ Overwrite 'country' in df_raw using the most frequent country per customer
-df_raw['country'] = df_raw['customer_id'].map(most_frequent_country).fillna(df_raw['country'])
+df_raw['country'] = (
+    df_raw['customer_id'].map(most_frequent_country)
+    .fillna(df_raw['country'])
+    .astype(RETAIL_SCHEMA['country'])  # keep the schema dtype for the following steps
+)
 
 # 🔍 Recheck if any customer_id is still linked to more than one country
 remaining_issues = (
@@ -1548,7 +2072,7 @@ safe_print(f"✅ Country assignment conflicts remaining: {remaining_issues.shape
 
 # 🔍 Count number of unique descriptions per stock_code
 desc_counts = (
-    df_raw.groupby('stock_code')['description']
+    df_raw.groupby('stock_code', observed=True)['description']
     .nunique()
     .reset_index(name='unique_descriptions')
 )
@@ -1744,7 +2268,7 @@ else:
 
 # 🔍 Check for duplicate (invoice_no, stock_code) pairs
 composite_duplicates = (
-    df_raw.groupby(['invoice_no', 'stock_code'])
+    df_raw.groupby(['invoice_no', 'stock_code'], observed=True)
     .size()
     .reset_index(name='count')
     .query('count > 1')
@@ -1814,7 +2338,7 @@ display(duplicated_rows.sort_values(['invoice_no', 'stock_code']).head(20))
 # ✅ Re-identify duplicate (invoice_no, stock_code) pairs
 duplicate_counts = (
     df_raw
-    .groupby(['invoice_no', 'stock_code'])
+    .groupby(['invoice_no', 'stock_code'], observed=True)
     .size()
     .reset_index(name='count')
     .query('count > 1')
@@ -1823,7 +2347,7 @@ duplicate_counts = (
 # ✅ Group and aggregate duplicate invoice-product line items
 invoice_items_cleaned = (
     df_raw
-    .groupby(['invoice_no', 'stock_code', 'description', 'unit_price'], as_index=False)
+    .groupby(['invoice_no', 'stock_code', 'description', 'unit_price'], as_index=False, observed=True)
     .agg({
         'quantity': 'sum',
         'line_revenue': 'sum',
@@ -1849,7 +2373,7 @@ safe_print("📄 Aggregated versions of previously duplicated rows:")
 display(duplicated_aggregated.head(15))
 
 # ✅ Final assignment for exporting and consistency with EDA/SQL workflows
-raw_cleaned_df = invoice_items_cleaned.copy()
+raw_cleaned_df = invoice_items_cleaned
 safe_print(f"✅ Final cleaned flat dataset assigned to: raw_cleaned_df → shape: {raw_cleaned_df.shape}")
 
 
@@ -1870,6 +2394,330 @@ safe_print(f"✅ Final cleaned flat dataset assigned to: raw_cleaned_df → shap
 # - The **invoice_items relational table**
 # 
 
+# ---
+# 
+# ### 🌊 Step 21.4c Out-of-Core Cleaning for Larger-than-Memory Inputs (Optional)
+# 
+# With `CHUNKED_MODE = True` (Step 2), the workbook is never loaded as a whole.  
+# The exploratory steps above run on a **preview partition** only, and this step rebuilds `invoice_items_cleaned` from every partition of `CHUNK_ROWS` rows:
+# 
+# - Each partition runs through the cleaning kernel from Step 7.1
+# - Full-row duplicates are detected across partitions by keeping the 64-bit fingerprints of rows already seen, as sorted runs that are merged only when a run doubles in size
+# - ⚠️ Within a partition, duplicates are re-checked exactly as in Step 14. A match against an **earlier** partition is on the fingerprint alone, because those rows are no longer in memory. This makes the cross-partition dedup **probabilistic**: a 64-bit collision, with odds of about n²/2⁶⁵ for n rows (under 10⁻⁷ for a million rows), would drop a distinct row. The number of such fingerprint-only matches is printed with the kernel totals.
+# - Only **partial aggregates** are kept: description and country pair counts, the earliest date and customer per invoice, and quantity/revenue sums per line item
+# - The partials are merged to apply Steps 19, 21.1c, 21.3b and 21.4b, so the final table matches the in-memory result
+# 
+# Memory therefore grows with the number of distinct invoices and line items (plus 8 bytes per distinct row for the fingerprints), not with the size of the raw input.  
+# When `CHUNKED_MODE` is off, this step leaves the in-memory result unchanged.
+# 
+# ---
+# 
+
+# In[ ]:
+
+
+# 🌊 Out-of-core cleaning: rebuild invoice_items_cleaned from bounded partitions (CHUNKED_MODE, Step 2)
+def add_pair_counts(total, partial):
+    return partial if total is None else total.add(partial, fill_value=0).astype('int64')
+
+def new_cleaning_state():
+    return {
+        'report': {},
+        'seen': [],  # sorted runs of the fingerprints of rows already seen (kernel dedup_state)
+        'desc_pairs': None,
+        'country_pairs': None,
+        'metadata_parts': [],
+        'item_parts': []
+    }
+
+def update_cleaning_state(state, partition, non_product_codes):
+    """
+    Run one raw partition through the cleaning kernel (Step 7.1) and reduce it
+    to partial aggregates:
+    - fingerprints of rows already seen (full-row duplicates across partitions)
+    - (stock_code, description) and (customer_id, country) pair counts
+    - earliest invoice_date and its customer_id per invoice
+    - quantity and line_revenue sums per (invoice_no, stock_code, unit_price)
+    """
+    partition.columns = CLEANED_COLUMNS
+    cleaned, partition_report = run_cleaning_kernel(partition, non_product_codes, state)
+    for rule, counts in partition_report.items():
+        totals = state['report'].setdefault(rule, {})
+        for key, value in counts.items():
+            totals[key] = totals.get(key, 0) + value
+
+    state['desc_pairs'] = add_pair_counts(state['desc_pairs'], cleaned.groupby(['stock_code', 'description']).size())
+    state['country_pairs'] = add_pair_counts(state['country_pairs'], cleaned.groupby(['customer_id', 'country']).size())
+    state['metadata_parts'].append(
+        cleaned.sort_values('invoice_date', kind='stable')
+        .groupby('invoice_no', sort=False)[['invoice_date', 'customer_id']]
+        .first()
+    )
+    state['item_parts'].append(
+        cleaned.groupby(['invoice_no', 'stock_code', 'unit_price'], as_index=False, sort=False)
+        .agg({'quantity': 'sum', 'line_revenue': 'sum', 'customer_id': 'first'})
+    )
+    safe_print(f"🌊 Partition: {len(partition)} raw rows → {len(cleaned)} cleaned rows")
+
+def merge_cleaning_state(state):
+    """
+    Compact the partials into one invoice metadata table and one line item table
+    (kept in the state), then apply Steps 19, 21.1c, 21.3b and 21.4b to them and
+    return invoice_items_cleaned.
+    """
+    # 🔁 Step 19 and 21.1c: modes from the merged pair counts
+    desc_mode_map = grouped_mode(
+        state['desc_pairs'].index.get_level_values('stock_code'),
+        state['desc_pairs'].index.get_level_values('description'),
+        weights=state['desc_pairs'].to_numpy()
+    )
+    most_frequent_country = grouped_mode(
+        state['country_pairs'].index.get_level_values('customer_id'),
+        state['country_pairs'].index.get_level_values('country'),
+        weights=state['country_pairs'].to_numpy()
+    )
+
+    # 🧾 Step 21.3b: earliest timestamp (and its customer) per invoice across partitions
+    invoice_metadata = (
+        pd.concat(state['metadata_parts'])
+        .sort_values('invoice_date', kind='stable')
+        .groupby(level='invoice_no')
+        .first()
+    )
+    state['metadata_parts'] = [invoice_metadata]
+
+    # 📦 Step 21.4b: merge line item partials; country follows each group's first customer, as before
+    item_partials = (
+        pd.concat(state['item_parts'], ignore_index=True)
+        .groupby(['invoice_no', 'stock_code', 'unit_price'], as_index=False)
+        .agg({'quantity': 'sum', 'line_revenue': 'sum', 'customer_id': 'first'})
+    )
+    state['item_parts'] = [item_partials]
+
+    items = item_partials.copy()
+    items['country'] = items['customer_id'].map(most_frequent_country)
+    items['description'] = items['stock_code'].map(desc_mode_map)
+    items['invoice_date'] = items['invoice_no'].map(invoice_metadata['invoice_date'])
+    items['customer_id'] = items['invoice_no'].map(invoice_metadata['customer_id'])
+
+    items = items[[
+        'invoice_no', 'stock_code', 'description', 'unit_price', 'quantity',
+        'line_revenue', 'invoice_date', 'customer_id', 'country'
+    ]]
+    # unit_price breaks ties the same way the sorted groupby in Step 21.4b does
+    return items.sort_values(by=['invoice_date', 'invoice_no', 'stock_code', 'unit_price'])
+
+def print_cleaning_totals(report):
+    safe_print("⚡ Chunked cleaning kernel totals:")
+    for rule, counts in report.items():
+        safe_print(f"   • {rule:<26} removed {counts['removed']:>8} of {counts['before']} rows")
+    matched = report.get('duplicate_row', {}).get('fingerprint_only', 0)
+    if matched:
+        safe_print(f"   ℹ️ {matched} duplicate rows matched an earlier partition by 64-bit fingerprint only (not re-checked exactly)")
+
+def run_chunked_cleaning(partitions, non_product_codes):
+    """
+    Clean a stream of raw partitions with bounded memory: only the partial
+    aggregates are kept, so memory grows with the number of distinct invoices
+    and line items rather than with the raw input.
+    """
+    state = new_cleaning_state()
+    for partition in partitions:
+        update_cleaning_state(state, partition, non_product_codes)
+    print_cleaning_totals(state['report'])
+    return merge_cleaning_state(state)
+
+# 🌊 Replace the preview-based result with the full out-of-core result (incremental mode: Step 21.4d)
+if CHUNKED_MODE and not INCREMENTAL_MODE:
+    invoice_items_cleaned = run_chunked_cleaning(iter_raw_partitions(excel_path, excel_sheets), non_product_codes)
+    raw_cleaned_df = invoice_items_cleaned
+    safe_print(f"✅ Chunked mode: invoice_items_cleaned rebuilt from all partitions → shape: {invoice_items_cleaned.shape}")
+else:
+    safe_print("ℹ️ Chunked mode disabled — invoice_items_cleaned built in memory.")
+
+
+# ---
+# 
+# ### 🔁 Step 21.4d Incremental Append-Only Cleaning (Optional)
+# 
+# New invoices are appended to the source every day, but a full run re-cleans every invoice since 2009.  
+# With `INCREMENTAL_MODE = True` (Step 2), the partial aggregates from Step 21.4c are **persisted** in `data/cache/incremental_state/` after each run:
+# 
+# - Per sheet: its fingerprint (Step 2) and, per raw partition, the number of rows cleaned and a digest of those rows
+# - The fingerprints of rows already kept (for duplicate removal)
+# - The `(stock_code, description)` and `(customer_id, country)` mode counters
+# - The invoice metadata and the aggregated line items
+# 
+# The next run skips every sheet whose fingerprint is unchanged without reading it. A changed sheet is read partition by partition, and only the rows after those recorded in the state are cleaned and merged into it. Rows appended to an invoice that was already processed are merged like any other partition, and the mode maps are recomputed from the updated counters, so the result is identical to a full rebuild.
+# 
+# If the recorded rows of a sheet changed (an edit, not an append), or `CHUNK_ROWS` or the cleaning rules changed, the state is discarded and rebuilt from scratch.
+# 
+# > ℹ️ The shared strings and styles are part of every sheet's fingerprint, so appending to one sheet also re-reads the others (only to verify their digests). The tables in Steps 22–23 are still derived from the full merged result. The exports **append** only the new rows when the existing file is an exact prefix of the updated table (checked with the export manifest). Otherwise the file is rewritten, for example `products.csv` when a new stock code appears or a description changes.
+# 
+# ---
+# 
+
+# In[ ]:
+
+
+# 🔁 Incremental append-only cleaning: only raw rows appended since the last run are cleaned (INCREMENTAL_MODE, Step 2)
+import json
+import shutil
+
+CLEANING_STATE_VERSION = 2  # bump when the cleaning rules change to force a full rebuild
+incremental_state_dir = os.path.join(sheet_cache_dir, 'incremental_state')
+
+def cleaning_rules(non_product_codes):
+    """Settings the saved state depends on; any change forces a full rebuild."""
+    return {'version': CLEANING_STATE_VERSION, 'non_product_codes': non_product_codes, 'chunk_rows': CHUNK_ROWS}
+
+def save_cleaning_state(state, state_dir, non_product_codes):
+    """Persist the compacted partial aggregates, replacing the previous state in one rename."""
+    tmp_dir = state_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    state['metadata_parts'][0].to_parquet(os.path.join(tmp_dir, 'invoice_metadata.parquet'))
+    state['item_parts'][0].to_parquet(os.path.join(tmp_dir, 'invoice_items.parquet'), index=False)
+    state['desc_pairs'].rename('count').reset_index().to_parquet(os.path.join(tmp_dir, 'description_counts.parquet'), index=False)
+    state['country_pairs'].rename('count').reset_index().to_parquet(os.path.join(tmp_dir, 'country_counts.parquet'), index=False)
+    pd.DataFrame({'fingerprint': np.concatenate([np.empty(0, dtype='uint64')] + state['seen'])}).to_parquet(os.path.join(tmp_dir, 'row_fingerprints.parquet'), index=False)
+    with open(os.path.join(tmp_dir, 'state.json'), 'w') as fh:
+        json.dump({**cleaning_rules(non_product_codes), 'sources': state['sources']}, fh)
+
+    shutil.rmtree(state_dir, ignore_errors=True)
+    os.rename(tmp_dir, state_dir)
+
+def load_cleaning_state(state_dir, non_product_codes):
+    """Load the state of earlier runs, or None when missing or built with different rules."""
+    try:
+        with open(os.path.join(state_dir, 'state.json')) as fh:
+            meta = json.load(fh)
+    except FileNotFoundError:
+        return None
+    if {key: meta.get(key) for key in ('version', 'non_product_codes', 'chunk_rows')} != cleaning_rules(non_product_codes):
+        safe_print("⚠️ Incremental state was built with different cleaning rules — rebuilding.")
+        return None
+
+    def read(name):
+        return pd.read_parquet(os.path.join(state_dir, name))
+
+    state = new_cleaning_state()
+    state['metadata_parts'] = [read('invoice_metadata.parquet')]
+    state['item_parts'] = [read('invoice_items.parquet')]
+    state['desc_pairs'] = read('description_counts.parquet').set_index(['stock_code', 'description'])['count']
+    state['country_pairs'] = read('country_counts.parquet').set_index(['customer_id', 'country'])['count']
+    add_seen_fingerprints(state['seen'], read('row_fingerprints.parquet')['fingerprint'].to_numpy())
+    state['sources'] = meta['sources']
+    return state
+
+def rows_digest(partition, fingerprints):
+    """Digest of a raw partition's column names and the fingerprints of its leading rows."""
+    return hashlib.sha256(repr(list(partition.columns)).encode() + fingerprints.tobytes()).hexdigest()
+
+def clean_new_rows(state, path, sheet_names, non_product_codes):
+    """
+    Feed only the raw rows not recorded in state['sources'] to the cleaning
+    kernel. A sheet whose fingerprint is unchanged is skipped without being read.
+    A changed sheet is read partition by partition: the rows cleaned by earlier
+    runs must still be there, unchanged (checked against their digest), and only
+    the rows after them are cleaned. Returns the number of new raw rows, or None
+    when a source was edited rather than appended to.
+    """
+    sources = state['sources']
+    if list(sources) != sheet_names[:len(sources)]:
+        return None
+
+    n_new = 0
+    for sheet_name in sheet_names:
+        fingerprint = sheet_fingerprint(path, sheet_name)
+        recorded = sources.get(sheet_name, {}).get('partitions', [])
+        if sources.get(sheet_name, {}).get('fingerprint') == fingerprint:
+            safe_print(f"⏭️ Unchanged source skipped: {sheet_name}")
+            continue
+
+        partitions = []
+        for i, partition in enumerate(iter_raw_partitions(path, [sheet_name])):
+            fingerprints = row_fingerprints([partition.iloc[:, j] for j in range(partition.shape[1])])
+            done, digest = recorded[i] if i < len(recorded) else (0, None)
+            if done and (len(partition) < done or rows_digest(partition, fingerprints[:done]) != digest):
+                return None
+            if len(partition) > done:
+                update_cleaning_state(state, partition.iloc[done:], non_product_codes)
+                n_new += len(partition) - done
+            partitions.append([len(partition), rows_digest(partition, fingerprints)])
+        if len(partitions) < len(recorded):
+            return None
+        sources[sheet_name] = {'fingerprint': fingerprint, 'partitions': partitions}
+    return n_new
+
+def run_incremental_cleaning(path, sheet_names, non_product_codes, state_dir=incremental_state_dir):
+    """
+    Append-only cleaning. The partial aggregates of earlier runs (mode counters,
+    invoice metadata, line items, row fingerprints) are loaded from state_dir and
+    only the raw rows appended since then are cleaned and merged into them, so
+    the result equals a full rebuild, also for invoices whose rows span runs or
+    partitions. When a source was edited, the state is discarded and rebuilt.
+    """
+    state = load_cleaning_state(state_dir, non_product_codes)
+    n_new = None
+    if state is not None:
+        n_new = clean_new_rows(state, path, sheet_names, non_product_codes)
+        if n_new is None:
+            safe_print("⚠️ A source no longer starts with the rows cleaned by earlier runs — rebuilding.")
+    if n_new is None:
+        safe_print("🆕 Full rebuild — every raw row will be cleaned.")
+        state = new_cleaning_state()
+        state['sources'] = {}
+        n_new = clean_new_rows(state, path, sheet_names, non_product_codes)
+
+    safe_print(f"🔁 Incremental run: {n_new} new raw rows cleaned.")
+    if not state['item_parts']:
+        raise ValueError("❌ No rows found in the workbook.")
+    if state['report']:
+        print_cleaning_totals(state['report'])
+
+    items = merge_cleaning_state(state)
+    save_cleaning_state(state, state_dir, non_product_codes)
+    return items
+
+if INCREMENTAL_MODE:
+    invoice_items_cleaned = run_incremental_cleaning(excel_path, excel_sheets, non_product_codes)
+    raw_cleaned_df = invoice_items_cleaned
+    safe_print(f"✅ Incremental mode: invoice_items_cleaned merged with earlier runs → shape: {invoice_items_cleaned.shape}")
+else:
+    safe_print("ℹ️ Incremental mode disabled.")
+
+
+# ---
+# 
+# ### 🧬 Step 21.5 Applying a Compact Schema to the Cleaned Dataset
+# 
+# Text columns such as `country`, `description`, `stock_code` and `invoice_no` are stored as Python object strings, which take up most of the DataFrame's memory.  
+# The cleaned rows are cast to a **central schema**, shared with the EDA and SQL notebooks, right after the cleaning kernel (Step 7.1), and the dtype check before export expects exactly this schema.  
+# Here we apply it once more to the final dataset, whose line items were aggregated after the cast:
+# 
+# | Column | Type | Why |
+# |--------|------|-----|
+# | `stock_code`, `description`, `country` | `category` | Few distinct values repeated across many rows |
+# | `invoice_no` | Arrow-backed `string` | Identifier with many distinct values |
+# | `quantity`, `customer_id` | `int32` | Values fit comfortably in 32 bits |
+# | `unit_price`, `line_revenue` | `float64` | Keeps full precision for revenue totals |
+# 
+# A memory report shows the footprint of each column before and after the conversion.  
+# The exported `.csv` files are unchanged — only the in-memory representation is smaller.
+# 
+# ---
+# 
+
+# In[ ]:
+
+
+# 🧬 Apply the schema to the final cleaned dataset before export
+raw_cleaned_df = apply_retail_schema(invoice_items_cleaned)
+memory_footprint_report(invoice_items_cleaned, raw_cleaned_df, name="raw_cleaned_df")
+
+
 # ## 💾 Step 22: Export Full Cleaned Dataset
 # 
 # Before creating normalized tables, we export the entire cleaned dataset as a single `.csv` file.  
@@ -1887,20 +2735,67 @@ safe_print(f"✅ Final cleaned flat dataset assigned to: raw_cleaned_df → shap
 # In[ ]:
 
 
-# ✅ Toggle overwrite behavior (if not already defined)
-OVERWRITE_CSV = True  # Set to False to avoid overwriting existing files
+import json
+
+# ✅ Only rewrite files whose content changed since the last export
+SKIP_UNCHANGED_EXPORTS = True  # Set to False to rewrite every file
 
 # 📁 Define cleaned data folder
 export_path = os.path.join(project_base_path, 'cleaned_data')
 os.makedirs(export_path, exist_ok=True)
 
+# 🧾 Export manifest: row count, size and content fingerprint of each file written. The tables are rebuilt on
+# every run and the fingerprint only saves the write; skipping the cleaning itself is INCREMENTAL_MODE's job
+# (unchanged sources are not read, see Step 21.4d)
+export_manifest_path = os.path.join(sheet_cache_dir, 'export_manifest.json')
+try:
+    with open(export_manifest_path) as fh:
+        export_manifest = json.load(fh)
+except FileNotFoundError:
+    export_manifest = {}
+
+def save_export_manifest():
+    os.makedirs(sheet_cache_dir, exist_ok=True)
+    with open(export_manifest_path, 'w') as fh:
+        json.dump(export_manifest, fh, indent=2)
+
+def content_digest(df, fingerprints):
+    """Digest of the column names, dtypes and row fingerprints (fingerprints may be a prefix of df's rows)."""
+    header = repr([(col, str(dtype)) for col, dtype in df.dtypes.items()])
+    return hashlib.sha256(header.encode() + fingerprints.tobytes()).hexdigest()
+
+def file_matches_manifest(key, path):
+    previous = export_manifest.get(key)
+    return previous is not None and os.path.exists(path) and os.path.getsize(path) == previous['bytes']
+
+def export_table(df, path, label=""):
+    """
+    Write df to CSV and record its content fingerprint in the manifest. When the
+    file on disk was written from exactly this content it is left untouched. In
+    incremental mode, when it holds exactly the first rows of df, only the new
+    rows are appended instead of rewriting the file.
+    """
+    name = os.path.basename(path)
+    previous = export_manifest.get(name)
+    on_disk = file_matches_manifest(name, path)
+    fingerprints = row_fingerprints([df[col] for col in df.columns])
+    digest = lambda n: content_digest(df, fingerprints[:n])
+
+    if SKIP_UNCHANGED_EXPORTS and on_disk and previous['rows'] == len(df) and previous['digest'] == digest(len(df)):
+        safe_print(f"⏭️ Skipped{label} (unchanged content): {path}")
+        return
+    if INCREMENTAL_MODE and on_disk and previous['rows'] <= len(df) and digest(previous['rows']) == previous['digest']:
+        df.iloc[previous['rows']:].to_csv(path, mode='a', header=False, index=False)
+        safe_print(f"➕ Appended {len(df) - previous['rows']} new rows{' to' + label if label else ''}: {path}")
+    else:
+        df.to_csv(path, index=False)
+        safe_print(f"✅ Saved{label}: {path}")
+    export_manifest[name] = {'rows': len(df), 'bytes': os.path.getsize(path), 'digest': digest(len(df))}
+    save_export_manifest()
+
 # 📄 Export full cleaned dataset
 full_clean_path = os.path.join(export_path, 'cleaned_online_retail_II.csv')
-if OVERWRITE_CSV or not os.path.exists(full_clean_path):
-    raw_cleaned_df.to_csv(full_clean_path, index=False)
-    safe_print(f"✅ Saved full cleaned dataset: {full_clean_path}")
-else:
-    safe_print(f"⚠️ Skipped (already exists): {full_clean_path}")
+export_table(raw_cleaned_df, full_clean_path, label=" full cleaned dataset")
 
 
 # ---
@@ -1929,9 +2824,6 @@ else:
 
 import os
 
-# ✅ Toggle overwrite behavior
-OVERWRITE_CSV = True  # Set to False to avoid overwriting existing files
-
 # 📁 Define clean export folder
 export_path = os.path.join(project_base_path, 'cleaned_data')
 os.makedirs(export_path, exist_ok=True)
@@ -1944,11 +2836,7 @@ invoice_items_path = os.path.join(export_path, 'invoice_items.csv')
 
 # 💾 Save Customers
 customers_df = raw_cleaned_df[['customer_id', 'country']].drop_duplicates()
-if OVERWRITE_CSV or not os.path.exists(customers_path):
-    customers_df.to_csv(customers_path, index=False)
-    safe_print(f"✅ Saved: {customers_path}")
-else:
-    safe_print(f"⚠️ Skipped (already exists): {customers_path}")
+export_table(customers_df, customers_path)
 
 # 💾 Save Products
 products_df = (
@@ -1957,27 +2845,121 @@ products_df = (
     .drop_duplicates(subset='stock_code', keep='first')
     [['stock_code', 'description', 'unit_price']]
 )
-if OVERWRITE_CSV or not os.path.exists(products_path):
-    products_df.to_csv(products_path, index=False)
-    safe_print(f"✅ Saved: {products_path}")
-else:
-    safe_print(f"⚠️ Skipped (already exists): {products_path}")
+export_table(products_df, products_path)
 
 # 💾 Save Invoices
 invoices_df = raw_cleaned_df[['invoice_no', 'invoice_date', 'customer_id']].drop_duplicates()
-if OVERWRITE_CSV or not os.path.exists(invoices_path):
-    invoices_df.to_csv(invoices_path, index=False)
-    safe_print(f"✅ Saved: {invoices_path}")
-else:
-    safe_print(f"⚠️ Skipped (already exists): {invoices_path}")
+export_table(invoices_df, invoices_path)
 
 # 💾 Save Invoice Items (from deduplicated group)
 invoice_items_df = invoice_items_cleaned[['invoice_no', 'stock_code', 'quantity', 'unit_price', 'line_revenue']]
-if OVERWRITE_CSV or not os.path.exists(invoice_items_path):
-    invoice_items_df.to_csv(invoice_items_path, index=False)
-    safe_print(f"✅ Saved: {invoice_items_path}")
-else:
-    safe_print(f"⚠️ Skipped (already exists): {invoice_items_path}")
+export_table(invoice_items_df, invoice_items_path)
+
+
+# ---
+# 
+# ### 🗃️ Step 23b: Export Columnar (Parquet) Copies
+# 
+# The EDA, SQL and MySQL notebooks re-parse every `.csv` file, including the `invoice_date` timestamps.  
+# With `WRITE_PARQUET = True`, the same tables are also written to `cleaned_data/parquet/`:
+# 
+# | Output | Layout |
+# |--------|--------|
+# | `cleaned_online_retail_II/` | One folder per invoice month (`invoice_month=YYYY-MM/part-0.parquet`) |
+# | `invoice_items/` | One folder per invoice month, based on the invoice date |
+# | `customers.parquet`, `products.parquet`, `invoices.parquet` | Single files |
+# 
+# Downstream loaders read only the columns they need, and can skip whole months through the `invoice_month` partition (`INVOICE_MONTHS`).  
+# The `.csv` files are still written and remain the source of truth. Loaders fall back to them when the Parquet copies or `pyarrow` are missing.
+# 
+# ---
+# 
+
+# In[ ]:
+
+
+# 🗃️ Columnar copies of the cleaned outputs for faster downstream loading (EDA, SQL and MySQL scripts)
+import shutil
+
+WRITE_PARQUET = True  # Set to False to write the .csv files only
+parquet_export_path = os.path.join(export_path, 'parquet')
+
+if WRITE_PARQUET:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        WRITE_PARQUET = False
+        safe_print("⚠️ pyarrow not installed – Parquet export skipped, .csv files only.")
+
+# 🧱 Categorical columns are stored as plain strings, so readers rebuild them through the central schema exactly as from .csv
+def to_plain_arrow(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(field.type.value_type))
+    return table
+
+# 🧾 Parquet files share the export manifest, keyed by their path under cleaned_data/
+def parquet_is_current(path, digest):
+    key = os.path.relpath(path, export_path)
+    return SKIP_UNCHANGED_EXPORTS and file_matches_manifest(key, path) and export_manifest[key]['digest'] == digest
+
+def record_parquet(path, rows, digest):
+    export_manifest[os.path.relpath(path, export_path)] = {'rows': rows, 'bytes': os.path.getsize(path), 'digest': digest}
+
+def export_parquet(df, name):
+    path = os.path.join(parquet_export_path, f"{name}.parquet")
+    digest = content_digest(df, row_fingerprints([df[col] for col in df.columns]))
+    if parquet_is_current(path, digest):
+        safe_print(f"⏭️ Skipped (unchanged content): {path}")
+        return
+    pq.write_table(to_plain_arrow(df), path)
+    record_parquet(path, len(df), digest)
+    safe_print(f"✅ Saved: {path}")
+
+def export_parquet_by_month(df, invoice_dates, name):
+    """
+    Write df as a Hive-style dataset with one folder per invoice month
+    (name/invoice_month=YYYY-MM/part-0.parquet), so readers can skip whole
+    months with a filter on invoice_month. Row order is kept within each month.
+    Only months whose content fingerprint changed are rewritten, and folders of
+    months that no longer occur are removed.
+    """
+    dataset_path = os.path.join(parquet_export_path, name)
+    fingerprints = row_fingerprints([df[col] for col in df.columns])
+    months = invoice_dates.to_numpy().astype('datetime64[M]')
+    partitions = {
+        f"invoice_month={pd.Timestamp(month):%Y-%m}": rows
+        for month, rows in pd.Series(months).groupby(months).indices.items()
+    }
+
+    if os.path.isdir(dataset_path):
+        for part in set(os.listdir(dataset_path)) - set(partitions):
+            shutil.rmtree(os.path.join(dataset_path, part))
+            export_manifest.pop(os.path.relpath(os.path.join(dataset_path, part, 'part-0.parquet'), export_path), None)
+
+    table, rewritten = None, 0
+    for part, rows in partitions.items():
+        path = os.path.join(dataset_path, part, 'part-0.parquet')
+        digest = content_digest(df, fingerprints[rows])
+        if parquet_is_current(path, digest):
+            continue
+        table = to_plain_arrow(df) if table is None else table
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pq.write_table(table.take(rows), path)
+        record_parquet(path, len(rows), digest)
+        rewritten += 1
+    safe_print(f"✅ Saved: {dataset_path} ({rewritten} of {len(partitions)} monthly partitions rewritten)")
+
+if WRITE_PARQUET:
+    os.makedirs(parquet_export_path, exist_ok=True)
+    export_parquet_by_month(raw_cleaned_df, raw_cleaned_df['invoice_date'], 'cleaned_online_retail_II')
+    export_parquet_by_month(invoice_items_df, invoice_items_cleaned['invoice_date'], 'invoice_items')
+    export_parquet(customers_df, 'customers')
+    export_parquet(products_df, 'products')
+    export_parquet(invoices_df, 'invoices')
+    save_export_manifest()
 
 
 # ---
@@ -191,6 +191,13 @@ else:
 # > 🧠 **Note**: The normalized relational tables (`customers.csv`, `products.csv`, `invoices.csv`, `invoice_items.csv`) are used exclusively in the SQL notebook:  
 # > 📓 `3_sql_analysis_sales_performance.ipynb`, which answers the same business questions using relational queries.
 # 
+# 🧬 After loading, the dataset is cast to the **central schema** shared with the cleaning and SQL notebooks:  
+# `category` for `stock_code`, `description` and `country`, an Arrow-backed `string` for `invoice_no`, and `int32` for `quantity` and `customer_id`.  
+# A memory report shows the per-column footprint before and after the conversion.
+# 
+# 🗃️ When the month-partitioned Parquet copy from Step 23b of the cleaning notebook is available, it is read instead of the CSV (only the schema columns are loaded).  
+# Set `INVOICE_MONTHS` to a `('YYYY-MM', 'YYYY-MM')` range to skip the other months entirely.
+# 
 # ---
 # 
 
@@ -213,13 +220,108 @@ sns.set_palette("pastel")
 clean_path = os.path.join(project_base_path, 'cleaned_data')
 full_data_path = os.path.join(clean_path, 'cleaned_online_retail_II.csv')
 
+# 🗃️ Prefer the Parquet copies written by the cleaning script (Step 23b); fall back to .csv
+USE_PARQUET = True
+INVOICE_MONTHS = None  # e.g. ('2010-01', '2010-12') to load only those invoice months
+parquet_path = os.path.join(clean_path, 'parquet')
+
+if USE_PARQUET:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        USE_PARQUET = False
+        safe_print("⚠️ pyarrow not installed – reading the .csv files.")
+
+# 🔎 Pushdown filters for INVOICE_MONTHS: whole partitions on invoice_month, row groups on a date column
+def invoice_month_filters(column):
+    if INVOICE_MONTHS is None:
+        return None
+    first, last = INVOICE_MONTHS
+    if column == 'invoice_month':
+        return [('invoice_month', '>=', first), ('invoice_month', '<=', last)]
+    return [(column, '>=', pd.Timestamp(first)), (column, '<', pd.Timestamp(last) + pd.offsets.MonthBegin(1))]
+
+# 📥 Read one cleaned table with column projection: Parquet file/dataset when present, otherwise .csv
+def read_cleaned_table(name, columns, filter_column=None, parse_dates=None):
+    import time
+
+    start = time.perf_counter()
+    parquet_source = next(
+        (path for path in (os.path.join(parquet_path, name), os.path.join(parquet_path, f"{name}.parquet"))
+         if os.path.exists(path)),
+        None
+    )
+    if USE_PARQUET and parquet_source:
+        filters = invoice_month_filters(filter_column) if filter_column else None
+        df = pd.read_parquet(parquet_source, columns=columns, filters=filters)
+        source = os.path.relpath(parquet_source, clean_path)
+    else:
+        source = f"{name}.csv"
+        df = pd.read_csv(os.path.join(clean_path, source), usecols=columns, parse_dates=parse_dates)[columns]
+        if filter_column and INVOICE_MONTHS is not None:
+            if 'invoice_date' in df.columns:
+                months = df['invoice_date'].dt.strftime('%Y-%m')
+                df = df[months.between(*INVOICE_MONTHS)].reset_index(drop=True)
+            else:
+                safe_print(f"⚠️ INVOICE_MONTHS needs the Parquet dataset for {name} – all months loaded.")
+    safe_print(f"⏱️ Loaded {source} in {time.perf_counter() - start:.2f}s")
+    return df
+
+# 🧬 Central schema for the cleaned Online Retail II columns (shared with the cleaning and SQL scripts)
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    STRING_DTYPE = 'object'
+
+RETAIL_SCHEMA = {
+    'invoice_no': STRING_DTYPE,
+    'stock_code': 'category',
+    'description': 'category',
+    'quantity': 'int32',
+    'invoice_date': 'datetime64[ns]',
+    'unit_price': 'float64',
+    'customer_id': 'int32',
+    'country': 'category',
+    'line_revenue': 'float64'
+}
+
+# 🧬 Cast known columns to their compact schema dtypes (other columns are left untouched)
+def apply_retail_schema(df):
+    return df.astype({col: dtype for col, dtype in RETAIL_SCHEMA.items() if col in df.columns})
+
+# 📏 Per-column memory footprint before and after applying the schema
+def memory_footprint_report(before_df, after_df, name="Dataset"):
+    report = pd.DataFrame({
+        'dtype_before': before_df.dtypes.astype(str),
+        'mb_before': before_df.memory_usage(deep=True, index=False) / 1e6,
+        'dtype_after': after_df.dtypes.astype(str),
+        'mb_after': after_df.memory_usage(deep=True, index=False) / 1e6
+    })
+    report['saved_pct'] = (1 - report['mb_after'] / report['mb_before']) * 100
+    total_before, total_after = report['mb_before'].sum(), report['mb_after'].sum()
+
+    safe_print(f"📏 Memory footprint for {name}:")
+    safe_print(report.round(2).to_string())
+    safe_print(f"🧮 Total: {total_before:,.2f} MB → {total_after:,.2f} MB "
+               f"({(1 - total_after / total_before) * 100:.1f}% saved)")
+
 # 📥 Load the flat dataset with error handling
 try:
-    cleaned_full_df = pd.read_csv(full_data_path, parse_dates=['invoice_date'])
+    raw_full_df = read_cleaned_table(
+        'cleaned_online_retail_II',
+        columns=list(RETAIL_SCHEMA),
+        filter_column='invoice_month',
+        parse_dates=['invoice_date']
+    )
+    cleaned_full_df = apply_retail_schema(raw_full_df)
 
     safe_print("✅ Cleaned flat dataset loaded successfully.")
     safe_print(f"cleaned_full_df shape: {cleaned_full_df.shape}")
 
+    memory_footprint_report(raw_full_df, cleaned_full_df, name="cleaned_full_df")
+    del raw_full_df
+
 except FileNotFoundError as e:
     safe_print(f"❌ File not found: {e}")
     sys.exit(1)
@@ -496,6 +598,9 @@ for col in quantitative_cols:
 #   - Left: Raw distribution
 #   - Right: Log-transformed distribution
 # 
+# ⚡ Each column is binned only once per transform, into 300 equal-width bins (`histogram_summary`).  
+# The histograms merge them 3 at a time (100 bins), and the frequency tables 20 at a time (15 rows, each `(left, right]` as with `pd.cut` except the first, `[left, right]`, which holds the minimum). Integer columns with fewer than 50 distinct values show their exact value counts instead.
+# 
 # These tables and visualizations allow us to:
 # - Understand which values dominate each variable
 # - Spot long-tailed or right-skewed distributions
@@ -504,6 +609,9 @@ for col in quantitative_cols:
 # Each histogram pair is saved in the project under:  
 # 📁 `eda_outputs/plots/`
 # 
+# 🖼️ This cell also sets up the export helpers used by every section below. Each chart is a small `draw_...` function that receives its precomputed data and is handed to `render_plot`.  
+# In a notebook the figure is drawn and shown in place. When the script runs headless (Agg backend), the figures are queued and rendered together in a process pool in the last cell, which produces the same PNG files.
+# 
 # > 📌 **Insight Tip**: If most of the data falls in the first few bins and only a handful in the rest, the variable is highly skewed and may benefit from transformation or trimming for modeling.
 # 
 # ---
@@ -518,42 +626,229 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
 
+import hashlib
+import json
+import math
+import multiprocessing
+import threading
+import time
+import matplotlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
 # 📦 Setup
-OVERWRITE_PLOTS = True
 plot_export_dir = os.path.join(project_base_path, 'eda_outputs', 'plots')
 os.makedirs(plot_export_dir, exist_ok=True)
 
+# 🧾 Artifact manifest: each CSV and plot in eda_outputs/ records the fingerprint it was built from,
+# and is only rewritten when that fingerprint changes. Plots are keyed on their inputs (the loaded dataset
+# and the script source) and are not drawn at all while those are unchanged. The summary tables are cheap
+# groupbys that later sections reuse, so they are still computed and only the CSV write is skipped.
+SKIP_UNCHANGED_ARTIFACTS = True  # Set to False to rewrite every artifact
+artifact_manifest_path = os.path.join(project_base_path, 'data', 'cache', 'eda_artifact_manifest.json')
+try:
+    with open(artifact_manifest_path) as fh:
+        artifact_manifest = json.load(fh)
+except FileNotFoundError:
+    artifact_manifest = {}
+
+def frame_digest(df):
+    """Content fingerprint of a DataFrame: column names, dtypes and every value."""
+    header = repr([(col, str(dtype)) for col, dtype in df.dtypes.items()]) + pd.__version__
+    digest = hashlib.sha256(header.encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+# 🔑 Plots depend on the loaded dataset and on the code that draws them (this script and the plotting libraries)
+input_fingerprint = frame_digest(cleaned_full_df)
+script_file = globals().get('__file__')
+if script_file:
+    with open(script_file, 'rb') as fh:
+        code_fingerprint = hashlib.sha256(fh.read() + f"{matplotlib.__version__}|{sns.__version__}".encode()).hexdigest()
+    plot_fingerprint = hashlib.sha256(f"{input_fingerprint}|{code_fingerprint}".encode()).hexdigest()
+else:
+    plot_fingerprint = None  # notebook run: no source file to fingerprint, so plots are always redrawn
+
+def artifact_is_current(path, fingerprint):
+    entry = artifact_manifest.get(os.path.relpath(path, project_base_path))
+    return (
+        SKIP_UNCHANGED_ARTIFACTS and fingerprint is not None and entry is not None
+        and entry['fingerprint'] == fingerprint
+        and os.path.exists(path) and os.path.getsize(path) == entry['bytes']
+    )
+
+manifest_lock = threading.Lock()  # the manifest is updated from the CSV writer thread as well
+
+def record_artifact(path, fingerprint):
+    with manifest_lock:
+        artifact_manifest[os.path.relpath(path, project_base_path)] = {
+            'fingerprint': fingerprint, 'bytes': os.path.getsize(path)
+        }
+        os.makedirs(os.path.dirname(artifact_manifest_path), exist_ok=True)
+        with open(artifact_manifest_path, 'w') as fh:
+            json.dump(artifact_manifest, fh, indent=2)
+
+# 🗂️ In-process artifact registry: later sections take the frames exported earlier in this run
+# from memory instead of reading the CSVs back from disk
+artifact_registry = {}
+
+def get_artifact(path):
+    """Return the frame exported to path in this run (falls back to the CSV on disk, e.g. in a partial notebook run)."""
+    name = os.path.basename(path)
+    if name in artifact_registry:
+        return artifact_registry[name].copy()
+    return pd.read_csv(path)
+
+# 🧵 CSV files are serialized on a background thread so the analysis never waits on disk
+ASYNC_CSV_WRITES = True  # Set to False to write each CSV before moving on
+csv_writer = None  # started on the first queued write and stopped again by wait_for_csv_writes(shutdown=True)
+pending_csv_writes = []
+
+def csv_writer_thread():
+    global csv_writer
+    if csv_writer is None:
+        csv_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='csv-writer')
+    return csv_writer
+
+def write_csv_artifact(df, path, fingerprint, message):
+    df.to_csv(path, index=False)
+    record_artifact(path, fingerprint)
+    safe_print(f"{message}: {path}")
+
+def save_csv_artifact(df, path, message="✅ Exported"):
+    """Register df for later sections and write it to CSV unless the file on disk was written from identical content."""
+    df = df.copy()  # private snapshot: the caller may keep modifying its frame while the write is queued
+    artifact_registry[os.path.basename(path)] = df
+    fingerprint = frame_digest(df)
+    if artifact_is_current(path, fingerprint):
+        safe_print(f"⏭️ Unchanged, not rewritten: {path}")
+        return
+    if ASYNC_CSV_WRITES:
+        pending_csv_writes.append(csv_writer_thread().submit(write_csv_artifact, df, path, fingerprint, message))
+    else:
+        write_csv_artifact(df, path, fingerprint, message)
+
+def wait_for_csv_writes(shutdown=False):
+    """Block until every queued CSV is on disk (re-raises the first write error), optionally stopping the writer thread."""
+    global csv_writer
+    for future in pending_csv_writes:
+        future.result()
+    pending_csv_writes.clear()
+    if shutdown and csv_writer is not None:
+        csv_writer.shutdown()
+        csv_writer = None  # a re-run cell starts a new one
+
+# 🖼️ Plot rendering: each section passes its precomputed data and a draw function to render_plot.
+# Headless runs (Agg backend, e.g. the .py script) queue the figures and render them together at the
+# end in a process pool without calling plt.show(); interactive runs draw and show them in place.
+HEADLESS = matplotlib.get_backend().lower() == 'agg'
+PARALLEL_PLOTS = True  # Set to False to render the queued figures one by one in this process
+queued_plots = []
+
+def draw_and_save(path, draw, data, savefig_kwargs):
+    """Draw one figure and write it to path (runs in a plot worker when rendering in parallel)."""
+    draw(**data)
+    plt.savefig(path, **savefig_kwargs)
+    plt.close('all')
+    return path
+
+def render_plot(path, draw, message="✅ Saved plot", savefig_kwargs=None, **data):
+    """Draw a figure from data, unless the PNG on disk was drawn from the same data and code."""
+    savefig_kwargs = savefig_kwargs or {}
+    current = artifact_is_current(path, plot_fingerprint)
+    if HEADLESS:
+        if current:
+            safe_print(f"⏭️ Unchanged, not redrawn: {path}")
+        else:
+            queued_plots.append((path, draw, data, savefig_kwargs, message))
+        return
+    draw(**data)
+    if current:
+        safe_print(f"⏭️ Unchanged, not rewritten: {path}")
+    else:
+        plt.savefig(path, **savefig_kwargs)
+        record_artifact(path, plot_fingerprint)
+        safe_print(f"{message}: {path}")
+    plt.show()
+
+def render_queued_plots():
+    """Render every queued figure, in parallel worker processes where fork is available."""
+    if not queued_plots:
+        return
+    start = time.perf_counter()
+    jobs = [(path, draw, data, savefig_kwargs) for path, draw, data, savefig_kwargs, _ in queued_plots]
+    workers = min(len(jobs), os.cpu_count() or 1)
+    # 🍴 fork lets the workers use the draw functions defined in this script without re-running it
+    if PARALLEL_PLOTS and workers > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            for future in [pool.submit(draw_and_save, *job) for job in jobs]:
+                future.result()
+    else:
+        workers = 1
+        for job in jobs:
+            draw_and_save(*job)
+    for path, _, _, _, message in queued_plots:
+        record_artifact(path, plot_fingerprint)
+        safe_print(f"{message}: {path}")
+    safe_print(f"⏱️ Rendered {len(jobs)} plots with {workers} worker(s) in {time.perf_counter() - start:.2f}s")
+    queued_plots.clear()
+
 # 🔢 Quantitative columns to analyze
 quant_cols = ['quantity', 'unit_price', 'line_revenue']
 plot_index = 1
 
+# 📊 Histogram summaries: each column and transform is binned once, and both the frequency
+# tables and the plots are built from those counts instead of re-binning the full series
+PLOT_BINS = 100
+TABLE_BINS = 15
+SUMMARY_BINS = math.lcm(PLOT_BINS, TABLE_BINS)  # fine bins that merge evenly into both
+
+def histogram_summary(values):
+    """
+    Counts and edges of SUMMARY_BINS equal-width bins over the data range, plus the exact
+    value counts of an integer column with fewer than 50 distinct values.
+    'counts' are left-closed like the histogram plots, 'right_counts' right-closed like pd.cut.
+    """
+    counts, edges = np.histogram(values, bins=SUMMARY_BINS)
+    # The table edges are the ones pd.cut(values, bins=TABLE_BINS) would use, so edge values land in the same rows
+    edges[::SUMMARY_BINS // TABLE_BINS] = np.linspace(edges[0], edges[-1], TABLE_BINS + 1)
+    bin_index = np.searchsorted(edges, values, side='left').clip(1) - 1  # (left, right], the minimum in the first bin
+    right_counts = np.bincount(bin_index, minlength=SUMMARY_BINS)
+    summary = {'counts': counts, 'right_counts': right_counts, 'edges': edges, 'value_counts': None}
+    if pd.api.types.is_integer_dtype(values):
+        value_counts = values.value_counts().sort_index()
+        if len(value_counts) < 50:
+            summary['value_counts'] = value_counts
+    return summary
+
+def merge_bins(summary, bins, counts='counts'):
+    """Counts (left- or right-closed) and edges of the summary regrouped into `bins` equal-width bins."""
+    step = len(summary[counts]) // bins
+    return summary[counts].reshape(bins, step).sum(axis=1), summary['edges'][::step]
+
 # 📋 Frequency table helper
-def display_frequency_table(series, label, bins=15, log_scale=False):
+def display_frequency_table(summary, label, log_scale=False):
     title = f"log1p({label})" if log_scale else label
     safe_print(f"\n📋 Frequency Table for: {title}")
     safe_print("=" * 50)
 
-    # Transform if log
-    data = np.log1p(series) if log_scale else series
-
-    if pd.api.types.is_integer_dtype(data) and data.nunique() < 50:
-        freq_table = data.value_counts().sort_index()
+    if summary['value_counts'] is not None:
+        freq_table = summary['value_counts']
     else:
-        freq_table = pd.cut(data, bins=bins).value_counts().sort_index()
+        # Bins are (left, right] as with pd.cut, except the first one, which also holds the minimum
+        counts, edges = merge_bins(summary, TABLE_BINS, counts='right_counts')
+        labels = [f"[{edges[0]:g}, {edges[1]:g}]"]
+        labels += [f"({left:g}, {right:g}]" for left, right in zip(edges[1:-1], edges[2:])]
+        freq_table = pd.Series(counts, index=labels, name='count')
 
     display(freq_table)
 
-# 🔁 Loop through columns
-for col in quant_cols:
-    series = cleaned_full_df[col]
-
-    # 📋 Raw frequency table
-    display_frequency_table(series, col, bins=15, log_scale=False)
-
-    # 📋 Log1p frequency table
-    display_frequency_table(series, col, bins=15, log_scale=True)
+# 🎨 Histogram bars from a pre-binned summary
+def histplot_summary(summary, ax):
+    counts, edges = merge_bins(summary, PLOT_BINS)
+    sns.histplot(x=(edges[:-1] + edges[1:]) / 2, weights=counts, bins=edges.tolist(), ax=ax, kde=False)
 
-    # 🎨 Plot setup
+# 🎨 Raw and log1p histograms of one column
+def draw_distribution(raw_summary, log_summary, col):
     fig, axes = plt.subplots(1, 2, figsize=(14, 5))
     fig.suptitle(f'Distribution of {col}', fontsize=16, fontweight='bold')
 
@@ -564,27 +859,35 @@ for col in quant_cols:
         x_label = col
 
     # Raw histogram
-    sns.histplot(series, bins=100, ax=axes[0], kde=False)
+    histplot_summary(raw_summary, axes[0])
     axes[0].set_title(f'{col} (Raw)', fontsize=12)
     axes[0].set_xlabel(x_label)
     axes[0].set_ylabel('Frequency')
 
     # Log-transformed histogram
-    sns.histplot(np.log1p(series), bins=100, ax=axes[1], kde=False)
+    histplot_summary(log_summary, axes[1])
     axes[1].set_title(f'{col} (Log Scale)', fontsize=12)
     axes[1].set_xlabel(f'log1p({x_label})')
     axes[1].set_ylabel('Frequency')
 
-    # Save plot
+# 🔁 Loop through columns
+for col in quant_cols:
+    series = cleaned_full_df[col]
+
+    # 📊 One binning pass per transform
+    raw_summary = histogram_summary(series)
+    log_summary = histogram_summary(np.log1p(series))
+
+    # 📋 Raw frequency table
+    display_frequency_table(raw_summary, col, log_scale=False)
+
+    # 📋 Log1p frequency table
+    display_frequency_table(log_summary, col, log_scale=True)
+
+    # 🎨 Plot
     plot_filename = f"{plot_index:02d}_{col}_distribution.png"
     plot_path = os.path.join(plot_export_dir, plot_filename)
-    if OVERWRITE_PLOTS or not os.path.exists(plot_path):
-        plt.savefig(plot_path)
-        safe_print(f"✅ Saved plot: {plot_path}")
-    else:
-        safe_print(f"⚠️ Skipped (already exists): {plot_path}")
-
-    plt.show()
+    render_plot(plot_path, draw_distribution, "✅ Saved plot", raw_summary=raw_summary, log_summary=log_summary, col=col)
     plot_index += 1
 
 
@@ -686,9 +989,6 @@ import matplotlib.pyplot as plt
 import os
 import matplotlib.dates as mdates
 
-# ✅ Setup export behavior
-OVERWRITE_PLOTS = True
-OVERWRITE_CSV = True
 plot_index = 4
 data_index = 1
 
@@ -712,11 +1012,7 @@ monthly_summary.loc[monthly_summary['invoice_month_str'] == '2011-12', 'invoice_
 
 # 💾 Export summary table
 monthly_data_path = os.path.join(data_dir, f'{data_index:02d}_monthly_revenue_summary.csv')
-if OVERWRITE_CSV or not os.path.exists(monthly_data_path):
-    monthly_summary.to_csv(monthly_data_path, index=False)
-    safe_print(f"✅ Exported summary: {monthly_data_path}")
-else:
-    safe_print(f"⚠️ Skipped (already exists): {monthly_data_path}")
+save_csv_artifact(monthly_summary, monthly_data_path, "✅ Exported summary")
 
 # 📋 Show the full table
 display(monthly_summary[['invoice_month_str', 'monthly_revenue', 'monthly_invoices', 'avg_revenue_per_invoice']])
@@ -726,39 +1022,33 @@ safe_print("\n📝 Note: Months marked with * are partial months.")
 safe_print("- 2011-12: Data available only up to December 9th.\n")
 
 # 📊 Plot monthly revenue trend
-fig, ax = plt.subplots(figsize=(14, 6))
-ax.plot(monthly_summary['invoice_month'], monthly_summary['monthly_revenue'], marker='o', linewidth=2, label='Monthly Revenue')
-
-# 🧭 Format x-axis ticks to show all months
-ax.xaxis.set_major_locator(mdates.MonthLocator(interval=1))
-ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-plt.xticks(rotation=45)
-
-# 📍 Add vertical lines for each new year
-for date in monthly_summary['invoice_month']:
-    if date.month == 1:
-        ax.axvline(date, color='gray', linestyle='--', alpha=0.7, label='Year Start' if date.year == 2010 else "")
-
-# 📍 Mark partial month (Dec 2011)
-partial_month = pd.to_datetime('2011-12-01')
-ax.axvline(partial_month, color='red', linestyle='--', linewidth=1.5, label='Partial Month')
-
-# 🏷️ Labels and legend
-ax.set_title('Monthly Revenue Trend (2009–2011)', fontsize=16, fontweight='bold')
-ax.set_xlabel('Invoice Month')
-ax.set_ylabel('Total Revenue (GBP £)')
-ax.legend()
-plt.tight_layout()
-
-# 💾 Save plot
-plot_path = os.path.join(plot_dir, f'{plot_index:02d}_monthly_revenue_trend.png')
-if OVERWRITE_PLOTS or not os.path.exists(plot_path):
-    plt.savefig(plot_path)
-    safe_print(f"✅ Saved plot: {plot_path}")
-else:
-    safe_print(f"⚠️ Skipped (already exists): {plot_path}")
+def draw_monthly_revenue_trend(monthly_summary):
+    fig, ax = plt.subplots(figsize=(14, 6))
+    ax.plot(monthly_summary['invoice_month'], monthly_summary['monthly_revenue'], marker='o', linewidth=2, label='Monthly Revenue')
+
+    # 🧭 Format x-axis ticks to show all months
+    ax.xaxis.set_major_locator(mdates.MonthLocator(interval=1))
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    plt.xticks(rotation=45)
+
+    # 📍 Add vertical lines for each new year
+    for date in monthly_summary['invoice_month']:
+        if date.month == 1:
+            ax.axvline(date, color='gray', linestyle='--', alpha=0.7, label='Year Start' if date.year == 2010 else "")
+
+    # 📍 Mark partial month (Dec 2011)
+    partial_month = pd.to_datetime('2011-12-01')
+    ax.axvline(partial_month, color='red', linestyle='--', linewidth=1.5, label='Partial Month')
+
+    # 🏷️ Labels and legend
+    ax.set_title('Monthly Revenue Trend (2009–2011)', fontsize=16, fontweight='bold')
+    ax.set_xlabel('Invoice Month')
+    ax.set_ylabel('Total Revenue (GBP £)')
+    ax.legend()
+    plt.tight_layout()
 
-plt.show()
+plot_path = os.path.join(plot_dir, f'{plot_index:02d}_monthly_revenue_trend.png')
+render_plot(plot_path, draw_monthly_revenue_trend, "✅ Saved plot", monthly_summary=monthly_summary)
 
 
 # ---
@@ -810,10 +1100,6 @@ import seaborn as sns
 import pandas as pd
 import os
 
-# ✅ Export flags
-OVERWRITE_PLOTS = True
-OVERWRITE_CSV = True
-
 # 📁 Define export paths
 data_dir = os.path.join(project_base_path, 'eda_outputs', 'data')
 plot_dir = os.path.join(project_base_path, 'eda_outputs', 'plots')
@@ -826,7 +1112,7 @@ plot_path = os.path.join(plot_dir, '05_top_products_revenue.png')
 
 # 🧮 Aggregate top 10 products by revenue
 top_products_df = (
-    cleaned_full_df.groupby(['stock_code', 'description'])
+    cleaned_full_df.groupby(['stock_code', 'description'], observed=True)
     .agg(
         total_revenue=('line_revenue', 'sum'),
         total_quantity=('quantity', 'sum'),
@@ -838,40 +1124,29 @@ top_products_df = (
 )
 
 # 💾 Save CSV
-if OVERWRITE_CSV or not os.path.exists(csv_path):
-    top_products_df.to_csv(csv_path, index=False)
-    safe_print(f"✅ Exported top products summary: {csv_path}")
-else:
-    safe_print(f"⚠️ Skipped (already exists): {csv_path}")
+save_csv_artifact(top_products_df, csv_path, "✅ Exported top products summary")
 
 # 📋 Show top products table
 display(top_products_df)
 
 # 🎨 Plot setup
-plt.figure(figsize=(12, 6))
-pastel_colors = sns.color_palette("pastel", len(top_products_df))
-
-# 📊 Draw horizontal bars manually
-for i, (desc, revenue) in enumerate(zip(top_products_df["description"], top_products_df["total_revenue"])):
-    plt.barh(y=i, width=revenue, color=pastel_colors[i])
-    plt.text(revenue + 2000, i, f"£{revenue:,.0f}", va='center', fontsize=9)
-
-# 🏷️ Format plot
-plt.yticks(ticks=range(len(top_products_df)), labels=top_products_df["description"])
-plt.title("Top 10 Best-Selling Products by Revenue", fontsize=14, fontweight='bold')
-plt.xlabel("Total Revenue (GBP £)")
-plt.ylabel("Product Description")
-plt.tight_layout()
-
-# 💾 Save plot
-if OVERWRITE_PLOTS or not os.path.exists(plot_path):
-    plt.savefig(plot_path, bbox_inches='tight')
-    safe_print(f"✅ Saved plot: {plot_path}")
-else:
-    safe_print(f"⚠️ Skipped (already exists): {plot_path}")
+def draw_top_products(top_products_df):
+    plt.figure(figsize=(12, 6))
+    pastel_colors = sns.color_palette("pastel", len(top_products_df))
+
+    # 📊 Draw horizontal bars manually
+    for i, (desc, revenue) in enumerate(zip(top_products_df["description"], top_products_df["total_revenue"])):
+        plt.barh(y=i, width=revenue, color=pastel_colors[i])
+        plt.text(revenue + 2000, i, f"£{revenue:,.0f}", va='center', fontsize=9)
+
+    # 🏷️ Format plot
+    plt.yticks(ticks=range(len(top_products_df)), labels=top_products_df["description"])
+    plt.title("Top 10 Best-Selling Products by Revenue", fontsize=14, fontweight='bold')
+    plt.xlabel("Total Revenue (GBP £)")
+    plt.ylabel("Product Description")
+    plt.tight_layout()
 
-# 📈 Show
-plt.show()
+render_plot(plot_path, draw_top_products, "✅ Saved plot", savefig_kwargs={'bbox_inches': 'tight'}, top_products_df=top_products_df)
 
 
 # ---
@@ -928,7 +1203,6 @@ import seaborn as sns
 import os
 
 # 📁 Setup
-OVERWRITE_PLOTS = True
 plot_index = 6
 data_index = 3
 plot_dir = os.path.join(project_base_path, 'eda_outputs', 'plots')
@@ -947,51 +1221,46 @@ invoice_summary_df = (
     )
     .sort_values(by='total_invoice_revenue', ascending=False)
     .head(10)
+    .astype({'invoice_no': str})  # plain labels for plotting, as for country below
 )
 
 # 💾 Export
 invoice_summary_path = os.path.join(data_dir, f"{data_index:02d}_top_invoices_by_value.csv")
-invoice_summary_df.to_csv(invoice_summary_path, index=False)
-print(f"✅ Exported top invoice summary: {invoice_summary_path}")
+save_csv_artifact(invoice_summary_df, invoice_summary_path, "✅ Exported top invoice summary")
 
 # 📋 Display summary table
 from IPython.display import display
 display(invoice_summary_df)
 
 # 📊 Plot
-plt.figure(figsize=(12, 6))
-ax = sns.barplot(
-    data=invoice_summary_df,
-    x='invoice_no',
-    y='total_invoice_revenue',
-    hue='invoice_no',       # Required to silence deprecation warning
-    order=invoice_summary_df.sort_values("total_invoice_revenue", ascending=False)["invoice_no"],
-    palette='pastel',
-    legend=False           # Hide legend since x already encodes this
-)
-
-plt.title('Top 10 Invoices by Total Value', fontsize=14, fontweight='bold')
-plt.xlabel('Invoice Number')
-plt.ylabel('Total Revenue (GBP £)')
-
-# ➕ Add labels
-for p in ax.patches:
-    value = p.get_height()
-    ax.annotate(
-        f"£{value:,.0f}",
-        (p.get_x() + p.get_width() / 2, value),
-        ha='center', va='bottom', fontsize=9, fontweight='bold'
+def draw_top_invoices(invoice_summary_df):
+    plt.figure(figsize=(12, 6))
+    ax = sns.barplot(
+        data=invoice_summary_df,
+        x='invoice_no',
+        y='total_invoice_revenue',
+        hue='invoice_no',       # Required to silence deprecation warning
+        hue_order=sorted(invoice_summary_df['invoice_no']),  # colors by invoice number, as when the ids loaded as integers
+        order=invoice_summary_df.sort_values("total_invoice_revenue", ascending=False)["invoice_no"],
+        palette='pastel',
+        legend=False           # Hide legend since x already encodes this
     )
 
-# 💾 Save plot
-invoice_plot_path = os.path.join(plot_dir, f"{plot_index:02d}_top_invoices_by_value.png")
-if OVERWRITE_PLOTS or not os.path.exists(invoice_plot_path):
-    plt.savefig(invoice_plot_path, bbox_inches='tight')
-    print(f"✅ Saved plot: {invoice_plot_path}")
-else:
-    print(f"⚠️ Skipped (already exists): {invoice_plot_path}")
+    plt.title('Top 10 Invoices by Total Value', fontsize=14, fontweight='bold')
+    plt.xlabel('Invoice Number')
+    plt.ylabel('Total Revenue (GBP £)')
+
+    # ➕ Add labels
+    for p in ax.patches:
+        value = p.get_height()
+        ax.annotate(
+            f"£{value:,.0f}",
+            (p.get_x() + p.get_width() / 2, value),
+            ha='center', va='bottom', fontsize=9, fontweight='bold'
+        )
 
-plt.show()
+invoice_plot_path = os.path.join(plot_dir, f"{plot_index:02d}_top_invoices_by_value.png")
+render_plot(invoice_plot_path, draw_top_invoices, "✅ Saved plot", savefig_kwargs={'bbox_inches': 'tight'}, invoice_summary_df=invoice_summary_df)
 
 
 # ---
@@ -1063,7 +1332,7 @@ os.makedirs(plot_export_path, exist_ok=True)
 
 # 📊 Full revenue summary by country
 country_summary_df = (
-    cleaned_full_df.groupby('country')
+    cleaned_full_df.groupby('country', observed=True)
     .agg(
         total_revenue=('line_revenue', 'sum'),
         num_invoices=('invoice_no', 'nunique')
@@ -1071,76 +1340,75 @@ country_summary_df = (
     .assign(avg_invoice_value=lambda df: df.total_revenue / df.num_invoices)
     .sort_values('total_revenue', ascending=False)
     .reset_index()
+    .astype({'country': str})  # plain labels so plots follow revenue order, not category order
 )
 
 # 💾 Export full country summary
 full_country_path = os.path.join(data_export_path, '04_revenue_by_country.csv')
-country_summary_df.to_csv(full_country_path, index=False)
-safe_print(f"✅ Exported revenue by country: {full_country_path}")
+save_csv_artifact(country_summary_df, full_country_path, "✅ Exported revenue by country")
 
 # 📋 Display top 10 including UK
 safe_print("\n📋 Top 10 Countries by Revenue (Including UK):")
 display(country_summary_df.head(10))
 
 # 📊 Plot including UK
-plt.figure(figsize=(12, 6))
-ax = sns.barplot(
-    data=country_summary_df.head(10),
-    y='country',
-    x='total_revenue',
-    hue='country',  # ✅ Avoid warning
-    legend=False,
-    palette='pastel'
-)
-plt.title("Top 10 Countries by Revenue (Including UK)", fontsize=14)
-plt.xlabel("Total Revenue (GBP £)")
-plt.ylabel("Country")
+def draw_country_revenue(country_summary_df):
+    plt.figure(figsize=(12, 6))
+    ax = sns.barplot(
+        data=country_summary_df.head(10),
+        y='country',
+        x='total_revenue',
+        hue='country',  # ✅ Avoid warning
+        legend=False,
+        palette='pastel'
+    )
+    plt.title("Top 10 Countries by Revenue (Including UK)", fontsize=14)
+    plt.xlabel("Total Revenue (GBP £)")
+    plt.ylabel("Country")
+
+    # 💬 Add labels at end of bars
+    for container in ax.containers:
+        ax.bar_label(container, fmt='£%.0f', label_type='edge', padding=5)
 
-# 💬 Add labels at end of bars
-for container in ax.containers:
-    ax.bar_label(container, fmt='£%.0f', label_type='edge', padding=5)
+    plt.tight_layout()
 
-plt.tight_layout()
 plot_path_all = os.path.join(plot_export_path, '07_country_revenue_bar.png')
-plt.savefig(plot_path_all)
-safe_print(f"✅ Saved plot: {plot_path_all}")
-plt.show()
+render_plot(plot_path_all, draw_country_revenue, "✅ Saved plot", country_summary_df=country_summary_df)
 
 # --- 🌍 Version excluding UK ---
 country_excl_uk_df = country_summary_df[country_summary_df['country'].str.lower() != 'united kingdom']
 
 # 💾 Export international summary
 intl_path = os.path.join(data_export_path, '04_revenue_by_country_excl_uk.csv')
-country_excl_uk_df.to_csv(intl_path, index=False)
-safe_print(f"✅ Exported revenue by country (excluding UK): {intl_path}")
+save_csv_artifact(country_excl_uk_df, intl_path, "✅ Exported revenue by country (excluding UK)")
 
 # 📋 Display top 10 excluding UK
 safe_print("\n📋 Top 10 Countries by Revenue (Excluding UK):")
 display(country_excl_uk_df.head(10))
 
 # 📊 Plot excluding UK
-plt.figure(figsize=(12, 6))
-ax = sns.barplot(
-    data=country_excl_uk_df.head(10),
-    y='country',
-    x='total_revenue',
-    hue='country',  # ✅ Avoid warning
-    legend=False,
-    palette='pastel'
-)
-plt.title("Top 10 Countries by Revenue (Excluding UK)", fontsize=14)
-plt.xlabel("Total Revenue (GBP £)")
-plt.ylabel("Country")
+def draw_country_revenue_excl_uk(country_excl_uk_df):
+    plt.figure(figsize=(12, 6))
+    ax = sns.barplot(
+        data=country_excl_uk_df.head(10),
+        y='country',
+        x='total_revenue',
+        hue='country',  # ✅ Avoid warning
+        legend=False,
+        palette='pastel'
+    )
+    plt.title("Top 10 Countries by Revenue (Excluding UK)", fontsize=14)
+    plt.xlabel("Total Revenue (GBP £)")
+    plt.ylabel("Country")
+
+    # 💬 Add labels
+    for container in ax.containers:
+        ax.bar_label(container, fmt='£%.0f', label_type='edge', padding=5)
 
-# 💬 Add labels
-for container in ax.containers:
-    ax.bar_label(container, fmt='£%.0f', label_type='edge', padding=5)
+    plt.tight_layout()
 
-plt.tight_layout()
 plot_path_intl = os.path.join(plot_export_path, '07_country_revenue_bar_excl_uk.png')
-plt.savefig(plot_path_intl)
-safe_print(f"✅ Saved plot: {plot_path_intl}")
-plt.show()
+render_plot(plot_path_intl, draw_country_revenue_excl_uk, "✅ Saved plot", country_excl_uk_df=country_excl_uk_df)
 
 
 # ---
@@ -1212,7 +1480,7 @@ plot_path = os.path.join(plot_dir, '08_country_avg_behavior_scatter.png')
 
 # 📊 Aggregate by country
 country_behavior = (
-    cleaned_full_df.groupby('country')
+    cleaned_full_df.groupby('country', observed=True)
     .agg(
         num_customers=('customer_id', 'nunique'),
         num_invoices=('invoice_no', 'nunique'),
@@ -1224,37 +1492,37 @@ country_behavior = (
     )
     .sort_values(by='total_revenue', ascending=False)
     .reset_index()
+    .astype({'country': str})  # plain labels so hue colors follow revenue order
 )
 
 # 💾 Save to CSV
-country_behavior.to_csv(data_path, index=False)
-safe_print(f"✅ Exported: {data_path}")
+save_csv_artifact(country_behavior, data_path, "✅ Exported")
 
 # 📋 Display top 10
 safe_print("\n📋 Top 10 Countries by Avg Spend & Frequency:")
 display(country_behavior.head(10))
 
 # 📈 Scatter Plot
-plt.figure(figsize=(10, 6))
-sns.scatterplot(
-    data=country_behavior,
-    x='avg_invoices_per_customer',
-    y='avg_revenue_per_customer',
-    size='total_revenue',
-    hue='country',
-    palette='pastel',
-    legend=False,
-    sizes=(50, 1000)
-)
+def draw_country_behavior(country_behavior):
+    plt.figure(figsize=(10, 6))
+    sns.scatterplot(
+        data=country_behavior,
+        x='avg_invoices_per_customer',
+        y='avg_revenue_per_customer',
+        size='total_revenue',
+        hue='country',
+        palette='pastel',
+        legend=False,
+        sizes=(50, 1000)
+    )
 
-plt.title('Avg Spend vs Purchase Frequency by Country', fontsize=14, weight='bold')
-plt.xlabel('Avg Invoices per Customer')
-plt.ylabel('Avg Revenue per Customer (£)')
-plt.grid(True)
-plt.tight_layout()
-plt.savefig(plot_path)
-safe_print(f"✅ Saved plot: {plot_path}")
-plt.show()
+    plt.title('Avg Spend vs Purchase Frequency by Country', fontsize=14, weight='bold')
+    plt.xlabel('Avg Invoices per Customer')
+    plt.ylabel('Avg Revenue per Customer (£)')
+    plt.grid(True)
+    plt.tight_layout()
+
+render_plot(plot_path, draw_country_behavior, "✅ Saved plot", country_behavior=country_behavior)
 
 
 # ### ❓ Q5: Avg Spend and Purchase Frequency by Country
@@ -1291,6 +1559,9 @@ plt.show()
 # - Count the number of unique `invoice_no` per customer
 # - Classify each as `"Single Purchase"` or `"Repeat Customer"`
 # 
+# 🧊 This section also builds the **customer cube**, one row per customer with first/last purchase, invoice count, revenue and line count.  
+# It takes a single grouped pass over the line items. The average order value, top spender, recency, frequency and RFM sections below are all derived from it.
+# 
 # > 📂 Output:
 # > - Data export: `eda_outputs/data/06_one_time_vs_repeat_customers.csv`  
 # > - Plot export: `eda_outputs/plots/09_one_time_vs_repeat_customers.png`
@@ -1324,13 +1595,20 @@ os.makedirs(plot_dir, exist_ok=True)
 output_csv = os.path.join(data_dir, '06_one_time_vs_repeat_customers.csv')
 output_plot = os.path.join(plot_dir, '09_one_time_vs_repeat_customers.png')
 
+# 🧊 Customer cube: one grouped pass over the line items, shared by every customer section below
+customer_cube = cleaned_full_df.groupby('customer_id').agg(
+    first_purchase=('invoice_date', 'min'),
+    last_purchase=('invoice_date', 'max'),
+    num_invoices=('invoice_no', 'nunique'),
+    total_revenue=('line_revenue', 'sum'),
+    num_lines=('line_revenue', 'size')
+)
+safe_print(f"🧊 Customer cube: {len(customer_cube):,} customers from {len(cleaned_full_df):,} line items")
+
 # 📊 Count unique invoices per customer
 invoice_counts = (
-    cleaned_full_df.groupby('customer_id')
-    .agg(
-        total_invoices=('invoice_no', 'nunique'),
-        total_revenue=('line_revenue', 'sum')
-    )
+    customer_cube[['num_invoices', 'total_revenue']]
+    .rename(columns={'num_invoices': 'total_invoices'})
     .reset_index()
 )
 
@@ -1345,28 +1623,27 @@ summary.columns = ['customer_type', 'count']
 summary['percent'] = (summary['count'] / summary['count'].sum()) * 100
 
 # 💾 Export results
-invoice_counts.to_csv(output_csv, index=False)
-safe_print(f"✅ Exported: {output_csv}")
+save_csv_artifact(invoice_counts, output_csv, "✅ Exported")
 
 # 📊 Display summary
 display(summary)
 
 # 📈 Pie chart
-plt.figure(figsize=(6, 6))
-colors = sns.color_palette('pastel')[0:2]
-plt.pie(
-    summary['count'],
-    labels=summary['customer_type'],
-    autopct='%1.1f%%',
-    colors=colors,
-    startangle=140,
-    textprops={'fontsize': 12}
-)
-plt.title('Customer Breakdown: Single vs Repeat Purchasers', fontsize=14, weight='bold')
-plt.tight_layout()
-plt.savefig(output_plot)
-safe_print(f"✅ Saved plot: {output_plot}")
-plt.show()
+def draw_customer_types(summary):
+    plt.figure(figsize=(6, 6))
+    colors = sns.color_palette('pastel')[0:2]
+    plt.pie(
+        summary['count'],
+        labels=summary['customer_type'],
+        autopct='%1.1f%%',
+        colors=colors,
+        startangle=140,
+        textprops={'fontsize': 12}
+    )
+    plt.title('Customer Breakdown: Single vs Repeat Purchasers', fontsize=14, weight='bold')
+    plt.tight_layout()
+
+render_plot(output_plot, draw_customer_types, "✅ Saved plot", summary=summary)
 
 
 # ---
@@ -1444,22 +1721,15 @@ plot_path = os.path.join(plot_dir, '10_avg_order_value_distribution.png')  # adj
 
 # 📊 Compute average order value per customer
 avg_order_df = (
-    cleaned_full_df.groupby(['customer_id', 'invoice_no'])['line_revenue']
-    .sum()
-    .reset_index()
-    .groupby('customer_id')
-    .agg(
-        total_spent=('line_revenue', 'sum'),
-        num_orders=('invoice_no', 'nunique')
-    )
+    customer_cube[['total_revenue', 'num_invoices']]
+    .rename(columns={'total_revenue': 'total_spent', 'num_invoices': 'num_orders'})
     .assign(avg_order_value=lambda df: df['total_spent'] / df['num_orders'])
     .sort_values(by='avg_order_value', ascending=False)
     .reset_index()
 )
 
 # 💾 Save summary table
-avg_order_df.to_csv(export_path, index=False)
-safe_print(f"✅ Exported: {export_path}")
+save_csv_artifact(avg_order_df, export_path, "✅ Exported")
 
 # 📋 Show top 10
 safe_print("\n📋 Top 10 Customers by Avg Order Value:")
@@ -1472,25 +1742,24 @@ safe_print("\n📋 Frequency Table for Avg Order Value:")
 display(freq_raw)
 
 # 🎨 Plot: Histogram and Boxplot
-fig, axes = plt.subplots(1, 2, figsize=(16, 6))
-fig.suptitle("Average Order Value per Customer", fontsize=16, weight="bold")
+def draw_avg_order_value(avg_order_df):
+    fig, axes = plt.subplots(1, 2, figsize=(16, 6))
+    fig.suptitle("Average Order Value per Customer", fontsize=16, weight="bold")
 
-# Histogram
-sns.histplot(avg_order_df['avg_order_value'], bins=100, ax=axes[0], color='mediumaquamarine')
-axes[0].set_title("Histogram of Avg Order Value")
-axes[0].set_xlabel("Avg Order Value (£)")
-axes[0].set_ylabel("Number of Customers")
+    # Histogram
+    sns.histplot(avg_order_df['avg_order_value'], bins=100, ax=axes[0], color='mediumaquamarine')
+    axes[0].set_title("Histogram of Avg Order Value")
+    axes[0].set_xlabel("Avg Order Value (£)")
+    axes[0].set_ylabel("Number of Customers")
 
-# Boxplot
-sns.boxplot(x=avg_order_df['avg_order_value'], ax=axes[1], color='lightgray')
-axes[1].set_title("Boxplot of Avg Order Value")
-axes[1].set_xlabel("Avg Order Value (£)")
+    # Boxplot
+    sns.boxplot(x=avg_order_df['avg_order_value'], ax=axes[1], color='lightgray')
+    axes[1].set_title("Boxplot of Avg Order Value")
+    axes[1].set_xlabel("Avg Order Value (£)")
 
-# Save and show
-plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-plt.savefig(plot_path)
-safe_print(f"\n✅ Saved plot: {plot_path}")
-plt.show()
+    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+
+render_plot(plot_path, draw_avg_order_value, "\n✅ Saved plot", avg_order_df=avg_order_df)
 
 
 # ---
@@ -1601,11 +1870,8 @@ plot_output_path = os.path.join(plot_dir, '11_top_customers_by_total_spend.png')
 
 # 🧮 Top spenders calculation
 top_spenders_df = (
-    cleaned_full_df.groupby('customer_id')
-    .agg(
-        total_spent=('line_revenue', 'sum'),
-        num_orders=('invoice_no', 'nunique')
-    )
+    customer_cube[['total_revenue', 'num_invoices']]
+    .rename(columns={'total_revenue': 'total_spent', 'num_invoices': 'num_orders'})
     .assign(avg_order_value=lambda df: df['total_spent'] / df['num_orders'])
     .sort_values(by='total_spent', ascending=False)
     .reset_index()
@@ -1613,30 +1879,29 @@ top_spenders_df = (
 )
 
 # 💾 Save data
-top_spenders_df.to_csv(data_output_path, index=False)
-safe_print(f"✅ Exported: {data_output_path}")
+save_csv_artifact(top_spenders_df, data_output_path, "✅ Exported")
 
 # 📋 Display
 safe_print("\n📋 Top 10 Customers by Total Spend:")
 display(top_spenders_df)
 
 # 🎨 Plot using Matplotlib directly (avoid seaborn’s layout bloat)
-fig, ax = plt.subplots(figsize=(10, 6))
-sorted_df = top_spenders_df.sort_values(by='total_spent')  # Plot from lowest to highest for horizontal bars
+def draw_top_spenders(top_spenders_df):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sorted_df = top_spenders_df.sort_values(by='total_spent')  # Plot from lowest to highest for horizontal bars
 
-ax.barh(sorted_df['customer_id'].astype(str), sorted_df['total_spent'], color='lightblue')
-ax.set_xlabel('Total Spend (GBP £)')
-ax.set_ylabel('Customer ID')
-ax.set_title('Top 10 Customers by Total Spend', fontsize=14, weight='bold')
+    ax.barh(sorted_df['customer_id'].astype(str), sorted_df['total_spent'], color='lightblue')
+    ax.set_xlabel('Total Spend (GBP £)')
+    ax.set_ylabel('Customer ID')
+    ax.set_title('Top 10 Customers by Total Spend', fontsize=14, weight='bold')
 
-# 💬 Annotate bars
-for i, value in enumerate(sorted_df['total_spent']):
-    ax.text(value + 1000, i, f"£{value:,.0f}", va='center', fontsize=9)
+    # 💬 Annotate bars
+    for i, value in enumerate(sorted_df['total_spent']):
+        ax.text(value + 1000, i, f"£{value:,.0f}", va='center', fontsize=9)
 
-plt.tight_layout()
-plt.savefig(plot_output_path)
-safe_print(f"✅ Saved plot: {plot_output_path}")
-plt.show()
+    plt.tight_layout()
+
+render_plot(plot_output_path, draw_top_spenders, "✅ Saved plot", top_spenders_df=top_spenders_df)
 
 
 # 
@@ -1740,16 +2005,15 @@ reference_date = cleaned_full_df['invoice_date'].max()
 
 # 🧮 Calculate recency per customer
 recency_df = (
-    cleaned_full_df.groupby('customer_id')['invoice_date']
-    .max()
+    customer_cube['last_purchase']
+    .rename('invoice_date')
     .reset_index()
     .assign(recency_days=lambda df: (reference_date - df['invoice_date']).dt.days)
     .sort_values(by='recency_days')
 )
 
 # 💾 Save to CSV
-recency_df.to_csv(recency_csv, index=False)
-safe_print(f"✅ Exported: {recency_csv}")
+save_csv_artifact(recency_df, recency_csv, "✅ Exported")
 
 # 📋 Show first and last 5 rows for context
 safe_print("\n📋 Sample Customers by Recency (Top & Bottom):")
@@ -1757,25 +2021,25 @@ display(recency_df.head(5))
 display(recency_df.tail(5))
 
 # 🎨 Plot distribution
-plt.figure(figsize=(14, 5))
+def draw_recency(recency_df):
+    plt.figure(figsize=(14, 5))
+
+    # Histogram
+    plt.subplot(1, 2, 1)
+    sns.histplot(recency_df['recency_days'], bins=40, kde=False, color='skyblue')
+    plt.title("Distribution of Customer Recency")
+    plt.xlabel("Days Since Last Purchase")
+    plt.ylabel("Number of Customers")
 
-# Histogram
-plt.subplot(1, 2, 1)
-sns.histplot(recency_df['recency_days'], bins=40, kde=False, color='skyblue')
-plt.title("Distribution of Customer Recency")
-plt.xlabel("Days Since Last Purchase")
-plt.ylabel("Number of Customers")
+    # Boxplot
+    plt.subplot(1, 2, 2)
+    sns.boxplot(x=recency_df['recency_days'], color='lightgray')
+    plt.title("Boxplot of Customer Recency")
+    plt.xlabel("Days Since Last Purchase")
 
-# Boxplot
-plt.subplot(1, 2, 2)
-sns.boxplot(x=recency_df['recency_days'], color='lightgray')
-plt.title("Boxplot of Customer Recency")
-plt.xlabel("Days Since Last Purchase")
+    plt.tight_layout()
 
-plt.tight_layout()
-plt.savefig(recency_plot)
-safe_print(f"✅ Saved plot: {recency_plot}")
-plt.show()
+render_plot(recency_plot, draw_recency, "✅ Saved plot", recency_df=recency_df)
 
 
 # ---
@@ -1868,19 +2132,15 @@ plot_path = os.path.join(plot_dir, '13_customer_frequency_distribution.png')
 
 # 📊 Calculate customer frequency
 frequency_df = (
-    cleaned_full_df.groupby('customer_id')
-    .agg(
-        num_orders=('invoice_no', 'nunique'),
-        total_spent=('line_revenue', 'sum')
-    )
+    customer_cube[['num_invoices', 'total_revenue']]
+    .rename(columns={'num_invoices': 'num_orders', 'total_revenue': 'total_spent'})
     .assign(avg_order_value=lambda df: df['total_spent'] / df['num_orders'])
     .sort_values(by='num_orders', ascending=False)
     .reset_index()
 )
 
 # 💾 Export CSV
-frequency_df.to_csv(export_path, index=False)
-safe_print(f"✅ Exported: {export_path}")
+save_csv_artifact(frequency_df, export_path, "✅ Exported")
 
 # 📋 Show sample customers (top & bottom)
 safe_print("\n📋 Sample Customers by Frequency (Top & Bottom):")
@@ -1897,25 +2157,24 @@ safe_print("\n📋 Frequency Table for Number of Orders:")
 display(freq_table)
 
 # 🎨 Plot histogram and boxplot
-fig, axes = plt.subplots(1, 2, figsize=(16, 5))
-fig.suptitle("Customer Purchase Frequency", fontsize=18, weight="bold")
+def draw_frequency(frequency_df, counts, bin_edges):
+    fig, axes = plt.subplots(1, 2, figsize=(16, 5))
+    fig.suptitle("Customer Purchase Frequency", fontsize=18, weight="bold")
 
-# Histogram (manual bar plot)
-axes[0].bar(x=bin_edges[:-1], height=counts, width=np.diff(bin_edges), color='skyblue', align='edge', edgecolor='gray')
-axes[0].set_title("Distribution of Purchase Frequency")
-axes[0].set_xlabel("Number of Orders")
-axes[0].set_ylabel("Number of Customers")
+    # Histogram (manual bar plot)
+    axes[0].bar(x=bin_edges[:-1], height=counts, width=np.diff(bin_edges), color='skyblue', align='edge', edgecolor='gray')
+    axes[0].set_title("Distribution of Purchase Frequency")
+    axes[0].set_xlabel("Number of Orders")
+    axes[0].set_ylabel("Number of Customers")
 
-# Boxplot
-sns.boxplot(x=frequency_df['num_orders'], ax=axes[1], color='lightgray')
-axes[1].set_title("Boxplot of Purchase Frequency")
-axes[1].set_xlabel("Number of Orders")
+    # Boxplot
+    sns.boxplot(x=frequency_df['num_orders'], ax=axes[1], color='lightgray')
+    axes[1].set_title("Boxplot of Purchase Frequency")
+    axes[1].set_xlabel("Number of Orders")
 
-# Save and show
-plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-plt.savefig(plot_path)
-safe_print(f"✅ Saved plot: {plot_path}")
-plt.show()
+    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
+
+render_plot(plot_path, draw_frequency, "✅ Saved plot", frequency_df=frequency_df, counts=counts, bin_edges=bin_edges)
 
 
 # ---
@@ -1958,6 +2217,9 @@ plt.show()
 # - Sum the `line_revenue` per customer to compute total spend
 # - Sort to identify **top-spending users**
 # 
+# 🗂️ The per-customer totals come from the Q10 frequency table, which is taken from the in-process **artifact registry** rather than re-read from `10_customer_frequency.csv`.  
+# CSV exports are written on a background thread, and the last cell waits for them to finish.
+# 
 # > 📂 Outputs:
 # > - Data export: `11_customer_monetary_value.csv`
 # > - Plot export: `14_customer_monetary_value_distribution.png`
@@ -2000,16 +2262,15 @@ os.makedirs(plot_dir, exist_ok=True)
 export_path = os.path.join(data_dir, '11_customer_monetary_value.csv')
 plot_path = os.path.join(plot_dir, '14_customer_monetary_value_distribution.png')
 
-# 📥 Load frequency data
+# 📥 Frequency table from the previous section (in memory, no CSV round-trip)
 frequency_path = os.path.join(data_dir, '10_customer_frequency.csv')
-frequency_df = pd.read_csv(frequency_path)
+frequency_df = get_artifact(frequency_path)
 
 # ✅ Sort by total_spent descending
 frequency_df = frequency_df.sort_values(by='total_spent', ascending=False).reset_index(drop=True)
 
 # 💾 Save again under monetary value filename (for consistency)
-frequency_df.to_csv(export_path, index=False)
-safe_print(f"✅ Exported: {export_path}")
+save_csv_artifact(frequency_df, export_path, "✅ Exported")
 
 # 📋 Show sample rows
 safe_print("\n📋 Sample Customers by Monetary Value (Top & Bottom):")
@@ -2024,25 +2285,24 @@ safe_print("\n📋 Frequency Table for Total Spend:")
 display(freq_table.to_frame())
 
 # 🎨 Plot histogram and boxplot
-fig, axes = plt.subplots(1, 2, figsize=(16, 5))
-fig.suptitle("Customer Monetary Value", fontsize=18, weight="bold")
+def draw_monetary(frequency_df, bin_edges):
+    fig, axes = plt.subplots(1, 2, figsize=(16, 5))
+    fig.suptitle("Customer Monetary Value", fontsize=18, weight="bold")
+
+    # Histogram
+    sns.histplot(frequency_df['total_spent'], bins=bin_edges, ax=axes[0], color='mediumseagreen')
+    axes[0].set_title("Distribution of Total Spend")
+    axes[0].set_xlabel("Total Spend (£)")
+    axes[0].set_ylabel("Number of Customers")
 
-# Histogram
-sns.histplot(frequency_df['total_spent'], bins=bin_edges, ax=axes[0], color='mediumseagreen')
-axes[0].set_title("Distribution of Total Spend")
-axes[0].set_xlabel("Total Spend (£)")
-axes[0].set_ylabel("Number of Customers")
+    # Boxplot
+    sns.boxplot(x=frequency_df['total_spent'], ax=axes[1], color='lightgray')
+    axes[1].set_title("Boxplot of Total Spend")
+    axes[1].set_xlabel("Total Spend (£)")
 
-# Boxplot
-sns.boxplot(x=frequency_df['total_spent'], ax=axes[1], color='lightgray')
-axes[1].set_title("Boxplot of Total Spend")
-axes[1].set_xlabel("Total Spend (£)")
+    plt.tight_layout(rect=[0, 0.03, 1, 0.95])
 
-# Save and show plot
-plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-plt.savefig(plot_path)
-safe_print(f"✅ Saved plot: {plot_path}")
-plt.show()
+render_plot(plot_path, draw_monetary, "✅ Saved plot", frequency_df=frequency_df, bin_edges=bin_edges)
 
 
 # ---
@@ -2095,6 +2355,9 @@ plt.show()
 # | 🔵 One-Time Buyer| Frequency = 1                   |
 # | ⚪ Other         | Doesn't meet any specific group |
 # 
+# ⚙️ The exact rules live in the `RFM_SEGMENT_RULES` table, which is checked top to bottom with the first match winning.  
+# `score_rfm` applies the table to every customer at once with array operations, so segmentation stays fast on very large customer bases.
+# 
 # > 📂 Outputs:
 # > - Data export: `12_rfm_segmented_customers.csv`  
 # > - Plot export: `15_rfm_segment_distribution.png`
@@ -2128,56 +2391,56 @@ import numpy as np
 import os
 
 # ✅ Paths
-recency_csv = os.path.join(data_dir, '09_customer_recency.csv')  # from Q9
 export_path = os.path.join(data_dir, '12_rfm_segmented_customers.csv')
 plot_path = os.path.join(plot_dir, '15_rfm_segment_distribution.png')
 
-# 📥 Load precomputed recency table
-recency_df = pd.read_csv(recency_csv)
-
-# 🧮 Compute frequency and monetary from original data
-rfm_base = (
-    cleaned_full_df.groupby('customer_id')
-    .agg(
-        frequency=('invoice_no', 'nunique'),
-        monetary=('line_revenue', 'sum')
-    )
+# 🧮 Frequency, monetary and recency straight from the customer cube (same reference date as Q9)
+rfm_df = (
+    customer_cube
+    .assign(recency=lambda df: (reference_date - df['last_purchase']).dt.days)
+    [['num_invoices', 'total_revenue', 'recency']]
+    .rename(columns={'num_invoices': 'frequency', 'total_revenue': 'monetary'})
     .reset_index()
 )
 
-# 🔗 Merge with recency
-rfm_df = pd.merge(rfm_base, recency_df[['customer_id', 'recency_days']], on='customer_id')
-rfm_df.rename(columns={'recency_days': 'recency'}, inplace=True)
-
-# 🏷️ RFM Scoring (quartiles)
-rfm_df['R'] = pd.qcut(rfm_df['recency'], 4, labels=[4, 3, 2, 1]).astype(int)
-rfm_df['F'] = pd.qcut(rfm_df['frequency'].rank(method='first'), 4, labels=[1, 2, 3, 4]).astype(int)
-rfm_df['M'] = pd.qcut(rfm_df['monetary'], 4, labels=[1, 2, 3, 4]).astype(int)
-
-# 🧮 RFM Score
-rfm_df['RFM_Score'] = rfm_df[['R', 'F', 'M']].sum(axis=1)
-
-# 🧠 Assign RFM Segment
-def assign_segment(row):
-    if row['RFM_Score'] >= 9:
-        return 'High-Value'
-    elif row['R'] >= 3 and row['F'] >= 3:
-        return 'Loyal'
-    elif row['R'] == 1:
-        return 'At-Risk'
-    elif row['F'] == 1 and row['M'] == 1:
-        return 'One-Time'
-    else:
-        return 'Other'
-
-rfm_df['Segment'] = rfm_df.apply(assign_segment, axis=1)
+# 🏷️ RFM segment rules, checked top to bottom (first match wins).
+# Each rule lists inclusive (low, high) bounds on the scores it constrains.
+RFM_SEGMENT_RULES = [
+    ('High-Value', {'RFM_Score': (9, 12)}),
+    ('Loyal',      {'R': (3, 4), 'F': (3, 4)}),
+    ('At-Risk',    {'R': (1, 1)}),
+    ('One-Time',   {'F': (1, 1), 'M': (1, 1)}),
+]
+RFM_DEFAULT_SEGMENT = 'Other'
+
+def score_rfm(rfm_df):
+    """
+    Add quartile R/F/M scores (1 = lowest, 4 = highest), RFM_Score and Segment
+    to a frame with recency, frequency and monetary columns, using whole-column
+    operations only (no per-customer Python loop).
+    """
+    rfm_df['R'] = 4 - pd.qcut(rfm_df['recency'], 4, labels=False)
+    rfm_df['F'] = pd.qcut(rfm_df['frequency'].rank(method='first'), 4, labels=False) + 1
+    rfm_df['M'] = pd.qcut(rfm_df['monetary'], 4, labels=False) + 1
+    rfm_df['RFM_Score'] = rfm_df['R'] + rfm_df['F'] + rfm_df['M']
+
+    scores = {col: rfm_df[col].to_numpy() for col in ['R', 'F', 'M', 'RFM_Score']}
+    conditions = [
+        np.logical_and.reduce([(scores[col] >= low) & (scores[col] <= high) for col, (low, high) in bounds.items()])
+        for _, bounds in RFM_SEGMENT_RULES
+    ]
+    labels = np.array([segment for segment, _ in RFM_SEGMENT_RULES] + [RFM_DEFAULT_SEGMENT], dtype=object)
+    rfm_df['Segment'] = labels[np.select(conditions, np.arange(len(RFM_SEGMENT_RULES)), default=len(RFM_SEGMENT_RULES))]
+    return rfm_df
+
+# 🧠 RFM scores (quartiles) and segments
+rfm_df = score_rfm(rfm_df)
 
 # 💾 Export CSV
-rfm_df.to_csv(export_path, index=False)
-safe_print(f"✅ Exported: {export_path}")
+save_csv_artifact(rfm_df, export_path, "✅ Exported")
 
 # ✅ Show a sample of the exported RFM scores
-rfm_preview = pd.read_csv(export_path)
+rfm_preview = get_artifact(export_path)
 safe_print("\n📋 Sample of RFM Score Table:")
 display(rfm_preview.head(10))  # or .sample(10) for randomness
 
@@ -2187,22 +2450,22 @@ segment_counts = rfm_df['Segment'].value_counts().sort_values(ascending=False)
 display(segment_counts)
 
 # 🎨 Plot: Segment Distribution (fixes future warning)
-plt.figure(figsize=(10, 6))
-sns.barplot(
-    x=segment_counts.index,
-    y=segment_counts.values,
-    hue=segment_counts.index,  # required for palette to apply
-    palette='Set2',
-    legend=False  # disables auto-legend
-)
-plt.title("Customer Segments Based on RFM Scores", fontsize=16, weight="bold")
-plt.xlabel("RFM Segment")
-plt.ylabel("Number of Customers")
-plt.xticks(rotation=30)
-plt.tight_layout()
-plt.savefig(plot_path)
-safe_print(f"✅ Saved plot: {plot_path}")
-plt.show()
+def draw_rfm_segments(segment_counts):
+    plt.figure(figsize=(10, 6))
+    sns.barplot(
+        x=segment_counts.index,
+        y=segment_counts.values,
+        hue=segment_counts.index,  # required for palette to apply
+        palette='Set2',
+        legend=False  # disables auto-legend
+    )
+    plt.title("Customer Segments Based on RFM Scores", fontsize=16, weight="bold")
+    plt.xlabel("RFM Segment")
+    plt.ylabel("Number of Customers")
+    plt.xticks(rotation=30)
+    plt.tight_layout()
+
+render_plot(plot_path, draw_rfm_segments, "✅ Saved plot", segment_counts=segment_counts)
 
 
 # ---
@@ -2300,6 +2563,12 @@ plt.show()
 # In[20]:
 
 
+# ⏳ Wait for the background CSV writes to reach disk
+wait_for_csv_writes(shutdown=True)  # no threads may be running when the plot workers are forked
+
+# 🖼️ Render the figures queued by the sections above (headless runs only)
+render_queued_plots()
+
 # ✅ Optional script execution indicator for CLI use
 if __name__ == "__main__":
     safe_print("📊 EDA script executed directly as a .py file — all analysis steps and exports have been completed.")
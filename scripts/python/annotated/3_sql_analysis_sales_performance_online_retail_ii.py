@@ -230,6 +230,11 @@ else:
 # 
 # > 💡 `cleaned_online_retail_II.csv` is not used in this notebook.
 # 
+# 🧬 Each table is cast to the **central schema** shared with the cleaning and EDA notebooks (categoricals, compact integers and Arrow-backed strings).  
+# A memory report is printed for every table.
+# 
+# 🗃️ The Parquet copies under `cleaned_data/parquet/` are preferred when present. Only the columns used by the queries are read, and `INVOICE_MONTHS` can restrict invoices and line items to a range of months.
+# 
 
 # In[ ]:
 
@@ -245,12 +250,111 @@ products_path = os.path.join(clean_path, 'products.csv')
 invoices_path = os.path.join(clean_path, 'invoices.csv')
 invoice_items_path = os.path.join(clean_path, 'invoice_items.csv')
 
-# 📥 Load the relational datasets with error handling
+# 🗃️ Prefer the Parquet copies written by the cleaning script (Step 23b); fall back to .csv
+USE_PARQUET = True
+INVOICE_MONTHS = None  # e.g. ('2010-01', '2010-12') to load only those invoice months
+parquet_path = os.path.join(clean_path, 'parquet')
+
+if USE_PARQUET:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        USE_PARQUET = False
+        safe_print("⚠️ pyarrow not installed – reading the .csv files.")
+
+# 🔎 Pushdown filters for INVOICE_MONTHS: whole partitions on invoice_month, row groups on a date column
+def invoice_month_filters(column):
+    if INVOICE_MONTHS is None:
+        return None
+    first, last = INVOICE_MONTHS
+    if column == 'invoice_month':
+        return [('invoice_month', '>=', first), ('invoice_month', '<=', last)]
+    return [(column, '>=', pd.Timestamp(first)), (column, '<', pd.Timestamp(last) + pd.offsets.MonthBegin(1))]
+
+# 📥 Read one cleaned table with column projection: Parquet file/dataset when present, otherwise .csv
+def read_cleaned_table(name, columns, filter_column=None, parse_dates=None):
+    import time
+
+    start = time.perf_counter()
+    parquet_source = next(
+        (path for path in (os.path.join(parquet_path, name), os.path.join(parquet_path, f"{name}.parquet"))
+         if os.path.exists(path)),
+        None
+    )
+    if USE_PARQUET and parquet_source:
+        filters = invoice_month_filters(filter_column) if filter_column else None
+        df = pd.read_parquet(parquet_source, columns=columns, filters=filters)
+        source = os.path.relpath(parquet_source, clean_path)
+    else:
+        source = f"{name}.csv"
+        df = pd.read_csv(os.path.join(clean_path, source), usecols=columns, parse_dates=parse_dates)[columns]
+        if filter_column and INVOICE_MONTHS is not None:
+            if 'invoice_date' in df.columns:
+                months = df['invoice_date'].dt.strftime('%Y-%m')
+                df = df[months.between(*INVOICE_MONTHS)].reset_index(drop=True)
+            else:
+                safe_print(f"⚠️ INVOICE_MONTHS needs the Parquet dataset for {name} – all months loaded.")
+    safe_print(f"⏱️ Loaded {source} in {time.perf_counter() - start:.2f}s")
+    return df
+
+# 🧬 Central schema for the cleaned Online Retail II columns (shared with the cleaning and EDA scripts)
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    STRING_DTYPE = 'object'
+
+RETAIL_SCHEMA = {
+    'invoice_no': STRING_DTYPE,
+    'stock_code': 'category',
+    'description': 'category',
+    'quantity': 'int32',
+    'invoice_date': 'datetime64[ns]',
+    'unit_price': 'float64',
+    'customer_id': 'int32',
+    'country': 'category',
+    'line_revenue': 'float64'
+}
+
+# 🧬 Cast known columns to their compact schema dtypes (other columns are left untouched)
+def apply_retail_schema(df):
+    return df.astype({col: dtype for col, dtype in RETAIL_SCHEMA.items() if col in df.columns})
+
+# 📏 Per-column memory footprint before and after applying the schema
+def memory_footprint_report(before_df, after_df, name="Dataset"):
+    report = pd.DataFrame({
+        'dtype_before': before_df.dtypes.astype(str),
+        'mb_before': before_df.memory_usage(deep=True, index=False) / 1e6,
+        'dtype_after': after_df.dtypes.astype(str),
+        'mb_after': after_df.memory_usage(deep=True, index=False) / 1e6
+    })
+    report['saved_pct'] = (1 - report['mb_after'] / report['mb_before']) * 100
+    total_before, total_after = report['mb_before'].sum(), report['mb_after'].sum()
+
+    safe_print(f"📏 Memory footprint for {name}:")
+    safe_print(report.round(2).to_string())
+    safe_print(f"🧮 Total: {total_before:,.2f} MB → {total_after:,.2f} MB "
+               f"({(1 - total_after / total_before) * 100:.1f}% saved)")
+
+# 📥 Load a relational table and cast it to the central schema
+def load_table(name, columns, **read_kwargs):
+    raw_df = read_cleaned_table(name, columns, **read_kwargs)
+    typed_df = apply_retail_schema(raw_df)
+    memory_footprint_report(raw_df, typed_df, name=f"{name}.csv")
+    return typed_df
+
+# 📥 Load the relational datasets with error handling (INVOICE_MONTHS restricts invoices and items only)
 try:
-    customers_df = pd.read_csv(customers_path)
-    products_df = pd.read_csv(products_path)
-    invoices_df = pd.read_csv(invoices_path, parse_dates=['invoice_date'])
-    invoice_items_df = pd.read_csv(invoice_items_path)
+    customers_df = load_table('customers', ['customer_id', 'country'])
+    products_df = load_table('products', ['stock_code', 'description', 'unit_price'])
+    invoices_df = load_table(
+        'invoices', ['invoice_no', 'invoice_date', 'customer_id'],
+        filter_column='invoice_date', parse_dates=['invoice_date']
+    )
+    invoice_items_df = load_table(
+        'invoice_items', ['invoice_no', 'stock_code', 'quantity', 'unit_price', 'line_revenue'],
+        filter_column='invoice_month'
+    )
 
     safe_print("✅ All normalized relational tables loaded successfully.")
     safe_print(f"📄 customers.csv → {customers_df.shape}")
@@ -363,7 +467,7 @@ preview_table(invoice_items_df, name="invoice_items.csv")
 # 
 # ## 🗃️ Step 4: Create SQLite Schema & Load Data
 # 
-# To execute SQL queries on our cleaned datasets, we now create a temporary **in-memory SQLite database** using `SQLAlchemy`.  
+# To execute SQL queries on our cleaned datasets, we now create a **persistent SQLite database** (`data/cache/online_retail_ii_analytics.sqlite`) using `SQLAlchemy`.  
 # 
 # Each `.csv` file is loaded into a corresponding SQL table:
 # 
@@ -376,25 +480,450 @@ preview_table(invoice_items_df, name="invoice_items.csv")
 # 
 # This relational schema allows us to write SQL queries that join across customer, product, invoice, and item-level data.
 # 
+# The database is built with primary keys, indexes on the join and filter columns (`invoice_items.invoice_no`, `invoice_items.stock_code`, `invoices(customer_id, invoice_date)`) and `ANALYZE` statistics for the query planner.  
+# It records a fingerprint of the loaded tables, so later runs on unchanged data simply attach to it instead of reloading everything.  
+# `customers` uses the composite key `(customer_id, country)`, because a few customers appear under more than one country.  
+# Set `PERSISTENT_SQL_DB = False` to fall back to a throwaway in-memory database.  
+# Money totals are added up as exact whole thousandths of a pound (`SUM(ROUND(line_revenue * 1000)) / 1000.0`), the finest unit a price uses (PADS sells at £0.001). A float `SUM(line_revenue)` depends on the order the rows are read in, which the keys and indexes change, and it could flip an average that lands on a half cent.
+# 
+# Tables are loaded by a bulk loader rather than `DataFrame.to_sql`: the whole build runs in a single transaction, each table is inserted with one prepared `executemany` over per-column value arrays, and `journal_mode`, `synchronous` and `cache_size` are tuned for the load and restored afterwards. The load speed (rows/s) is printed for every table.  
+# The stored values are the same as with `to_sql` (datetimes as text, missing values as `NULL`); set `BULK_SQLITE_LOAD = False` to use `to_sql` instead.
+# 
+# **Query engine.** `SQL_ENGINE = 'duckdb'` runs the same twelve queries on **DuckDB**, an embedded columnar engine, instead of SQLite. DuckDB scans the frames loaded from `cleaned_data/` in place, so there is no load step, and its multi-threaded scans and aggregations pay off on the full dataset.  
+# The queries stay in SQLite syntax. Small adapters translate `strftime` and use SQLite's own `round()`, and the results are returned with the same types as `pd.read_sql`.  
+# Both engines round revenue from the same exact sums of thousandths, so they write the same CSVs. Float sums would depend on how each engine orders and splits the rows, and they flipped averages on a half cent in Q5, Q10 and Q11.  
+# Every `ORDER BY` ends with a unique column, so ties come back in the same order on both engines.
+# 
+# `SQL_ENGINE = 'mysql'` runs the queries on the MySQL database loaded by `4_mysql_real_env_setup`, with the credentials from `config/mysql_credentials.env`. The connections come from a pool of `QUERY_WORKERS`, the `MySQLPool` that script uses too (`scripts/python/mysql_pool_online_retail_ii.py`). Each query checks out a connection and returns it afterwards, and the pool's stats are printed after the query timings.  
+# Nothing is created there: each query that reads `fact_sales` defines it as a CTE over the loaded tables. The adapters rewrite `strftime` into `DATE_FORMAT`/`TIMESTAMPDIFF`, the recency query's division of seconds into days into `DIV` and `CAST(... AS INTEGER)` into `SIGNED`. MySQL adds up the same exact cent sums but divides them in `DECIMAL`, so only an average within about 1e-8 of a half cent could round differently.
+# 
 # ---
 # 
 
 # In[ ]:
 
 
+import re
 import sqlite3
-from sqlalchemy import create_engine
+import hashlib
+import threading
+import time
+from contextlib import closing
+from decimal import Decimal
+from sqlalchemy import create_engine, text
+
+# 🦆 Query engine for the business questions below:
+# 'sqlite' loads the tables into the indexed SQLite database built in this cell;
+# 'duckdb' runs the same SQLite-dialect queries on the embedded columnar engine DuckDB,
+# scanning the frames loaded from cleaned_data in place (no load step, multi-threaded scans);
+# 'mysql' runs them on the MySQL database loaded by 4_mysql_real_env_setup (credentials from
+# config/mysql_credentials.env), over a pool of QUERY_WORKERS connections.
+# SQLite and DuckDB write the same CSVs (SQLite suits small extracts, DuckDB the full dataset): both round revenue
+# from the same exact sums of thousandths, with SQLite's round().
+SQL_ENGINE = 'sqlite'  # 'sqlite', 'duckdb' or 'mysql'
+
+if SQL_ENGINE == 'duckdb':
+    try:
+        import duckdb
+    except ImportError:
+        SQL_ENGINE = 'sqlite'
+        safe_print("⚠️ duckdb not installed – using the SQLite engine.")
+elif SQL_ENGINE == 'mysql':
+    try:
+        sys.path.insert(0, os.path.join(project_base_path, 'scripts', 'python'))
+        from mysql_pool_online_retail_ii import MySQLPool  # the pool shared with 4_mysql_real_env_setup
+    except ImportError:
+        SQL_ENGINE = 'sqlite'
+        safe_print("⚠️ mysql-connector-python not installed – using the SQLite engine.")
+
+# 🗄️ Persistent analytics database: built once with keys, indexes and planner statistics,
+# then reused by later runs as long as the loaded tables are unchanged
+PERSISTENT_SQL_DB = True  # Set to False to rebuild a throwaway in-memory database every run
+SQL_DB_SCHEMA_VERSION = 3
+analytics_db_path = os.path.join(project_base_path, 'data', 'cache', 'online_retail_ii_analytics.sqlite')
+
+# 🧱 Column types match what DataFrame.to_sql creates; keys and indexes serve the joins below
+ANALYTICS_SCHEMA = [
+    """CREATE TABLE customers (
+        customer_id INTEGER NOT NULL,
+        country TEXT NOT NULL,
+        PRIMARY KEY (customer_id, country)
+    )""",
+    """CREATE TABLE products (
+        stock_code TEXT PRIMARY KEY,
+        description TEXT,
+        unit_price FLOAT
+    )""",
+    """CREATE TABLE invoices (
+        invoice_no TEXT PRIMARY KEY,
+        invoice_date DATETIME,
+        customer_id INTEGER
+    )""",
+    """CREATE TABLE invoice_items (
+        invoice_no TEXT,
+        stock_code TEXT,
+        quantity INTEGER,
+        unit_price FLOAT,
+        line_revenue FLOAT
+    )""",
+]
+
+# 🧮 Line-level fact table: invoice_items joined once with invoices and customers, so the business
+# questions scan one denormalized table instead of repeating the three-way join in every query.
+# fact_sales_joined is the same join as a view; RUN_FACT_BENCHMARK times each query against both.
+FACT_SALES_JOIN = """
+    SELECT ii.invoice_no, i.invoice_date, c.customer_id, c.country,
+           ii.stock_code, ii.quantity, ii.unit_price, ii.line_revenue
+    FROM customers AS c
+    JOIN invoices AS i ON c.customer_id = i.customer_id
+    JOIN invoice_items AS ii ON i.invoice_no = ii.invoice_no"""
+# Rows are stored clustered by customer and invoice date, so the per-customer questions read contiguous pages.
+# The layout does not affect any result: money totals are exact sums of thousandths (see the Q1 cell), whatever the row order.
+FACT_SALES_ORDER = """
+    ORDER BY c.customer_id, i.invoice_date"""
+FACT_SALES_SQL = [
+    """CREATE TABLE fact_sales (
+        invoice_no TEXT,
+        invoice_date DATETIME,
+        customer_id INTEGER,
+        country TEXT,
+        stock_code TEXT,
+        quantity INTEGER,
+        unit_price DOUBLE,
+        line_revenue DOUBLE
+    )""",
+    "INSERT INTO fact_sales" + FACT_SALES_JOIN + FACT_SALES_ORDER,
+    "CREATE VIEW fact_sales_joined AS" + FACT_SALES_JOIN,
+]
+RUN_FACT_BENCHMARK = False  # Also time every fact_sales query against the three-way join it replaces
+
+ANALYTICS_INDEXES = [
+    "CREATE INDEX idx_invoice_items_invoice_no ON invoice_items (invoice_no)",
+    "CREATE INDEX idx_invoice_items_stock_code ON invoice_items (stock_code)",
+    "CREATE INDEX idx_invoices_customer_date ON invoices (customer_id, invoice_date)",
+    "CREATE INDEX idx_fact_sales_customer ON fact_sales (customer_id)",
+    "CREATE INDEX idx_fact_sales_country ON fact_sales (country)",
+    "CREATE INDEX idx_fact_sales_invoice ON fact_sales (invoice_no, customer_id, invoice_date)",
+]
 
-# ✅ Create SQLite in-memory database
-engine = create_engine('sqlite://', echo=False)
+def frame_digest(df):
+    """Content fingerprint of a DataFrame: column names, dtypes and every value."""
+    header = repr([(col, str(dtype)) for col, dtype in df.dtypes.items()]) + pd.__version__
+    digest = hashlib.sha256(header.encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+relational_tables = {
+    'customers': customers_df,
+    'products': products_df,
+    'invoices': invoices_df,
+    'invoice_items': invoice_items_df
+}
+source_fingerprint = hashlib.sha256(
+    f"v{SQL_DB_SCHEMA_VERSION}|{'|'.join(frame_digest(df) for df in relational_tables.values())}".encode()
+).hexdigest()
+
+def stored_fingerprint(path):
+    """Fingerprint of the tables the database at path was built from (None if missing or unreadable)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with closing(sqlite3.connect(f"file:{path}?mode=ro", uri=True)) as conn:
+            row = conn.execute("SELECT value FROM build_info WHERE key = 'source_fingerprint'").fetchone()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+ANALYTICS_FINALIZE = FACT_SALES_SQL + ANALYTICS_INDEXES + [
+    "CREATE TABLE build_info (key TEXT PRIMARY KEY, value TEXT)",
+    f"INSERT INTO build_info VALUES ('source_fingerprint', '{source_fingerprint}')",
+    "ANALYZE",
+]
 
-# 🗃️ Load DataFrames into SQL tables
+# 🚚 Bulk loader: the whole build runs in one transaction on the raw sqlite3 connection, inserting
+# each table with a prepared executemany over per-column value arrays under load-time PRAGMAs
+BULK_SQLITE_LOAD = True  # Set to False to load through DataFrame.to_sql
+SQLITE_LOAD_PRAGMAS = {'journal_mode': 'OFF', 'synchronous': 'OFF', 'cache_size': -262144}  # negative cache_size = KiB (256 MB)
+SQLITE_RESTORE_PRAGMAS = {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'cache_size': -2000}  # SQLite defaults
+
+def report_load(table, rows, elapsed):
+    safe_print(f"📥 Loaded {table}: {rows:,} rows in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+
+def column_arrays(df):
+    """One list of Python values per column, stored as DataFrame.to_sql stores them (datetimes as text, NA as NULL)."""
+    arrays = []
+    for col in df.columns:
+        series = df[col]
+        values = series.dt.strftime('%Y-%m-%d %H:%M:%S.%f') if pd.api.types.is_datetime64_any_dtype(series) else series
+        arrays.append(values.astype(object).where(series.notna(), None).tolist())
+    return arrays
+
+def set_pragmas(conn, pragmas):
+    for pragma, value in pragmas.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+
+def bulk_load_sqlite(engine):
+    raw = engine.raw_connection()
+    conn = raw.driver_connection  # plain sqlite3 connection
+    try:
+        set_pragmas(conn, SQLITE_LOAD_PRAGMAS)
+        conn.execute("BEGIN")
+        for ddl in ANALYTICS_SCHEMA:
+            conn.execute(ddl)
+        for table, df in relational_tables.items():
+            start = time.perf_counter()
+            insert = f"INSERT INTO {table} ({', '.join(df.columns)}) VALUES ({', '.join('?' * len(df.columns))})"
+            conn.executemany(insert, zip(*column_arrays(df)))
+            report_load(table, len(df), time.perf_counter() - start)
+        for statement in ANALYTICS_FINALIZE:
+            conn.execute(statement)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        set_pragmas(conn, SQLITE_RESTORE_PRAGMAS)
+        raw.close()
+
+def build_analytics_db(engine):
+    """Create the keyed schema, load the tables, then add the join indexes and ANALYZE statistics."""
+    if BULK_SQLITE_LOAD:
+        bulk_load_sqlite(engine)
+        return
+    with engine.begin() as conn:
+        for ddl in ANALYTICS_SCHEMA:
+            conn.execute(text(ddl))
+    for table, df in relational_tables.items():
+        start = time.perf_counter()
+        df.to_sql(table, con=engine, index=False, if_exists='append')
+        report_load(table, len(df), time.perf_counter() - start)
+    with engine.begin() as conn:
+        for statement in ANALYTICS_FINALIZE:
+            conn.execute(text(statement))
+
+# 🔁 SQLite → DuckDB dialect adapters:
+# - strftime() takes its arguments the other way round in DuckDB, and strftime('%s', ...) (epoch seconds) becomes epoch()
+# - SUM over a float column is added up exactly in DECIMAL, so totals do not depend on how DuckDB's threads split the rows
+#   (the queries below sum whole thousandths instead, which is exact on both engines; this covers any other float SUM)
+# - ROUND(value, digits) becomes sqlite_round(), which calls SQLite's own round() (DuckDB rounds near-ties differently)
+SQLITE_STRFTIME = re.compile(r"strftime\(\s*'([^']*)'\s*,\s*", re.IGNORECASE)
+SQL_SUM = re.compile(r"\bSUM\(\s*((?:\w+\.)?(\w+))\s*\)", re.IGNORECASE)
+SQL_ROUND = re.compile(r"\bROUND\(", re.IGNORECASE)
+float_columns = {col for df in relational_tables.values() for col in df.columns if pd.api.types.is_float_dtype(df[col])}
+sqlite_functions = threading.local()  # one scratch SQLite connection per thread that calls sqlite_round
+
+def sqlite_round(value, digits):
+    if not hasattr(sqlite_functions, 'conn'):
+        sqlite_functions.conn = sqlite3.connect(':memory:')
+    return sqlite_functions.conn.execute("SELECT round(?, ?)", (value, digits)).fetchone()[0]
+
+def replace_calls(sql, pattern, rewrite):
+    """Replace every call matched by pattern (up to its opening parenthesis) with rewrite(match, arguments)."""
+    start = 0
+    while (match := pattern.search(sql, start)):
+        depth, end = 1, match.end()
+        while depth:  # find the parenthesis closing this call
+            depth += {'(': 1, ')': -1}.get(sql[end], 0)
+            end += 1
+        sql = sql[:match.start()] + rewrite(match, sql[match.end():end - 1].strip()) + sql[end:]
+        start = match.start() + 1  # calls nested in the arguments are rewritten next
+    return sql
+
+def top_level_arguments(arguments):
+    """Number of comma-separated arguments, ignoring commas inside nested parentheses."""
+    depth, count = 0, 1
+    for char in arguments:
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        count += char == ',' and depth == 0
+    return count
+
+def replace_strftime(sql, rewrite):
+    """Replace every strftime(fmt, value) call with rewrite(fmt, value)."""
+    return replace_calls(sql, SQLITE_STRFTIME, lambda match, value: rewrite(match.group(1), value))
+
+def duckdb_round(match, arguments):
+    # ROUND(value, digits) follows SQLite; ROUND(thousandths) only meets values within a rounding error of an integer
+    return f"sqlite_round({arguments})" if top_level_arguments(arguments) == 2 else f"ROUND({arguments})"
+
+def duckdb_strftime(fmt, value):
+    value = f"CAST({value} AS TIMESTAMP)"
+    return f"CAST(epoch({value}) AS BIGINT)" if fmt == '%s' else f"strftime({value}, '{fmt}')"
+
+def sqlite_to_duckdb(sql):
+    """Rewrite the SQLite-only functions used by this notebook's queries into DuckDB syntax."""
+    sql = SQL_SUM.sub(
+        lambda m: f"CAST(SUM(CAST({m.group(1)} AS DECIMAL(38, 9))) AS DOUBLE)" if m.group(2) in float_columns else m.group(0),
+        sql
+    )
+    sql = replace_calls(sql, SQL_ROUND, duckdb_round)
+    return replace_strftime(sql, duckdb_strftime)
+
+def duckdb_result(relation):
+    """Fetch a DuckDB result with the values and dtypes pd.read_sql returns from the SQLite database."""
+    df = relation.df()
+    for col, dtype in zip(relation.columns, map(str, relation.types)):
+        if dtype.startswith('TIMESTAMP'):
+            df[col] = df[col].dt.strftime('%Y-%m-%d %H:%M:%S.%f')  # SQLite stores datetimes as text
+        elif dtype.startswith('ENUM'):
+            df[col] = df[col].astype(object)  # category columns come back as plain strings
+        elif (dtype == 'HUGEINT' or pd.api.types.is_integer_dtype(df[col])) and df[col].notna().all():
+            df[col] = df[col].astype('int64')  # SQLite integers are int64; SUM(integer) is a HUGEINT (float64 in pandas)
+    return df
+
+def duckdb_source(df):
+    """What DuckDB scans for a frame: an Arrow table when pyarrow backs the string columns (zero-copy), else the frame."""
+    if STRING_DTYPE == 'object':
+        return df
+    import pyarrow as pa
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+# 🔁 SQLite → MySQL dialect adapters:
+# - strftime('%Y-%m', ...) becomes DATE_FORMAT(), and strftime('%s', ...) counts seconds with TIMESTAMPDIFF (no time zone applied)
+# - the recency query's whole-second difference / 86400 truncates in SQLite, so it becomes DIV 86400 (other divisions are kept)
+# - CAST(... AS INTEGER) becomes CAST(... AS SIGNED)
+# - fact_sales and fact_sales_joined are defined as CTEs over the loaded tables, so nothing is created in the database
+# MySQL adds up the same exact sums of thousandths but divides them in DECIMAL (rounded to 4 more digits per division),
+# so only an average within about 1e-8 of a half cent could round differently from SQLite. 4_mysql stores
+# line_revenue as DECIMAL(12, 2), so sub-cent lines (PADS) are already rounded to cents in that database.
+SQL_SECONDS_TO_DAYS = re.compile(r"/\s*86400(\s+AS\s+INTEGER\))", re.IGNORECASE)
+SQL_CAST_INTEGER = re.compile(r"\bAS\s+INTEGER\)", re.IGNORECASE)
+SQL_LEADING_WITH = re.compile(r"^\s*WITH\s+", re.IGNORECASE)
+MYSQL_FACT_SALES_CTES = {table: f"{table} AS ({FACT_SALES_JOIN}\n)" for table in ('fact_sales', 'fact_sales_joined')}
+
+def mysql_strftime(fmt, value):
+    return f"TIMESTAMPDIFF(SECOND, '1970-01-01', {value})" if fmt == '%s' else f"DATE_FORMAT({value}, '{fmt}')"
+
+def with_fact_sales(sql):
+    """Prepend the fact tables a query reads as CTEs (merged into the query's own WITH clause, if any)."""
+    ctes = [cte for table, cte in MYSQL_FACT_SALES_CTES.items() if re.search(rf"\b{table}\b", sql)]
+    if not ctes:
+        return sql
+    body = SQL_LEADING_WITH.sub("", sql, count=1)
+    return "WITH " + ",\n".join(ctes) + (",\n" if body != sql else "\n") + body.lstrip()
+
+def sqlite_to_mysql(sql):
+    """Rewrite the SQLite-only syntax used by this notebook's queries into MySQL syntax."""
+    sql = SQL_SECONDS_TO_DAYS.sub(r"DIV 86400\1", sql)
+    sql = SQL_CAST_INTEGER.sub("AS SIGNED)", sql)
+    return with_fact_sales(replace_strftime(sql, mysql_strftime))
+
+def mysql_result(cursor):
+    """Fetch a MySQL result with the values and dtypes pd.read_sql returns from the SQLite database."""
+    df = pd.DataFrame(cursor.fetchall(), columns=[col[0] for col in cursor.description])
+    for col in df.columns:
+        values = df[col].dropna()
+        if values.empty:
+            continue
+        if isinstance(values.iloc[0], Decimal):  # DECIMAL columns and their SUMs
+            whole = all(value.as_tuple().exponent >= 0 for value in values)
+            df[col] = df[col].astype('int64' if whole and len(values) == len(df) else float)
+        elif pd.api.types.is_datetime64_any_dtype(df[col]) or hasattr(values.iloc[0], 'strftime'):
+            df[col] = pd.to_datetime(df[col]).dt.strftime('%Y-%m-%d %H:%M:%S.%f')  # SQLite stores datetimes as text
+    return df
+
+def mysql_credentials():
+    """Connection settings from config/mysql_credentials.env (read with python-dotenv if installed) or the environment."""
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(dotenv_path=os.path.join(project_base_path, 'config', 'mysql_credentials.env'))
+    except ImportError:
+        pass
+    return {
+        'host': os.getenv('MYSQL_HOST'),
+        'port': int(os.getenv('MYSQL_PORT') or 3306),
+        'user': os.getenv('MYSQL_USER'),
+        'password': os.getenv('MYSQL_PASSWORD'),
+    }
+
+# 🏊 Query sessions: every thread that runs queries uses its own connection, so the concurrent query runner
+# (see the Q1 cell) never shares one between workers. SQLite hands out read-only connections to the analytics
+# database from a pool of QUERY_WORKERS; DuckDB opens a cursor per thread with the frames registered on it;
+# MySQL checks a connection out of mysql_pool for each query.
+PARALLEL_QUERIES = True  # Set to False to run each query when its section asks for it
+QUERY_WORKERS = min(4, os.cpu_count() or 1)
+query_sessions = threading.local()
+
+def duckdb_session():
+    if not hasattr(query_sessions, 'duckdb'):
+        session = duckdb_con.cursor()  # shares fact_sales and sqlite_round; settings and registered frames are per cursor
+        session.execute("SET integer_division = true")
+        for table, source in duckdb_sources.items():
+            session.register(table, source)
+        query_sessions.duckdb = session
+    return query_sessions.duckdb
+
+def execute_query(sql):
+    if SQL_ENGINE == 'duckdb':
+        return duckdb_result(duckdb_session().sql(sqlite_to_duckdb(sql)))
+    if SQL_ENGINE == 'mysql':
+        with mysql_pool.connection(mysql_database) as connection:
+            cursor = connection.cursor()
+            cursor.execute(sqlite_to_mysql(sql))
+            result = mysql_result(cursor)
+            cursor.close()
+        return result
+    return pd.read_sql(text(sql), con=query_engine)
+
+query_timings = {}
+
+def run_query(query, label):
+    """Run one of the SQLite-dialect queries below on the selected engine, timing it under label."""
+    sql = str(query)
+    start = time.perf_counter()
+    result = execute_query(sql)
+    query_timings[label] = {'fact_sales': time.perf_counter() - start}
+    if RUN_FACT_BENCHMARK and 'fact_sales' in sql:
+        start = time.perf_counter()
+        execute_query(sql.replace('fact_sales', 'fact_sales_joined'))
+        query_timings[label]['join'] = time.perf_counter() - start
+    return result
+
+# 🗃️ Load DataFrames into SQL tables (or attach to the database built by an earlier run)
 try:
-    customers_df.to_sql('customers', con=engine, index=False, if_exists='replace')
-    products_df.to_sql('products', con=engine, index=False, if_exists='replace')
-    invoices_df.to_sql('invoices', con=engine, index=False, if_exists='replace')
-    invoice_items_df.to_sql('invoice_items', con=engine, index=False, if_exists='replace')
-    safe_print("✅ All tables successfully loaded into SQLite in-memory database.")
+    start = time.perf_counter()
+    if SQL_ENGINE == 'duckdb':
+        engine = None
+        duckdb_con = duckdb.connect()
+        duckdb_con.execute("SET integer_division = true")  # integer / integer truncates, as in SQLite
+        duckdb_con.create_function('sqlite_round', sqlite_round, ['DOUBLE', 'INTEGER'], 'DOUBLE')
+        duckdb_sources = {table: duckdb_source(df) for table, df in relational_tables.items()}
+        for table, source in duckdb_sources.items():
+            duckdb_con.register(table, source)
+        for statement in FACT_SALES_SQL:
+            duckdb_con.execute(statement.replace(FACT_SALES_ORDER, ''))  # row order does not matter to the exact sums
+        safe_print("✅ All tables registered with DuckDB (queried in place) and fact_sales materialized.")
+    elif SQL_ENGINE == 'mysql':
+        engine = None
+        mysql_pool = MySQLPool(mysql_credentials(), QUERY_WORKERS, name='sql_analysis')
+        mysql_database = os.getenv('MYSQL_DATABASE') or 'retail_sales'  # set by mysql_credentials.env, if present
+        safe_print(f"✅ Querying the MySQL database `{mysql_database}` over {QUERY_WORKERS} pooled connections (fact_sales as a CTE).")
+    elif not PERSISTENT_SQL_DB:
+        engine = create_engine('sqlite://', echo=False)
+        build_analytics_db(engine)
+        safe_print("✅ All tables successfully loaded into SQLite in-memory database.")
+    elif stored_fingerprint(analytics_db_path) == source_fingerprint:
+        engine = create_engine(f"sqlite:///{analytics_db_path}", echo=False)
+        safe_print(f"⚡ Tables unchanged – attached to the existing analytics database: {analytics_db_path}")
+    else:
+        # 🏗️ Build next to the target and swap it in, so an interrupted build never leaves a half-loaded database
+        os.makedirs(os.path.dirname(analytics_db_path), exist_ok=True)
+        build_path = analytics_db_path + '.building'
+        if os.path.exists(build_path):
+            os.remove(build_path)
+        build_engine = create_engine(f"sqlite:///{build_path}", echo=False)
+        build_analytics_db(build_engine)
+        build_engine.dispose()
+        os.replace(build_path, analytics_db_path)
+        engine = create_engine(f"sqlite:///{analytics_db_path}", echo=False)
+        safe_print(f"✅ All tables loaded into the analytics database with keys, indexes and statistics: {analytics_db_path}")
+    if SQL_ENGINE == 'sqlite' and PERSISTENT_SQL_DB:
+        # 🔒 Read-only connections: the finished database is only queried from here on
+        query_engine = create_engine(
+            f"sqlite:///file:{analytics_db_path}?mode=ro&uri=true", pool_size=QUERY_WORKERS, echo=False
+        )
+    else:
+        query_engine = engine  # an in-memory database exists on its load connection only
+    safe_print(f"⏱️ Database ready in {time.perf_counter() - start:.2f}s")
 except Exception as e:
     safe_print("❌ Error loading tables into SQLite:")
     safe_print(str(e))
@@ -483,6 +1012,10 @@ except Exception as e:
 # - Explore customer behavior  
 # - Segment users with RFM scores  
 # 
+# > 🧮 The join of `invoice_items` ➡️ `invoices` ➡️ `customers` is shared by most questions, so it is materialized once as the line-level fact table **`fact_sales`**, with columns `invoice_no`, `invoice_date`, `customer_id`, `country`, `stock_code`, `quantity`, `unit_price` and `line_revenue`, and indexes on customer, country and invoice. Q3, Q4a, Q4b, Q5, Q7, Q8 and Q10–Q12 read from it instead of repeating the join. Its rows are stored in a different order than the join returns them, so revenue is added up as exact whole cents, and every result is the same as on the joined tables. The join paths described below are still what each row of `fact_sales` represents.  
+# > ⏱️ Every query is timed, and the timings are printed at the end of the notebook. With `RUN_FACT_BENCHMARK = True`, each `fact_sales` query is also run against `fact_sales_joined`, a view of the original join, to show the before/after time.  
+# > 🧵 The queries are independent of each other, so the Q1 cell registers all of them by name in `BUSINESS_QUERIES`, with the CSV each one exports, and starts them at once: with `PARALLEL_QUERIES = True` they run on `QUERY_WORKERS` threads, each with its own read-only connection to the analytics database (or its own DuckDB cursor), and every CSV is written as soon as its result is ready. Each section below then picks up its finished result by name. An in-memory database (`PERSISTENT_SQL_DB = False`) and `RUN_FACT_BENCHMARK` run the queries one at a time.  
+# 
 # > 🔎 All queries will be written using SQLAlchemy `.execute()` calls and results will be loaded into pandas DataFrames for inspection and export.  
 # >  
 # > 💾 Output files will be saved to:  
@@ -521,36 +1054,319 @@ except Exception as e:
 from sqlalchemy import text
 import pandas as pd
 import os
+import hashlib
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # 🔧 Setup export path
 sql_output_dir = os.path.join(project_base_path, 'sql_outputs', 'notebook_outputs')
 os.makedirs(sql_output_dir, exist_ok=True)
 
+# 🧾 Artifact manifest: each CSV in sql_outputs/ records the content fingerprint it was written from,
+# and is only rewritten when that fingerprint changes. A query's CSV also records the fingerprint of its
+# inputs (the loaded tables, the engine and the SQL text): while that is unchanged the query is not run
+# at all, and its result is read back from the CSV with the recorded dtypes.
+SKIP_UNCHANGED_ARTIFACTS = True  # Set to False to rewrite every artifact
+artifact_manifest_path = os.path.join(project_base_path, 'data', 'cache', 'sql_artifact_manifest.json')
+try:
+    with open(artifact_manifest_path) as fh:
+        artifact_manifest = json.load(fh)
+except FileNotFoundError:
+    artifact_manifest = {}
+manifest_lock = threading.Lock()  # query workers write their CSVs concurrently
+
+def query_inputs(sql):
+    """Fingerprint of everything a query result depends on."""
+    return hashlib.sha256(f"{source_fingerprint}|{SQL_ENGINE}|{sql}".encode()).hexdigest()
+
+def artifact_on_disk(path):
+    """Manifest entry of path if the file on disk is the one it describes, else None."""
+    entry = artifact_manifest.get(os.path.relpath(path, project_base_path))
+    if SKIP_UNCHANGED_ARTIFACTS and entry is not None and os.path.exists(path) and os.path.getsize(path) == entry['bytes']:
+        return entry
+    return None
+
+def cached_result(path, inputs):
+    """The result stored in path when it was written from the same inputs, else None."""
+    entry = artifact_on_disk(path)
+    if entry is None or entry.get('inputs') != inputs:
+        return None
+    dtypes = {col: str if dtype == 'object' else dtype for col, dtype in entry['dtypes'].items()}
+    return pd.read_csv(path, dtype=dtypes)
+
+def save_csv_artifact(df, path, inputs=None):
+    """Write a query result to CSV unless the file on disk was written from identical content."""
+    key = os.path.relpath(path, project_base_path)
+    fingerprint = frame_digest(df)
+    entry = artifact_on_disk(path)
+    record = {'inputs': inputs, 'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()}}
+    if entry is not None and entry['fingerprint'] == fingerprint:
+        safe_print(f"⏭️ Unchanged, not rewritten: {path}")
+        if all(entry.get(field) == value for field, value in record.items()):
+            return
+    else:
+        df.to_csv(path, index=False)
+        safe_print(f"✅ Saved: {path}")
+    with manifest_lock:
+        artifact_manifest[key] = {'fingerprint': fingerprint, 'bytes': os.path.getsize(path), **record}
+        os.makedirs(os.path.dirname(artifact_manifest_path), exist_ok=True)
+        with open(artifact_manifest_path, 'w') as fh:
+            json.dump(artifact_manifest, fh, indent=2)
+
+# 🧵 Concurrent query runner: every business question is registered below by name, with the CSV its raw
+# result is exported to. With PARALLEL_QUERIES they all start at once on QUERY_WORKERS threads (one query
+# session each, see the database cell), and each CSV is written as soon as its result is ready; the sections
+# further down take the finished results by name. Otherwise a query runs when its section asks for it.
+query_jobs = {}
+query_finished_at = {}
+
+def run_and_export(label, query, filename):
+    path = os.path.join(sql_output_dir, filename) if filename else None
+    inputs = query_inputs(str(query))
+    result = cached_result(path, inputs) if path else None
+    if result is not None:
+        query_timings[label] = {'fact_sales': 0.0, 'skipped': True}
+        safe_print(f"⏭️ Inputs unchanged, query not run (result read from {path})")
+    else:
+        result = run_query(query, label)
+        if path:
+            save_csv_artifact(result, path, inputs)
+    query_finished_at[label] = time.perf_counter()
+    return result
+
+def start_queries(registry):
+    """Submit every registered query (parallel mode) or keep it for its section to run (serial mode)."""
+    global queries_started, query_pool
+    # In-memory SQLite lives on one connection, and RUN_FACT_BENCHMARK timings only compare one query at a time
+    parallel = PARALLEL_QUERIES and not RUN_FACT_BENCHMARK and (SQL_ENGINE != 'sqlite' or PERSISTENT_SQL_DB)
+    query_pool = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix='sql-query') if parallel else None
+    queries_started = time.perf_counter()
+    for label, (query, filename) in registry.items():
+        query_jobs[label] = query_pool.submit(run_and_export, label, query, filename) if parallel else (query, filename)
+
+def query_result(label):
+    """Result of a registered query (re-raises its error), with its CSV already written."""
+    job = query_jobs[label]
+    if isinstance(job, Future):
+        return job.result()
+    return run_and_export(label, *job)
+
+# 💰 Money totals: unit prices have at most 3 decimals (PADS sells at £0.001), so every line_revenue is a whole
+# number of thousandths of a pound. Each line is scaled to thousandths and they are added up as exact integers
+# (SUM(ROUND(line_revenue * 1000)) / 1000.0), so no line loses its sub-cent part. A float SUM(line_revenue)
+# depends on the order the engine adds the rows up in, which the indexes and fact_sales layout decide, and a
+# total or average near a half cent could round either way.
+
 # 📝 SQL Query: Monthly revenue by month
 monthly_revenue_query = text("""
 SELECT
     strftime('%Y-%m', invoice_date) AS invoice_month,
-    ROUND(SUM(line_revenue), 2) AS monthly_revenue,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0, 2) AS monthly_revenue,
     COUNT(DISTINCT invoice_no) AS monthly_invoices,
-    ROUND(SUM(line_revenue) * 1.0 / COUNT(DISTINCT invoice_no), 2) AS avg_revenue_per_invoice
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0 / COUNT(DISTINCT invoice_no), 2) AS avg_revenue_per_invoice
 FROM invoices
 JOIN invoice_items USING(invoice_no)
 GROUP BY invoice_month
 ORDER BY invoice_month;
 """)
 
-# 📊 Execute and load into DataFrame
-monthly_revenue_df = pd.read_sql(monthly_revenue_query, con=engine)
+# 📊 Q2: Top 10 Products by Revenue
+query_top_products = """
+SELECT
+    p.stock_code,
+    p.description,
+    ROUND(SUM(ROUND(ii.line_revenue * 1000)) / 1000.0, 2) AS total_revenue,
+    SUM(ii.quantity) AS total_quantity,
+    ROUND(AVG(ii.unit_price), 2) AS avg_unit_price
+FROM invoice_items AS ii
+JOIN products AS p ON ii.stock_code = p.stock_code
+GROUP BY p.stock_code, p.description
+ORDER BY total_revenue DESC, p.stock_code
+LIMIT 10;
+"""
+
+# 📊 Q3: Top 10 Invoices by Total Transaction Value
+query_top_invoices = """
+SELECT
+    invoice_no,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0, 2) AS total_invoice_revenue,
+    COUNT(stock_code) AS invoice_items,
+    customer_id,
+    invoice_date
+FROM fact_sales
+GROUP BY invoice_no, customer_id, invoice_date
+ORDER BY total_invoice_revenue DESC, invoice_no
+LIMIT 10;
+"""
+
+# 📊 Q4a: Total Revenue by Country (Includes UK)
+query_revenue_by_country = """
+SELECT
+    country,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0, 2) AS total_revenue,
+    COUNT(DISTINCT invoice_no) AS num_invoices,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0 / COUNT(DISTINCT invoice_no), 2) AS avg_invoice_value
+FROM fact_sales
+GROUP BY country
+ORDER BY total_revenue DESC, country;
+"""
+
+# 📊 Q4b: Total Revenue by Country (Excludes UK)
+query_revenue_by_country_excl_uk = """
+SELECT
+    country,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0, 2) AS total_revenue,
+    COUNT(DISTINCT invoice_no) AS num_invoices,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0 / COUNT(DISTINCT invoice_no), 2) AS avg_invoice_value
+FROM fact_sales
+WHERE TRIM(LOWER(country)) != 'united kingdom'
+GROUP BY country
+ORDER BY total_revenue DESC, country;
+"""
+
+# 📊 Q5: Customer Behavior by Country – Matching EDA Output
+query_customer_behavior_by_country = """
+SELECT
+    country,
+    COUNT(DISTINCT customer_id) AS num_customers,
+    COUNT(DISTINCT invoice_no) AS num_invoices,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0, 2) AS total_revenue,
+    ROUND(COUNT(DISTINCT invoice_no) * 1.0 / COUNT(DISTINCT customer_id), 2) AS avg_invoices_per_customer,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0 / COUNT(DISTINCT customer_id), 2) AS avg_revenue_per_customer
+FROM fact_sales
+GROUP BY country
+ORDER BY total_revenue DESC, country;
+"""
+
+# 📝 SQL Query: Count of single vs. repeat customers with percentage
+query_customer_type_summary = text("""
+WITH invoice_counts AS (
+    SELECT
+        customer_id,
+        COUNT(DISTINCT invoice_no) AS num_invoices
+    FROM invoices
+    GROUP BY customer_id
+),
+tagged_customers AS (
+    SELECT
+        CASE
+            WHEN num_invoices = 1 THEN 'Single Purchase'
+            ELSE 'Repeat Customer'
+        END AS customer_type
+    FROM invoice_counts
+)
+SELECT
+    customer_type,
+    COUNT(*) AS count,
+    ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM tagged_customers), 2) AS percent
+FROM tagged_customers
+GROUP BY customer_type
+ORDER BY customer_type DESC;
+""")
+
+# 📊 Q7: Top 10 Customers by Average Order Value
+query_avg_order_value_per_customer = """
+SELECT
+    customer_id,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0, 2) AS total_spent,
+    COUNT(DISTINCT invoice_no) AS num_orders,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0 / COUNT(DISTINCT invoice_no), 6) AS avg_order_value
+FROM fact_sales
+GROUP BY customer_id
+ORDER BY avg_order_value DESC, customer_id
+LIMIT 10;
+"""
+
+# 🧾 Q8: Top 10 Customers by Total Spend (with avg order value)
+query_top_spenders = """
+SELECT
+    customer_id,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0, 2) AS total_spent,
+    COUNT(DISTINCT invoice_no) AS num_orders,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0 / COUNT(DISTINCT invoice_no), 2) AS avg_order_value
+FROM fact_sales
+GROUP BY customer_id
+ORDER BY total_spent DESC, customer_id
+LIMIT 10;
+"""
+
+# 📅 Get the most recent invoice date in the dataset
+latest_date_query = text("SELECT MAX(invoice_date) AS latest_date FROM invoices;")
+
+# 🧮 SQL Query: Recency per customer
+query_recency = text("""
+SELECT
+    c.customer_id,
+    MAX(i.invoice_date) AS invoice_date,
+    CAST((strftime('%s', (SELECT MAX(invoice_date) FROM invoices)) - strftime('%s', MAX(i.invoice_date))) / 86400 AS INTEGER) AS recency_days
+FROM customers AS c
+JOIN invoices AS i ON c.customer_id = i.customer_id
+GROUP BY c.customer_id
+ORDER BY recency_days ASC, c.customer_id;
+""")
+
+# 🧮 SQL Query: Frequency per customer
+query_frequency = text("""
+SELECT
+    customer_id,
+    COUNT(DISTINCT invoice_no) AS num_orders,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0, 2) AS total_spent,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0 / COUNT(DISTINCT invoice_no), 2) AS avg_order_value
+FROM fact_sales
+GROUP BY customer_id
+ORDER BY num_orders DESC, customer_id;
+""")
+
+# 🧮 SQL query: total_spent, num_orders, avg_order_value per customer
+query_monetary_full = text("""
+SELECT
+    customer_id,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0, 2) AS total_spent,
+    COUNT(DISTINCT invoice_no) AS num_orders,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0 / COUNT(DISTINCT invoice_no), 2) AS avg_order_value
+FROM fact_sales
+GROUP BY customer_id
+ORDER BY total_spent DESC, customer_id;
+""")
+
+# 🧾 SQL: Extract RFM base metrics from relational tables
+query_rfm = text("""
+SELECT
+    customer_id,
+    MAX(invoice_date) AS last_purchase,
+    COUNT(DISTINCT invoice_no) AS frequency,
+    ROUND(SUM(ROUND(line_revenue * 1000)) / 1000.0, 2) AS monetary
+FROM fact_sales
+GROUP BY customer_id
+ORDER BY customer_id
+""")
+
+# 🗂️ Query registry: label → (SQL, CSV written from the raw result); Q12 is exported after RFM scoring
+BUSINESS_QUERIES = {
+    'Q1 monthly revenue': (monthly_revenue_query, '01_monthly_revenue_trend.csv'),
+    'Q2 top products': (query_top_products, '02_top_products_by_revenue.csv'),
+    'Q3 top invoices': (query_top_invoices, '03_top_invoices_by_value.csv'),
+    'Q4a revenue by country': (query_revenue_by_country, '04_revenue_by_country.csv'),
+    'Q4b revenue excl. UK': (query_revenue_by_country_excl_uk, '04_revenue_by_country_excl_uk.csv'),
+    'Q5 behavior by country': (query_customer_behavior_by_country, '05_customer_behavior_by_country.csv'),
+    'Q6 one-time vs repeat': (query_customer_type_summary, '06_one_time_vs_repeat_customers.csv'),
+    'Q7 avg order value': (query_avg_order_value_per_customer, '07_avg_order_value_per_customer.csv'),
+    'Q8 top spenders': (query_top_spenders, '08_top_customers_by_total_spend.csv'),
+    'Q9 latest invoice date': (latest_date_query, None),
+    'Q9 recency': (query_recency, '09_customer_recency.csv'),
+    'Q10 frequency': (query_frequency, '10_customer_frequency.csv'),
+    'Q11 monetary': (query_monetary_full, '11_customer_monetary_value.csv'),
+    'Q12 RFM base': (query_rfm, None),
+}
+start_queries(BUSINESS_QUERIES)
+
+# 📝 SQL Query: Monthly revenue by month
+monthly_revenue_df = query_result('Q1 monthly revenue')
 
 # 👁️ Preview result
 safe_print("📊 Monthly Revenue Trend:")
 display(monthly_revenue_df)
 
-# 💾 Save result to CSV
-monthly_revenue_path = os.path.join(sql_output_dir, '01_monthly_revenue_trend.csv')
-monthly_revenue_df.to_csv(monthly_revenue_path, index=False)
-safe_print(f"✅ Saved: {monthly_revenue_path}")
-
 
 # ### 📊 Summary: Monthly Revenue Trend (SQL Output)
 # 
@@ -594,32 +1410,12 @@ safe_print(f"✅ Saved: {monthly_revenue_path}")
 
 
 # 📊 Q2: Top 10 Products by Revenue
-query_top_products = """
-SELECT
-    p.stock_code,
-    p.description,
-    ROUND(SUM(ii.line_revenue), 2) AS total_revenue,
-    SUM(ii.quantity) AS total_quantity,
-    ROUND(AVG(ii.unit_price), 2) AS avg_unit_price
-FROM invoice_items AS ii
-JOIN products AS p ON ii.stock_code = p.stock_code
-GROUP BY p.stock_code, p.description
-ORDER BY total_revenue DESC
-LIMIT 10;
-"""
-
-# 🚀 Execute query
-top_products_df = pd.read_sql_query(query_top_products, engine)
+top_products_df = query_result('Q2 top products')
 
 # 📋 Display result
 safe_print("📊 Top 10 Best-Selling Products by Revenue:")
 display(top_products_df)
 
-# 💾 Save output
-top_products_path = os.path.join(project_base_path, 'sql_outputs', 'notebook_outputs', '02_top_products_by_revenue.csv')
-top_products_df.to_csv(top_products_path, index=False)
-safe_print(f"✅ Saved: {top_products_path}")
-
 
 # ---
 # 
@@ -665,33 +1461,12 @@ safe_print(f"✅ Saved: {top_products_path}")
 
 
 # 📊 Q3: Top 10 Invoices by Total Transaction Value
-query_top_invoices = """
-SELECT
-    ii.invoice_no,
-    ROUND(SUM(ii.line_revenue), 2) AS total_invoice_revenue,
-    COUNT(ii.stock_code) AS invoice_items,
-    c.customer_id,
-    i.invoice_date
-FROM invoice_items AS ii
-JOIN invoices AS i ON ii.invoice_no = i.invoice_no
-JOIN customers AS c ON i.customer_id = c.customer_id
-GROUP BY ii.invoice_no, i.customer_id, i.invoice_date
-ORDER BY total_invoice_revenue DESC
-LIMIT 10;
-"""
-
-# 🚀 Execute query
-top_invoices_df = pd.read_sql_query(query_top_invoices, engine)
+top_invoices_df = query_result('Q3 top invoices')
 
 # 📋 Display result
 safe_print("📊 Top 10 Highest-Value Invoices:")
 display(top_invoices_df)
 
-# 💾 Save output
-top_invoices_path = os.path.join(project_base_path, 'sql_outputs', 'notebook_outputs', '03_top_invoices_by_value.csv')
-top_invoices_df.to_csv(top_invoices_path, index=False)
-safe_print(f"✅ Saved: {top_invoices_path}")
-
 
 # ---
 # 
@@ -744,58 +1519,19 @@ safe_print(f"✅ Saved: {top_invoices_path}")
 
 
 # 📊 Q4a: Total Revenue by Country (Includes UK)
-query_revenue_by_country = """
-SELECT
-    c.country,
-    ROUND(SUM(ii.line_revenue), 2) AS total_revenue,
-    COUNT(DISTINCT i.invoice_no) AS num_invoices,
-    ROUND(SUM(ii.line_revenue) * 1.0 / COUNT(DISTINCT i.invoice_no), 2) AS avg_invoice_value
-FROM invoice_items AS ii
-JOIN invoices AS i ON ii.invoice_no = i.invoice_no
-JOIN customers AS c ON i.customer_id = c.customer_id
-GROUP BY c.country
-ORDER BY total_revenue DESC;
-"""
-
-# 🚀 Execute query
-revenue_by_country_df = pd.read_sql_query(query_revenue_by_country, engine)
+revenue_by_country_df = query_result('Q4a revenue by country')
 
 # 📋 Display result
 safe_print("📋 Top Countries by Total Revenue (Includes UK):")
 display(revenue_by_country_df.head(10))
 
-# 💾 Save output
-revenue_country_path = os.path.join(project_base_path, 'sql_outputs', 'notebook_outputs', '04_revenue_by_country.csv')
-revenue_by_country_df.to_csv(revenue_country_path, index=False)
-safe_print(f"✅ Saved: {revenue_country_path}")
-
 # 📊 Q4b: Total Revenue by Country (Excludes UK)
-query_revenue_by_country_excl_uk = """
-SELECT
-    c.country,
-    ROUND(SUM(ii.line_revenue), 2) AS total_revenue,
-    COUNT(DISTINCT i.invoice_no) AS num_invoices,
-    ROUND(SUM(ii.line_revenue) * 1.0 / COUNT(DISTINCT i.invoice_no), 2) AS avg_invoice_value
-FROM invoice_items AS ii
-JOIN invoices AS i ON ii.invoice_no = i.invoice_no
-JOIN customers AS c ON i.customer_id = c.customer_id
-WHERE TRIM(LOWER(c.country)) != 'united kingdom'
-GROUP BY c.country
-ORDER BY total_revenue DESC;
-"""
-
-# 🚀 Execute query
-revenue_by_country_excl_uk_df = pd.read_sql_query(query_revenue_by_country_excl_uk, engine)
+revenue_by_country_excl_uk_df = query_result('Q4b revenue excl. UK')
 
 # 📋 Display result
 safe_print("📋 Top Countries by Total Revenue (Excludes UK):")
 display(revenue_by_country_excl_uk_df.head(10))
 
-# 💾 Save output
-revenue_country_excl_uk_path = os.path.join(project_base_path, 'sql_outputs', 'notebook_outputs', '04_revenue_by_country_excl_uk.csv')
-revenue_by_country_excl_uk_df.to_csv(revenue_country_excl_uk_path, index=False)
-safe_print(f"✅ Saved: {revenue_country_excl_uk_path}")
-
 
 # ---
 # 
@@ -857,33 +1593,12 @@ safe_print(f"✅ Saved: {revenue_country_excl_uk_path}")
 
 
 # 📊 Q5: Customer Behavior by Country – Matching EDA Output
-query_customer_behavior_by_country = """
-SELECT
-    c.country,
-    COUNT(DISTINCT c.customer_id) AS num_customers,
-    COUNT(DISTINCT i.invoice_no) AS num_invoices,
-    ROUND(SUM(ii.line_revenue), 2) AS total_revenue,
-    ROUND(COUNT(DISTINCT i.invoice_no) * 1.0 / COUNT(DISTINCT c.customer_id), 2) AS avg_invoices_per_customer,
-    ROUND(SUM(ii.line_revenue) * 1.0 / COUNT(DISTINCT c.customer_id), 2) AS avg_revenue_per_customer
-FROM invoice_items AS ii
-JOIN invoices AS i USING(invoice_no)
-JOIN customers AS c USING(customer_id)
-GROUP BY c.country
-ORDER BY total_revenue DESC;
-"""
-
-# 🚀 Execute query
-customer_behavior_df = pd.read_sql_query(query_customer_behavior_by_country, engine)
+customer_behavior_df = query_result('Q5 behavior by country')
 
 # 📋 Display result
 safe_print("📊 Customer Behavior by Country (SQL Output):")
 display(customer_behavior_df.head(10))
 
-# 💾 Save output
-behavior_path = os.path.join(project_base_path, 'sql_outputs', 'notebook_outputs', '05_customer_behavior_by_country.csv')
-customer_behavior_df.to_csv(behavior_path, index=False)
-safe_print(f"✅ Saved: {behavior_path}")
-
 
 # ---
 # 
@@ -944,43 +1659,12 @@ safe_print(f"✅ Saved: {behavior_path}")
 
 
 # 📝 SQL Query: Count of single vs. repeat customers with percentage
-query_customer_type_summary = text("""
-WITH invoice_counts AS (
-    SELECT
-        customer_id,
-        COUNT(DISTINCT invoice_no) AS num_invoices
-    FROM invoices
-    GROUP BY customer_id
-),
-tagged_customers AS (
-    SELECT
-        CASE
-            WHEN num_invoices = 1 THEN 'Single Purchase'
-            ELSE 'Repeat Customer'
-        END AS customer_type
-    FROM invoice_counts
-)
-SELECT
-    customer_type,
-    COUNT(*) AS count,
-    ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM tagged_customers), 2) AS percent
-FROM tagged_customers
-GROUP BY customer_type
-ORDER BY customer_type DESC;
-""")
-
-# ▶️ Execute and load into DataFrame
-customer_type_summary_df = pd.read_sql(query_customer_type_summary, con=engine)
+customer_type_summary_df = query_result('Q6 one-time vs repeat')
 
 # 👁️ Preview
 safe_print("📊 One-Time vs. Repeat Customer Breakdown:")
 display(customer_type_summary_df)
 
-# 💾 Save the output
-one_time_vs_repeat_path = os.path.join(sql_output_dir, '06_one_time_vs_repeat_customers.csv')
-customer_type_summary_df.to_csv(one_time_vs_repeat_path, index=False)
-safe_print(f"✅ Saved: {one_time_vs_repeat_path}")
-
 
 # ---
 # 
@@ -1034,32 +1718,12 @@ safe_print(f"✅ Saved: {one_time_vs_repeat_path}")
 
 
 # 📊 Q7: Top 10 Customers by Average Order Value
-query_avg_order_value_per_customer = """
-SELECT
-    c.customer_id,
-    ROUND(SUM(ii.line_revenue), 2) AS total_spent,
-    COUNT(DISTINCT i.invoice_no) AS num_orders,
-    ROUND(SUM(ii.line_revenue) * 1.0 / COUNT(DISTINCT i.invoice_no), 6) AS avg_order_value
-FROM invoice_items AS ii
-JOIN invoices AS i ON ii.invoice_no = i.invoice_no
-JOIN customers AS c ON i.customer_id = c.customer_id
-GROUP BY c.customer_id
-ORDER BY avg_order_value DESC
-LIMIT 10;
-"""
-
-# ▶️ Execute query
-avg_order_value_df = pd.read_sql_query(query_avg_order_value_per_customer, engine)
+avg_order_value_df = query_result('Q7 avg order value')
 
 # 👁️ Preview
 safe_print("📋 Top 10 Customers by Avg Order Value:")
 display(avg_order_value_df)
 
-# 💾 Export to CSV
-avg_order_value_path = os.path.join(project_base_path, 'sql_outputs', 'notebook_outputs', '07_avg_order_value_per_customer.csv')
-avg_order_value_df.to_csv(avg_order_value_path, index=False)
-safe_print(f"✅ Saved: {avg_order_value_path}")
-
 
 # ### 📊 Summary: Average Order Value per Customer (SQL Output)
 # 
@@ -1110,32 +1774,12 @@ safe_print(f"✅ Saved: {avg_order_value_path}")
 
 
 # 🧾 Q8: Top 10 Customers by Total Spend (with avg order value)
-query_top_spenders = """
-SELECT
-    c.customer_id,
-    ROUND(SUM(ii.line_revenue), 2) AS total_spent,
-    COUNT(DISTINCT i.invoice_no) AS num_orders,
-    ROUND(SUM(ii.line_revenue) * 1.0 / COUNT(DISTINCT i.invoice_no), 2) AS avg_order_value
-FROM invoice_items AS ii
-JOIN invoices AS i ON ii.invoice_no = i.invoice_no
-JOIN customers AS c ON i.customer_id = c.customer_id
-GROUP BY c.customer_id
-ORDER BY total_spent DESC
-LIMIT 10;
-"""
-
-# ▶️ Run the query
-top_spenders_df = pd.read_sql_query(query_top_spenders, engine)
+top_spenders_df = query_result('Q8 top spenders')
 
 # 👁️ Display the result
 safe_print("📋 Top 10 Customers by Total Spend:")
 display(top_spenders_df)
 
-# 💾 Save the output
-top_spenders_path = os.path.join(project_base_path, 'sql_outputs', 'notebook_outputs', '08_top_customers_by_total_spend.csv')
-top_spenders_df.to_csv(top_spenders_path, index=False)
-safe_print(f"✅ Saved: {top_spenders_path}")
-
 
 # ---
 # 
@@ -1173,7 +1817,7 @@ safe_print(f"✅ Saved: {top_spenders_path}")
 # 
 # We compute this metric as follows:
 # 
-# - Extract the **latest invoice date** from the `invoices` table to use as a reference  
+# - Extract the **latest invoice date** from the `invoices` table to use as a reference (a scalar subquery inside the recency query, so it does not wait on another query)  
 # - Join `customers` ➡ `invoices` on `customer_id`  
 # - For each customer, retrieve their **most recent invoice date** using `MAX(i.invoice_date)`  
 # - Calculate `recency_days` by subtracting this date from the reference date using the SQLite `strftime` function  
@@ -1199,39 +1843,18 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 
 # 📅 Get the most recent invoice date in the dataset
-latest_date_query = text("SELECT MAX(invoice_date) AS latest_date FROM invoices;")
-latest_date_df = pd.read_sql(latest_date_query, engine)
+latest_date_df = query_result('Q9 latest invoice date')
 latest_date = pd.to_datetime(latest_date_df['latest_date'].iloc[0])
 
 safe_print(f"🗓️ Latest invoice date in dataset: {latest_date.date()}")
 
-# Format timestamp string for SQL (with full precision)
-latest_date_str = latest_date.strftime('%Y-%m-%d %H:%M:%S')
-
 # 🧮 SQL Query: Recency per customer
-query_recency = text(f"""
-SELECT
-    c.customer_id,
-    MAX(i.invoice_date) AS invoice_date,
-    CAST((strftime('%s', '{latest_date_str}') - strftime('%s', MAX(i.invoice_date))) / 86400 AS INTEGER) AS recency_days
-FROM customers AS c
-JOIN invoices AS i ON c.customer_id = i.customer_id
-GROUP BY c.customer_id
-ORDER BY recency_days ASC;
-""")
-
-# ▶️ Execute the query
-recency_df = pd.read_sql(query_recency, engine)
+recency_df = query_result('Q9 recency')
 
 # 👁️ Preview top and bottom 5 rows (recent and inactive)
 safe_print("📋 Sample Customers by Recency (Top & Bottom):")
 display(pd.concat([recency_df.head(), recency_df.tail()]))
 
-# 💾 Export result
-recency_output_path = os.path.join(project_base_path, 'sql_outputs', 'notebook_outputs', '09_customer_recency.csv')
-recency_df.to_csv(recency_output_path, index=False)
-safe_print(f"✅ Saved: {recency_output_path}")
-
 # 📊 Visualize Recency Distribution
 plt.figure(figsize=(14, 5))
 
@@ -1309,32 +1932,13 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 
 # 🧮 SQL Query: Frequency per customer
-query_frequency = text("""
-SELECT
-    c.customer_id,
-    COUNT(DISTINCT i.invoice_no) AS num_orders,
-    ROUND(SUM(ii.line_revenue), 2) AS total_spent,
-    ROUND(SUM(ii.line_revenue) * 1.0 / COUNT(DISTINCT i.invoice_no), 2) AS avg_order_value
-FROM customers AS c
-JOIN invoices AS i ON c.customer_id = i.customer_id
-JOIN invoice_items AS ii ON i.invoice_no = ii.invoice_no
-GROUP BY c.customer_id
-ORDER BY num_orders DESC;
-""")
-
-# ▶️ Run the query
-frequency_df = pd.read_sql(query_frequency, engine)
+frequency_df = query_result('Q10 frequency')
 
 # 📋 Show sample customers (top & bottom)
 safe_print("📋 Sample Customers by Purchase Frequency (Top & Bottom):")
 display(frequency_df.head())
 display(frequency_df.tail())
 
-# 💾 Save output
-frequency_output_path = os.path.join(project_base_path, 'sql_outputs', 'notebook_outputs', '10_customer_frequency.csv')
-frequency_df.to_csv(frequency_output_path, index=False)
-safe_print(f"✅ Saved: {frequency_output_path}")
-
 # 📊 Create bin edges (50 bins) and compute histogram
 bin_count = 50
 counts, bin_edges = np.histogram(frequency_df['num_orders'], bins=bin_count)
@@ -1428,31 +2032,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-# ✅ Ensure export directory exists
-data_dir = os.path.join(project_base_path, 'sql_outputs', 'notebook_outputs')
-os.makedirs(data_dir, exist_ok=True)
-
 # 🧮 SQL query: total_spent, num_orders, avg_order_value per customer
-query_monetary_full = text("""
-SELECT
-    c.customer_id,
-    ROUND(SUM(ii.line_revenue), 2) AS total_spent,
-    COUNT(DISTINCT i.invoice_no) AS num_orders,
-    ROUND(SUM(ii.line_revenue) / COUNT(DISTINCT i.invoice_no), 2) AS avg_order_value
-FROM customers AS c
-JOIN invoices AS i ON c.customer_id = i.customer_id
-JOIN invoice_items AS ii ON i.invoice_no = ii.invoice_no
-GROUP BY c.customer_id
-ORDER BY total_spent DESC;
-""")
-
-# ▶️ Execute the query
-monetary_df = pd.read_sql(query_monetary_full, engine)
-
-# 💾 Save to CSV
-monetary_path = os.path.join(data_dir, '11_customer_monetary_value.csv')
-monetary_df.to_csv(monetary_path, index=False)
-safe_print(f"✅ Saved: {monetary_path}")
+monetary_df = query_result('Q11 monetary')
 
 # 👁️ Show sample customers (top and bottom)
 safe_print("\n📋 Sample Customers by Monetary Value (Top & Bottom):")
@@ -1564,51 +2145,47 @@ rfm_export_path = os.path.join(project_base_path, 'sql_outputs', 'notebook_outpu
 last_date = pd.to_datetime("2011-12-09")
 
 # 🧾 SQL: Extract RFM base metrics from relational tables
-query_rfm = text("""
-SELECT
-    c.customer_id,
-    MAX(i.invoice_date) AS last_purchase,
-    COUNT(DISTINCT i.invoice_no) AS frequency,
-    ROUND(SUM(ii.line_revenue), 2) AS monetary
-FROM customers AS c
-JOIN invoices AS i ON c.customer_id = i.customer_id
-JOIN invoice_items AS ii ON i.invoice_no = ii.invoice_no
-GROUP BY c.customer_id
-""")
-
-# ▶️ Execute query and load into DataFrame
-rfm_df = pd.read_sql(query_rfm, engine)
+rfm_df = query_result('Q12 RFM base')
 
 # 🧮 Calculate Recency (days since last purchase)
 rfm_df['last_purchase'] = pd.to_datetime(rfm_df['last_purchase'])
 rfm_df['recency'] = (last_date - rfm_df['last_purchase']).dt.days
 
-# 📊 Assign RFM scores using quartiles (1 = lowest, 4 = highest)
-rfm_df['R'] = pd.qcut(rfm_df['recency'], 4, labels=[4, 3, 2, 1]).astype(int)
-rfm_df['F'] = pd.qcut(rfm_df['frequency'].rank(method='first'), 4, labels=[1, 2, 3, 4]).astype(int)
-rfm_df['M'] = pd.qcut(rfm_df['monetary'], 4, labels=[1, 2, 3, 4]).astype(int)
-
-# 🧮 RFM score sum
-rfm_df['RFM_Score'] = rfm_df[['R', 'F', 'M']].sum(axis=1)
-
-# 🏷️ Segment assignment (match EDA logic)
-def assign_segment(row):
-    if row['RFM_Score'] >= 9:
-        return 'High-Value'
-    elif row['R'] >= 3 and row['F'] >= 3:
-        return 'Loyal'
-    elif row['R'] == 1:
-        return 'At-Risk'
-    elif row['F'] == 1 and row['M'] == 1:
-        return 'One-Time'
-    else:
-        return 'Other'
-
-rfm_df['Segment'] = rfm_df.apply(assign_segment, axis=1)
+# 🏷️ RFM segment rules (same table as the EDA script), checked top to bottom (first match wins).
+# Each rule lists inclusive (low, high) bounds on the scores it constrains.
+RFM_SEGMENT_RULES = [
+    ('High-Value', {'RFM_Score': (9, 12)}),
+    ('Loyal',      {'R': (3, 4), 'F': (3, 4)}),
+    ('At-Risk',    {'R': (1, 1)}),
+    ('One-Time',   {'F': (1, 1), 'M': (1, 1)}),
+]
+RFM_DEFAULT_SEGMENT = 'Other'
+
+def score_rfm(rfm_df):
+    """
+    Add quartile R/F/M scores (1 = lowest, 4 = highest), RFM_Score and Segment
+    to a frame with recency, frequency and monetary columns, using whole-column
+    operations only (no per-customer Python loop).
+    """
+    rfm_df['R'] = 4 - pd.qcut(rfm_df['recency'], 4, labels=False)
+    rfm_df['F'] = pd.qcut(rfm_df['frequency'].rank(method='first'), 4, labels=False) + 1
+    rfm_df['M'] = pd.qcut(rfm_df['monetary'], 4, labels=False) + 1
+    rfm_df['RFM_Score'] = rfm_df['R'] + rfm_df['F'] + rfm_df['M']
+
+    scores = {col: rfm_df[col].to_numpy() for col in ['R', 'F', 'M', 'RFM_Score']}
+    conditions = [
+        np.logical_and.reduce([(scores[col] >= low) & (scores[col] <= high) for col, (low, high) in bounds.items()])
+        for _, bounds in RFM_SEGMENT_RULES
+    ]
+    labels = np.array([segment for segment, _ in RFM_SEGMENT_RULES] + [RFM_DEFAULT_SEGMENT], dtype=object)
+    rfm_df['Segment'] = labels[np.select(conditions, np.arange(len(RFM_SEGMENT_RULES)), default=len(RFM_SEGMENT_RULES))]
+    return rfm_df
+
+# 📊 RFM scores (quartiles) and segments
+rfm_df = score_rfm(rfm_df)
 
 # 💾 Export CSV
-rfm_df.to_csv(rfm_export_path, index=False)
-safe_print(f"✅ Saved: {rfm_export_path}")
+save_csv_artifact(rfm_df, rfm_export_path)
 
 # 📋 Show preview of RFM table
 safe_print("\n📋 Sample of RFM Score Table:")
@@ -1724,6 +2301,26 @@ plt.show()
 # In[ ]:
 
 
+# ⏱️ Query timings (with RUN_FACT_BENCHMARK: fact_sales vs the three-way join it replaces)
+safe_print(f"\n⏱️ Query timings ({SQL_ENGINE}):")
+for label in BUSINESS_QUERIES:
+    timing = query_timings[label]
+    if timing.get('skipped'):
+        safe_print(f"   • {label:<24} skipped (inputs unchanged)")
+    elif 'join' in timing:
+        speedup = timing['join'] / max(timing['fact_sales'], 1e-9)
+        safe_print(f"   • {label:<24} join {timing['join']:8.3f}s → fact_sales {timing['fact_sales']:8.3f}s  ({speedup:.1f}x)")
+    else:
+        safe_print(f"   • {label:<24} {timing['fact_sales']:8.3f}s")
+if query_pool is not None:
+    query_pool.shutdown()
+    wall = max(query_finished_at.values()) - queries_started
+    safe_print(f"   ⏱️ {len(BUSINESS_QUERIES)} queries on {QUERY_WORKERS} connections: {wall:.3f}s wall clock "
+               f"({sum(t['fact_sales'] for t in query_timings.values()):.3f}s of query time)")
+if SQL_ENGINE == 'mysql':
+    safe_print(mysql_pool.report())
+    mysql_pool.close()
+
 # ✅ Optional script execution indicator for CLI use
 if __name__ == "__main__":
     safe_print("🚀 SQL analysis script executed directly as a .py file — all queries and exports have been completed.")
@@ -14,6 +14,7 @@
 
 from pathlib import Path
 import os
+import sys
 
 # ✅ Safe print for terminal compatibility
 def safe_print(text):
@@ -116,19 +117,34 @@ except ImportError:
     subprocess.check_call([sys.executable, "-m", "pip", "install", "mysql-connector-python"])
     import mysql.connector
 
-from mysql.connector import connect, Error
+from mysql.connector import Error
+import threading
+import time
+
+# 🏊 Connection pool shared by every step below (schema creation, loading, validation): its connections are
+# opened and authenticated once, then checked out and returned by each step instead of a new connect() per step.
+# MySQLPool (scripts/python/mysql_pool_online_retail_ii.py, also used by 3_sql_analysis) wraps mysql.connector's
+# MySQLConnectionPool: a checkout waits for a free connection, and a returned connection is rolled back and its
+# session reset. It also counts how the connections are used.
+sys.path.insert(0, str(project_base_path / 'scripts' / 'python'))
+from mysql_pool_online_retail_ii import MySQLPool
+
+MYSQL_POOL_SIZE = 4  # connections opened up front
 
 # ✅ Attempt to connect using loaded credentials
 try:
-    connection = connect(
-        host=mysql_config['host'],
-        port=int(mysql_config['port']),  # Ensure port is int
-        user=mysql_config['user'],
-        password=mysql_config['password']
-    )
-    if connection.is_connected():
-        db_info = connection.server_info
-        safe_print(f"✅ Connected to MySQL Server at {mysql_config['host']}:{mysql_config['port']} as user '{mysql_config['user']}' – version {db_info}")
+    # 🚚 allow_local_infile lets the loader use LOAD DATA LOCAL INFILE (Step 5); the server's local_infile decides
+    mysql_pool = MySQLPool({
+        'host': mysql_config['host'],
+        'port': int(mysql_config['port']),  # Ensure port is int
+        'user': mysql_config['user'],
+        'password': mysql_config['password'],
+        'allow_local_infile': True
+    }, MYSQL_POOL_SIZE, name='retail_setup')
+    with mysql_pool.connection() as connection:
+        if connection.is_connected():
+            db_info = connection.server_info
+            safe_print(f"✅ Connected to MySQL Server at {mysql_config['host']}:{mysql_config['port']} as user '{mysql_config['user']}' – version {db_info}")
 except Error as e:
     safe_print(f"❌ Connection failed: {e}")
 
@@ -136,9 +152,6 @@ except Error as e:
 # In[ ]:
 
 
-# ✅ Create a cursor object to execute SQL commands
-cursor = connection.cursor()
-
 # 🧱 SQL script to drop and recreate the database and schema
 schema_sql = """
 DROP DATABASE IF EXISTS retail_sales;
@@ -162,8 +175,7 @@ CREATE TABLE products (
 CREATE TABLE invoices (
     invoice_no VARCHAR(10) PRIMARY KEY,
     invoice_date DATETIME,
-    customer_id INT,
-    FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
+    customer_id INT
 );
 
 -- Invoice items table
@@ -172,19 +184,46 @@ CREATE TABLE invoice_items (
     stock_code VARCHAR(10),
     quantity INT,
     unit_price DECIMAL(10, 2),
-    line_revenue DECIMAL(12, 2),
-    FOREIGN KEY (invoice_no) REFERENCES invoices(invoice_no),
-    FOREIGN KEY (stock_code) REFERENCES products(stock_code)
+    line_revenue DECIMAL(12, 2)
 );
 """
 
+# 🔗 Foreign keys and their secondary indexes, one ALTER TABLE per table
+table_constraints = {
+    'invoices': [
+        "ADD INDEX idx_invoices_customer_id (customer_id)",
+        "ADD CONSTRAINT fk_invoices_customer FOREIGN KEY (customer_id) REFERENCES customers(customer_id)",
+    ],
+    'invoice_items': [
+        "ADD INDEX idx_invoice_items_invoice_no (invoice_no)",
+        "ADD INDEX idx_invoice_items_stock_code (stock_code)",
+        "ADD CONSTRAINT fk_invoice_items_invoice FOREIGN KEY (invoice_no) REFERENCES invoices(invoice_no)",
+        "ADD CONSTRAINT fk_invoice_items_product FOREIGN KEY (stock_code) REFERENCES products(stock_code)",
+    ],
+}
+
+# ⚡ Fast-load mode: load into tables without foreign keys or secondary indexes, with FOREIGN_KEY_CHECKS and
+# UNIQUE_CHECKS off, then add all of them after the load (Step 5). InnoDB skips the per-row parent lookups and
+# index maintenance, and the integrity checks in Step 7 validate the loaded rows instead.
+# With False, the constraints are added to the empty tables here and enforced on every inserted row.
+MYSQL_FAST_LOAD = True
+
+def add_table_constraints(cursor):
+    for table, clauses in table_constraints.items():
+        cursor.execute(f"ALTER TABLE {table} " + ", ".join(clauses))
+
 # 🏗️ Execute schema creation step by step
 try:
-    for statement in schema_sql.strip().split(';'):
-        if statement.strip():
-            cursor.execute(statement.strip() + ';')
-
-    connection.commit()  # commit DDL changes
+    with mysql_pool.connection() as connection:
+        cursor = connection.cursor()
+        for statement in schema_sql.strip().split(';'):
+            if statement.strip():
+                cursor.execute(statement.strip() + ';')
+        if not MYSQL_FAST_LOAD:
+            add_table_constraints(cursor)
+
+        connection.commit()  # commit DDL changes
+        cursor.close()
     safe_print("✅ Database and schema created successfully.")
 except Error as e:
     safe_print(f"❌ Failed to create schema: {e}")
@@ -193,7 +232,12 @@ except Error as e:
 # In[ ]:
 
 
+import graphlib
+import itertools
+import re
 import pandas as pd
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 # ✅ Define file-to-table mapping
 table_map = {
@@ -203,48 +247,233 @@ table_map = {
     'invoice_items.csv': 'invoice_items'
 }
 
-# ✅ Establish a new connection that includes the database
-try:
-    conn_with_db = connect(
-    host=mysql_config['host'],
-    port=int(mysql_config['port']),
-    user=mysql_config['user'],
-    password=mysql_config['password'],
-    database=mysql_config['database']
-)
-    cursor = conn_with_db.cursor()
-
-    for filename, table in table_map.items():
-        file_path = cleaned_data_path / filename
-        df = pd.read_csv(file_path)
-
-        safe_print(f"\n📥 Loading data into table: {table}")
-
-        if df.empty:
-            safe_print(f"⚠️  Skipped `{table}` – CSV file is empty.")
-            continue
-
-        # Dynamically build the insert statement
-        columns = ', '.join(df.columns)
-        placeholders = ', '.join(['%s'] * len(df.columns))
-        insert_query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
-
-        # Convert DataFrame rows to list of tuples and insert
-        data_tuples = list(df.itertuples(index=False, name=None))
-        cursor.executemany(insert_query, data_tuples)
-        conn_with_db.commit()
+# 🗃️ Prefer the Parquet copies written by the cleaning script (falls back to the .csv files)
+USE_PARQUET = True
+if USE_PARQUET:
+    try:
+        import pyarrow.dataset as pa_dataset
+    except ImportError:
+        USE_PARQUET = False
+        safe_print("⚠️ pyarrow not installed – loading from the .csv files.")
+
+# 📋 Columns read for each table (column projection skips e.g. the invoice_month partition key)
+table_columns = {
+    'customers': ['customer_id', 'country'],
+    'products': ['stock_code', 'description', 'unit_price'],
+    'invoices': ['invoice_no', 'invoice_date', 'customer_id'],
+    'invoice_items': ['invoice_no', 'stock_code', 'quantity', 'unit_price', 'line_revenue']
+}
 
-        safe_print(f"✅ Inserted {df.shape[0]} rows into `{table}`")
+# 📦 Bounded-memory loading: each table is read MYSQL_CHUNK_ROWS rows at a time (Parquet record batches or
+# CSV chunks) and sent in batches, so client memory stays flat however large invoice_items grows
+MYSQL_CHUNK_ROWS = 50_000  # rows read from the cleaned file at a time
+MYSQL_COMMIT_EVERY = 10  # commit after this many INSERT batches or LOAD DATA chunks
+
+def parquet_source(table):
+    """The table's Parquet copy (a month-partitioned directory or a single file), or None to read the .csv."""
+    parquet_dir = cleaned_data_path / 'parquet'
+    for source in (parquet_dir / table, parquet_dir / f"{table}.parquet"):
+        if USE_PARQUET and source.exists():
+            return source
+    return None
+
+def read_cleaned_chunks(filename, table, source=None):
+    """Yield the table's columns in frames of at most MYSQL_CHUNK_ROWS rows (only from source, e.g. one partition file, if given)."""
+    source = source or parquet_source(table)
+    if source is not None:
+        dataset = pa_dataset.dataset(source, format='parquet', partitioning='hive')
+        for batch in dataset.to_batches(columns=table_columns[table], batch_size=MYSQL_CHUNK_ROWS):
+            if batch.num_rows == 0:
+                continue
+            df = batch.to_pandas()
+            # 🕒 Hand timestamps to the driver as the same text the .csv files carry
+            for col in df.select_dtypes(include='datetime').columns:
+                df[col] = df[col].dt.strftime('%Y-%m-%d %H:%M:%S')
+            yield df
+        return
+    for df in pd.read_csv(cleaned_data_path / filename, usecols=table_columns[table], chunksize=MYSQL_CHUNK_ROWS):
+        yield df[table_columns[table]]
+
+# 🚚 Load mode: 'load_data' streams each table to the server with LOAD DATA LOCAL INFILE (the server needs
+# local_infile=ON); 'insert' sends batched multi-row INSERTs. If the server or client refuses LOCAL INFILE,
+# the remaining tables fall back to 'insert'.
+MYSQL_LOAD_MODE = 'load_data'  # 'load_data' or 'insert'
+MYSQL_INSERT_BATCH = 5_000  # rows per multi-row INSERT statement
+LOCAL_INFILE_REFUSED = {1148, 2068, 3948}  # command not allowed / rejected by client / disabled on server
+
+def report_load(table, rows, elapsed, method):
+    safe_print(f"✅ Inserted {rows:,} rows into `{table}` in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s, {method})")
+
+def load_data_infile(cursor, table, df):
+    """
+    Write df to a temporary CSV in a fixed dialect, stream it to the server with LOAD DATA LOCAL INFILE
+    and return the number of rows the server stored. LOCAL implies IGNORE: rows with a duplicate key or
+    an invalid value are skipped with a warning instead of an error, so any warning above the Note level
+    (or a short row count) is listed from SHOW WARNINGS and fails the load.
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, newline='', encoding='utf-8') as fh:
+        df.to_csv(fh, index=False, header=False, na_rep='NULL', lineterminator='\n')
+    try:
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE '{Path(fh.name).as_posix()}' INTO TABLE {table} CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+            "LINES TERMINATED BY '\\n' "
+            f"({', '.join(df.columns)})"
+        )
+        loaded = cursor.rowcount
+        warnings = []
+        if cursor.warning_count:
+            cursor.execute("SHOW WARNINGS")
+            warnings = cursor.fetchall()
+        problems = [warning for warning in warnings if warning[0] != 'Note']
+        if problems or loaded != len(df):
+            for level, code, message in problems[:10]:
+                safe_print(f"   ⚠️ {level} {code}: {message}")
+            raise Error(msg=f"LOAD DATA into `{table}` stored {loaded:,} of {len(df):,} rows "
+                            f"({cursor.warning_count:,} warnings, {len(problems):,} above Note level)")
+        if warnings:
+            safe_print(f"ℹ️ LOAD DATA into `{table}`: {len(warnings):,} notes (values rounded to the column type)")
+        return loaded
+    finally:
+        os.remove(fh.name)
+
+def insert_batches(cursor, table, df):
+    """
+    Send df as multi-row INSERTs of MYSQL_INSERT_BATCH rows (executemany folds each batch into one statement).
+    Returns the number of batches and of rows the server stored.
+    """
+    insert_query = f"INSERT INTO {table} ({', '.join(df.columns)}) VALUES ({', '.join(['%s'] * len(df.columns))})"
+    rows = df.itertuples(index=False, name=None)
+    batches = stored = 0
+    while (batch := list(itertools.islice(rows, MYSQL_INSERT_BATCH))):
+        cursor.executemany(insert_query, batch)
+        batches += 1
+        stored += cursor.rowcount
+    return batches, stored
+
+def send_chunk(cursor, table, df):
+    """Send one chunk in the current load mode and return the number of batches it took and of rows stored."""
+    global MYSQL_LOAD_MODE
+    if MYSQL_LOAD_MODE == 'load_data':
+        try:
+            return 1, load_data_infile(cursor, table, df)
+        except Error as e:
+            if e.errno not in LOCAL_INFILE_REFUSED:
+                raise
+            if MYSQL_LOAD_MODE == 'load_data':  # another worker may have switched already
+                MYSQL_LOAD_MODE = 'insert'
+                safe_print(f"⚠️ LOAD DATA LOCAL INFILE refused ({e.msg}) – falling back to batched INSERTs.")
+    return insert_batches(cursor, table, df)
+
+# 🧵 Parallel loading: tables are scheduled on MYSQL_LOAD_WORKERS threads in foreign-key order (a table starts
+# as soon as every table it references is loaded, so customers and products load side by side), and a
+# month-partitioned table is split into one task per partition file, i.e. per invoice range.
+# Each task checks out a connection from mysql_pool, so at most MYSQL_POOL_SIZE tasks load at once.
+MYSQL_LOAD_WORKERS = 4
+worker_stats = {}
+stats_lock = threading.Lock()
+
+def table_dependencies():
+    """DAG of the tables in table_map: each table's parents are the tables its foreign keys reference."""
+    tables = set(table_map.values())
+    return {
+        table: {parent for clause in table_constraints.get(table, []) for parent in re.findall(r"REFERENCES (\w+)\(", clause)} & tables
+        for table in tables
+    }
+
+def table_partitions(table):
+    """Sources loaded as separate tasks: one per file of a partitioned Parquet table, otherwise the whole table."""
+    source = parquet_source(table)
+    if source is not None and source.is_dir():
+        fragments = pa_dataset.dataset(source, format='parquet', partitioning='hive').get_fragments()
+        return sorted(Path(fragment.path) for fragment in fragments) or [source]
+    return [source]
+
+def load_partition(filename, table, source):
+    """
+    Load one table or partition on a pooled connection, committing every MYSQL_COMMIT_EVERY batches.
+    Returns the number of rows the server reported as stored.
+    """
+    start = time.perf_counter()
+    rows = uncommitted_batches = 0
+    with mysql_pool.connection(mysql_config['database']) as connection:
+        cursor = connection.cursor()
+        if MYSQL_FAST_LOAD:
+            cursor.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+        for df in read_cleaned_chunks(filename, table, source):
+            batches, stored = send_chunk(cursor, table, df)
+            uncommitted_batches += batches
+            rows += stored
+            if uncommitted_batches >= MYSQL_COMMIT_EVERY:
+                connection.commit()
+                uncommitted_batches = 0
+        connection.commit()
+        cursor.close()
+    with stats_lock:
+        stats = worker_stats.setdefault(threading.current_thread().name, {'tasks': 0, 'rows': 0, 'seconds': 0.0})
+        stats['tasks'] += 1
+        stats['rows'] += rows
+        stats['seconds'] += time.perf_counter() - start
+    return rows
+
+# ✅ Load every table in dependency order on the worker pool
+load_pool = ThreadPoolExecutor(max_workers=MYSQL_LOAD_WORKERS, thread_name_prefix='mysql-load')
+try:
+    load_start = time.perf_counter()
+    filenames = {table: filename for filename, table in table_map.items()}
+    scheduler = graphlib.TopologicalSorter(table_dependencies())
+    scheduler.prepare()
+    running, remaining, table_rows, table_start = {}, {}, {}, {}
+
+    while scheduler.is_active():
+        for table in scheduler.get_ready():
+            safe_print(f"\n📥 Loading data into table: {table}")
+            partitions = table_partitions(table)
+            remaining[table], table_rows[table], table_start[table] = len(partitions), 0, time.perf_counter()
+            for source in partitions:
+                running[load_pool.submit(load_partition, filenames[table], table, source)] = table
+
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            table = running.pop(future)
+            table_rows[table] += future.result()
+            remaining[table] -= 1
+            if remaining[table]:
+                continue
+            scheduler.done(table)  # its children may start now
+            if table_rows[table] == 0:
+                safe_print(f"⚠️  Skipped `{table}` – CSV file is empty.")
+                continue
+            if MYSQL_LOAD_MODE == 'load_data':
+                method = f"LOAD DATA LOCAL INFILE, chunks of {MYSQL_CHUNK_ROWS:,}"
+            else:
+                method = f"INSERT batches of {MYSQL_INSERT_BATCH:,}"
+            report_load(table, table_rows[table], time.perf_counter() - table_start[table],
+                        f"{method}, {len(table_partitions(table))} task(s), commit every {MYSQL_COMMIT_EVERY}")
+
+    # 👷 Per-worker throughput (busy time only)
+    safe_print(f"\n👷 Load workers ({MYSQL_LOAD_WORKERS} threads):")
+    for worker, stats in sorted(worker_stats.items()):
+        safe_print(f"   • {worker}: {stats['tasks']} task(s), {stats['rows']:,} rows in {stats['seconds']:.2f}s "
+                   f"({stats['rows'] / max(stats['seconds'], 1e-9):,.0f} rows/s)")
+
+    if MYSQL_FAST_LOAD:
+        # 🔗 Foreign keys and indexes in one pass per table (with foreign_key_checks off, MySQL adds the
+        # keys in place without re-reading the parents; Step 7 checks the rows)
+        start = time.perf_counter()
+        with mysql_pool.connection(mysql_config['database']) as conn_with_db:
+            cursor = conn_with_db.cursor()
+            cursor.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+            add_table_constraints(cursor)
+            cursor.close()
+        safe_print(f"\n🔗 Added foreign keys and indexes in {time.perf_counter() - start:.2f}s")
+    safe_print(f"⏱️ Total load time: {time.perf_counter() - load_start:.2f}s")
 
 except Error as e:
     safe_print(f"❌ Error inserting data: {e}")
 
 finally:
-    if cursor:
-        cursor.close()
-    if conn_with_db.is_connected():
-        conn_with_db.close()
-        safe_print("🔌 MySQL connection closed.")
+    load_pool.shutdown(cancel_futures=True)  # every task's connection is back in mysql_pool
 
 
 # In[ ]:
@@ -252,109 +481,97 @@ finally:
 
 # ✅ Validate inserted row counts
 try:
-    conn_check = connect(
-        host=mysql_config['host'],
-        port=int(mysql_config['port']),
-        user=mysql_config['user'],
-        password=mysql_config['password'],
-        database=mysql_config['database']
-    )
-    cursor = conn_check.cursor()
-
-    for table in table_map.values():
-        cursor.execute(f"SELECT COUNT(*) FROM {table}")
-        count = cursor.fetchone()[0]
-        safe_print(f"🔎 Table `{table}` contains {count:,} rows")
+    with mysql_pool.connection(mysql_config['database']) as conn_check:
+        cursor = conn_check.cursor()
+
+        for table in table_map.values():
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            count = cursor.fetchone()[0]
+            safe_print(f"🔎 Table `{table}` contains {count:,} rows")
+        cursor.close()
 
     safe_print("✅ All table row counts verified successfully.")
 
 except Error as e:
     safe_print(f"❌ Validation failed: {e}")
 
-finally:
-    if 'cursor' in locals():
-        cursor.close()
-    if conn_check.is_connected():
-        conn_check.close()
-
 
 # In[ ]:
 
 
 # ✅ Sample referential integrity and sanity checks
 try:
-    conn_check = connect(**mysql_config)
-    cursor = conn_check.cursor()
-
-    # Store results for optional export/logging
-    integrity_results = {}
-
-    # 1. Orphaned rows in invoice_items
-    cursor.execute("""
-        SELECT COUNT(*) FROM invoice_items
-        WHERE invoice_no NOT IN (SELECT invoice_no FROM invoices)
-           OR stock_code NOT IN (SELECT stock_code FROM products)
-    """)
-    orphan_items = cursor.fetchone()[0]
-    integrity_results["orphan_invoice_items"] = orphan_items
-    if orphan_items == 0:
-        safe_print("🧩 OK – No orphaned rows in `invoice_items` (foreign keys to invoices/products)")
-    else:
-        safe_print(f"⚠️ {orphan_items:,} orphaned rows in `invoice_items`")
-
-    # 2. Invoices with missing customers
-    cursor.execute("""
-        SELECT COUNT(*) FROM invoices
-        WHERE customer_id NOT IN (SELECT customer_id FROM customers)
-    """)
-    orphan_invoices = cursor.fetchone()[0]
-    integrity_results["orphan_invoices"] = orphan_invoices
-    if orphan_invoices == 0:
-        safe_print("🧾 OK – All invoices reference valid customers")
-    else:
-        safe_print(f"⚠️ {orphan_invoices:,} invoices with missing customer_id")
-
-    # 3. Invoices with no items
-    cursor.execute("""
-        SELECT COUNT(*) FROM invoices
-        WHERE invoice_no NOT IN (SELECT DISTINCT invoice_no FROM invoice_items)
-    """)
-    empty_invoices = cursor.fetchone()[0]
-    integrity_results["empty_invoices"] = empty_invoices
-    if empty_invoices == 0:
-        safe_print("📪 OK – All invoices have at least one line item")
-    else:
-        safe_print(f"⚠️ {empty_invoices:,} invoices with no line items")
-
-    # 4. Customers with no invoices
-    cursor.execute("""
-        SELECT COUNT(*) FROM customers
-        WHERE customer_id NOT IN (SELECT DISTINCT customer_id FROM invoices)
-    """)
-    inactive_customers = cursor.fetchone()[0]
-    integrity_results["inactive_customers"] = inactive_customers
-    safe_print(f"👥 Info – {inactive_customers:,} customers with no invoices")
-
-    # 5. Products never sold
-    cursor.execute("""
-        SELECT COUNT(*) FROM products
-        WHERE stock_code NOT IN (SELECT DISTINCT stock_code FROM invoice_items)
-    """)
-    unsold_products = cursor.fetchone()[0]
-    integrity_results["unsold_products"] = unsold_products
-    safe_print(f"📦 Info – {unsold_products:,} products never sold")
+    with mysql_pool.connection(mysql_config['database']) as conn_check:
+        cursor = conn_check.cursor()
+
+        # Store results for optional export/logging
+        integrity_results = {}
+
+        # 1. Orphaned rows in invoice_items
+        cursor.execute("""
+            SELECT COUNT(*) FROM invoice_items
+            WHERE invoice_no NOT IN (SELECT invoice_no FROM invoices)
+               OR stock_code NOT IN (SELECT stock_code FROM products)
+        """)
+        orphan_items = cursor.fetchone()[0]
+        integrity_results["orphan_invoice_items"] = orphan_items
+        if orphan_items == 0:
+            safe_print("🧩 OK – No orphaned rows in `invoice_items` (foreign keys to invoices/products)")
+        else:
+            safe_print(f"⚠️ {orphan_items:,} orphaned rows in `invoice_items`")
+
+        # 2. Invoices with missing customers
+        cursor.execute("""
+            SELECT COUNT(*) FROM invoices
+            WHERE customer_id NOT IN (SELECT customer_id FROM customers)
+        """)
+        orphan_invoices = cursor.fetchone()[0]
+        integrity_results["orphan_invoices"] = orphan_invoices
+        if orphan_invoices == 0:
+            safe_print("🧾 OK – All invoices reference valid customers")
+        else:
+            safe_print(f"⚠️ {orphan_invoices:,} invoices with missing customer_id")
+
+        # 3. Invoices with no items
+        cursor.execute("""
+            SELECT COUNT(*) FROM invoices
+            WHERE invoice_no NOT IN (SELECT DISTINCT invoice_no FROM invoice_items)
+        """)
+        empty_invoices = cursor.fetchone()[0]
+        integrity_results["empty_invoices"] = empty_invoices
+        if empty_invoices == 0:
+            safe_print("📪 OK – All invoices have at least one line item")
+        else:
+            safe_print(f"⚠️ {empty_invoices:,} invoices with no line items")
+
+        # 4. Customers with no invoices
+        cursor.execute("""
+            SELECT COUNT(*) FROM customers
+            WHERE customer_id NOT IN (SELECT DISTINCT customer_id FROM invoices)
+        """)
+        inactive_customers = cursor.fetchone()[0]
+        integrity_results["inactive_customers"] = inactive_customers
+        safe_print(f"👥 Info – {inactive_customers:,} customers with no invoices")
+
+        # 5. Products never sold
+        cursor.execute("""
+            SELECT COUNT(*) FROM products
+            WHERE stock_code NOT IN (SELECT DISTINCT stock_code FROM invoice_items)
+        """)
+        unsold_products = cursor.fetchone()[0]
+        integrity_results["unsold_products"] = unsold_products
+        safe_print(f"📦 Info – {unsold_products:,} products never sold")
+        cursor.close()
 
     safe_print("✅ Referential integrity and sanity checks completed successfully.")
 
 except Error as e:
     safe_print(f"❌ Referential integrity check failed: {e}")
 
-finally:
-    if cursor:
-        cursor.close()
-    if conn_check.is_connected():
-        conn_check.close()
-        safe_print("🔌 MySQL connection closed")
+# 🏊 Pool usage across all steps, then close its connections
+safe_print(mysql_pool.report())
+mysql_pool.close()
+safe_print("🔌 MySQL connections closed")
 
 
 # In[ ]:
@@ -0,0 +1,69 @@
+# 🏊 MySQL Connection Pool Helper – Online Retail II
+# 📓 Used by: 3_sql_analysis_sales_performance_online_retail_ii and 4_mysql_real_env_setup_online_retail_ii
+# ⚙️ Description: Wraps mysql.connector's connection pool with blocking checkout and pool-level stats.
+# 🏫 School: Ironhack Puerto Rico
+# 🎓 Bootcamp: Data Science and Machine Learning
+# 📅 Date: December 20, 2024
+# 👩‍💻 Author: Ginosca Alejandro Dávila
+
+import threading
+import time
+from contextlib import contextmanager
+
+from mysql.connector import Error, pooling
+
+
+class MySQLPool:
+    """
+    mysql.connector.pooling.MySQLConnectionPool with blocking checkout and pool-level stats.
+
+    mysql.connector's pool raises when every connection is checked out; here a
+    checkout waits for a connection to be returned instead. Returned connections
+    are rolled back and their session is reset by the pool.
+    """
+
+    def __init__(self, config, size, name):
+        self.pool = pooling.MySQLConnectionPool(pool_name=name, pool_size=size, pool_reset_session=True, **config)
+        self.size = size
+        self.free = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        self.in_use = 0
+        self.stats = {'opened': size, 'checkouts': 0, 'peak_in_use': 0, 'wait_seconds': 0.0}
+
+    @contextmanager
+    def connection(self, database=None):
+        """Check out a connection (switched to database, if given) and return it to the pool afterwards."""
+        start = time.perf_counter()
+        self.free.acquire()
+        try:
+            cnx = self.pool.get_connection()
+        except Error:
+            self.free.release()
+            raise
+        with self.lock:
+            self.in_use += 1
+            self.stats['checkouts'] += 1
+            self.stats['peak_in_use'] = max(self.stats['peak_in_use'], self.in_use)
+            self.stats['wait_seconds'] += time.perf_counter() - start
+        try:
+            if database:
+                cnx.cmd_init_db(database)  # the session reset on return clears the current database
+            yield cnx
+        finally:
+            cnx.close()  # rolls back anything uncommitted, resets the session and returns it to the pool
+            with self.lock:
+                self.in_use -= 1
+            self.free.release()
+
+    def report(self):
+        """One-line summary of how the pool's connections were used."""
+        stats = self.stats
+        return (f"🏊 Connection pool `{self.pool.pool_name}`: {stats['opened']} connections opened, "
+                f"{stats['checkouts']} checkouts ({stats['checkouts'] - stats['opened']} reused), "
+                f"{stats['peak_in_use']} in use at peak, {stats['wait_seconds']:.3f}s waiting for a free connection")
+
+    def close(self):
+        """Close every pooled connection: each one is checked out and disconnected instead of returned."""
+        for _ in range(self.size):  # every checkout has been returned by now
+            self.free.acquire()
+            self.pool.get_connection().disconnect()